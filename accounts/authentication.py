@@ -0,0 +1,49 @@
+"""Authentication backed by a short-lived user cache."""
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth-user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reads the token's user from the cache
+
+    The cache entry holds the user and the ids (jti) of the tokens that
+    already passed the full checks against it: user exists, is active and,
+    if enabled, the token wasn't revoked by a password change. A token seen
+    before costs a cache read; a new token of a cached user goes through the
+    checks once. Entries expire after AUTH_USER_CACHE_TTL seconds and are
+    dropped whenever the user is saved or deleted.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is not None and jti in entry["tokens"]:
+            return entry["user"]
+
+        user = super().get_user(validated_token)
+        tokens = entry["tokens"] if entry is not None else frozenset()
+        cache.set(
+            key,
+            {"user": user, "tokens": tokens | {jti}},
+            timeout=settings.AUTH_USER_CACHE_TTL,
+        )
+        return user
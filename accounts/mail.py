@@ -0,0 +1,183 @@
+"""Batched email delivery."""
+
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .types import EmailData
+
+logger = logging.getLogger(__name__)
+
+# Set while a flush of the queue is scheduled
+FLUSH_SCHEDULED_KEY = "queued-email:flush-scheduled"
+
+# Sent emails are kept this long, failed ones until deleted by hand
+SENT_EMAIL_RETENTION = timedelta(days=7)
+
+# Errors meaning the SMTP connection was lost rather than the email rejected
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def render_message(email_data: EmailData) -> str:
+    """
+    Body of an email: its message, or its template rendered with its context
+
+    Templates are compiled once by the template engine's cached loader, which
+    also picks up edits while DEBUG is on.
+    """
+    template_name = email_data.get("template_name")
+    if not template_name:
+        return email_data["message"]
+    return get_template(template_name).render(email_data.get("context") or {})
+
+
+def build_message(email_data: EmailData, connection=None) -> EmailMultiAlternatives:
+    """Email with the message as both the text and the HTML body"""
+    message = render_message(email_data)
+    msg = EmailMultiAlternatives(
+        subject=email_data["subject"],
+        from_email=email_data.get("from_email") or settings.DEFAULT_FROM_EMAIL,
+        to=email_data["recipient_list"],
+        body=message,
+        cc=email_data.get("cc"),
+        bcc=email_data.get("bcc"),
+        connection=connection,
+    )
+    msg.attach_alternative(message, "text/html")
+    return msg
+
+
+def schedule_flush():
+    """
+    Flush the queue once the batch window has passed, unless a flush is
+    already scheduled
+    """
+    from .tasks import send_queued_mail
+
+    window = settings.EMAIL_BATCH_WINDOW
+    if cache.add(FLUSH_SCHEDULED_KEY, True, timeout=window + 60):
+        send_queued_mail.apply_async(countdown=window)
+
+
+def queue_mail(email_data: EmailData):
+    """
+    Queue an email for the next batch
+
+    Emails queued within EMAIL_BATCH_WINDOW seconds of each other are sent
+    together over one SMTP connection. The flush is scheduled when the
+    surrounding transaction commits.
+    """
+    from .models import QueuedEmail
+
+    email = QueuedEmail.objects.create(data=dict(email_data))
+    transaction.on_commit(schedule_flush)
+    return email
+
+
+def requeue_stalled_mail() -> int:
+    """
+    Put emails back in the queue whose batch has been sending for longer than
+    EMAIL_SENDING_TIMEOUT seconds, i.e. whose worker died mid-batch
+
+    Returns:
+        Number of emails requeued
+    """
+    from .models import QueuedEmail
+
+    stalled_since = timezone.now() - timedelta(seconds=settings.EMAIL_SENDING_TIMEOUT)
+    requeued = QueuedEmail.objects.filter(
+        status="sending", modified__lt=stalled_since
+    ).update(status="pending", batch=None, modified=timezone.now())
+    if requeued:
+        logger.warning(f"Requeued {requeued} stalled emails")
+    return requeued
+
+
+def flush_mail_queue(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Send a batch of queued emails over a single SMTP connection
+
+    A failure to send one email is recorded on it and doesn't stop the rest
+    of the batch. If the connection can't be opened, or is lost partway
+    through, the emails not sent yet go back to the queue and the error is
+    raised.
+
+    Returns:
+        Counts of sent and failed emails and of emails still queued
+    """
+    from .models import QueuedEmail
+
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    pending = QueuedEmail.objects.filter(status="pending")
+    requeue_stalled_mail()
+
+    # Claim the batch, so concurrent flushes never send an email twice
+    batch_id = uuid.uuid4()
+    ids = list(pending.values_list("pk", flat=True)[:batch_size])
+    QueuedEmail.objects.filter(pk__in=ids, status="pending").update(
+        status="sending", batch=batch_id, modified=timezone.now()
+    )
+    emails = list(QueuedEmail.objects.filter(batch=batch_id))
+
+    sent = failed = 0
+    if emails:
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            QueuedEmail.objects.filter(batch=batch_id).update(
+                status="pending", batch=None
+            )
+            raise
+
+        unsent, connection_error = [], None
+        try:
+            for index, email in enumerate(emails):
+                try:
+                    build_message(email.data, connection=connection).send()
+                    email.status = "sent"
+                    email.sent_at = timezone.now()
+                    sent += 1
+                except CONNECTION_ERRORS as e:
+                    emails, unsent = emails[:index], emails[index:]
+                    connection_error = e
+                    break
+                except Exception as e:
+                    logger.error(f"Email {email.pk} failed: {str(e)}")
+                    email.status = "failed"
+                    email.error = str(e)
+                    failed += 1
+        finally:
+            connection.close()
+        QueuedEmail.objects.bulk_update(emails, ["status", "sent_at", "error"])
+        logger.info(f"Email batch sent: {sent} sent, {failed} failed")
+
+        if connection_error is not None:
+            QueuedEmail.objects.filter(pk__in=[email.pk for email in unsent]).update(
+                status="pending", batch=None, modified=timezone.now()
+            )
+            logger.warning(
+                f"Email connection lost, requeued {len(unsent)} emails: "
+                f"{str(connection_error)}"
+            )
+            raise connection_error
+
+    QueuedEmail.objects.filter(
+        status="sent", sent_at__lt=timezone.now() - SENT_EMAIL_RETENTION
+    ).delete()
+
+    return {"sent": sent, "failed": failed, "queued": pending.count()}
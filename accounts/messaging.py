@@ -0,0 +1,139 @@
+"""Publishing notifications to the message broker."""
+
+import json
+import logging
+import os
+import threading
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from kombu import Connection, Exchange
+from kombu.common import maybe_declare
+from kombu.pools import ProducerPool
+
+logger = logging.getLogger(__name__)
+
+# Messages survive a broker restart
+PERSISTENT = 2
+
+
+class Publisher:
+    """
+    Publishes messages over pooled broker connections
+
+    Connections and their channels are opened once and reused, so a message
+    costs a publish frame instead of a TCP/TLS connect, handshake and close.
+    Exchanges are declared once per connection. With confirms on, publishing
+    returns only after the broker has acknowledged the message.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pool_limit: Optional[int] = None,
+        confirm: bool = True,
+    ):
+        limit = pool_limit or settings.MESSAGE_BROKER_POOL_LIMIT
+        self.connection = Connection(
+            url or settings.MESSAGE_BROKER_URL,
+            transport_options={"confirm_publish": confirm},
+        )
+        self.connections = self.connection.Pool(limit)
+        self.producers = ProducerPool(self.connections, limit=limit)
+        self._exchanges = {}
+
+    def _exchange(self, name: str, exchange_type: str) -> Exchange:
+        key = (name, exchange_type)
+        if key not in self._exchanges:
+            # Matches how the exchanges were first declared: transient
+            self._exchanges[key] = Exchange(
+                name, type=exchange_type, durable=False, auto_delete=False
+            )
+        return self._exchanges[key]
+
+    def publish_batch(
+        self,
+        exchange: str,
+        messages: Iterable[Tuple[str, str]],
+        exchange_type: str = "topic",
+    ) -> int:
+        """
+        Publish messages to one exchange over a single channel
+
+        Args:
+            exchange (str): Exchange name
+            messages: (routing key, body) pairs
+            exchange_type (str): Type the exchange is declared with
+
+        Returns:
+            Number of messages published
+        """
+        target = self._exchange(exchange, exchange_type)
+        published = 0
+        with self.producers.acquire(block=True) as producer:
+            maybe_declare(target, producer.channel, retry=True)
+            for routing_key, body in messages:
+                producer.publish(
+                    body.encode("utf-8"),
+                    exchange=target,
+                    routing_key=routing_key,
+                    content_type="application/json",
+                    content_encoding="utf-8",
+                    delivery_mode=PERSISTENT,
+                    retry=True,
+                )
+                published += 1
+        return published
+
+    def publish(
+        self, exchange: str, routing_key: str, body: str, exchange_type: str = "topic"
+    ):
+        """Publish one message; see publish_batch()"""
+        self.publish_batch(exchange, [(routing_key, body)], exchange_type)
+
+    def close(self):
+        self.producers.force_close_all()
+        self.connections.force_close_all()
+        self.connection.release()
+
+
+_publisher: Optional[Publisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> Publisher:
+    """Publisher shared by the current process"""
+    global _publisher
+
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = Publisher()
+    return _publisher
+
+
+def reset_publisher():
+    """Close the shared publisher, e.g. after the broker settings changed"""
+    global _publisher
+
+    with _publisher_lock:
+        if _publisher is not None:
+            _publisher.close()
+        _publisher = None
+
+
+def _forget_publisher():
+    # Connections can't be shared with a forked child
+    global _publisher, _publisher_lock
+
+    _publisher = None
+    _publisher_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_publisher)
+
+
+def publish_json(exchange: str, routing_key: str, data, exchange_type: str = "topic"):
+    """Publish data as JSON with the shared publisher"""
+    get_publisher().publish(exchange, routing_key, json.dumps(data), exchange_type)
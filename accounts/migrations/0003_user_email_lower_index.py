@@ -0,0 +1,50 @@
+from django.db import migrations
+
+INDEX_NAME = "user_email_lower_idx"
+
+# auth.User belongs to Django, so the expression index is created with SQL
+# rather than through the model's Meta. PostgreSQL builds it concurrently, so
+# auth_user stays writable while a large table is indexed.
+CREATE_INDEX = {
+    "postgresql": (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+        "ON auth_user (LOWER(email))"
+    ),
+    "sqlite": f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON auth_user (LOWER(email))",
+    # Functional key part, MySQL 8.0.13+; built online by InnoDB
+    "mysql": f"CREATE INDEX {INDEX_NAME} ON auth_user ((LOWER(email)))",
+}
+
+DROP_INDEX = {
+    "postgresql": f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}",
+    "sqlite": f"DROP INDEX IF EXISTS {INDEX_NAME}",
+    "mysql": f"DROP INDEX {INDEX_NAME} ON auth_user",
+}
+
+
+def create_index(apps, schema_editor):
+    sql = CREATE_INDEX.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    sql = DROP_INDEX.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """Index auth_user on LOWER(email), for case-insensitive email lookups"""
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0002_queuedemail"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:50
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def create_missing_profiles(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    Profile = apps.get_model("accounts", "Profile")
+
+    user_ids = (
+        User.objects.filter(profile__isnull=True)
+        .values_list("pk", flat=True)
+        .iterator()
+    )
+    batch = []
+    for user_id in user_ids:
+        batch.append(Profile(user_id=user_id))
+        if len(batch) == BATCH_SIZE:
+            Profile.objects.bulk_create(batch)
+            batch = []
+    Profile.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
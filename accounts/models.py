@@ -39,3 +39,28 @@ class Profile(BaseModel):
     @cached_property
     def profile_picture(self):
         return self.metadata.get("profile_picture", None)
+
+
+class QueuedEmail(BaseModel):
+    """Email waiting to be sent in the next batch"""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    data = models.JSONField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True
+    )
+    batch = models.UUIDField(null=True, blank=True, db_index=True)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta(BaseModel.Meta):
+        ordering = ("created",)
+
+    def __str__(self):
+        return f"{self.data.get('subject')} -> {self.data.get('recipient_list')}"
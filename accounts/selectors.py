@@ -1,7 +1,30 @@
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+def get_user_by_email(email: str) -> User | None:
+    """
+    User with this email, ignoring case
+
+    Matches LOWER(email) so the lookup is answered from user_email_lower_idx.
+    """
+    if not email:
+        return None
+    return (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower=email.lower())
+        .first()
+    )
 
 
 def get_user(email: str, **kwargs: dict) -> User | None:
+    """
+    User with this email, else with the username given as a keyword
+
+    Each is an exact match on its own index rather than one OR across both.
+    """
+    user = get_user_by_email(email)
     username = kwargs.get("username")
-    return User.objects.filter(Q(email=email) | Q(username=username)).first()
+    if user is None and username:
+        user = User.objects.filter(username=username).first()
+    return user
@@ -69,11 +69,9 @@ class UserRegisterSerializer(serializers.Serializer):
     @transaction.atomic
     def save(self, **kwargs):
         # Create the user
+        # The profile is created with the user
         self.user = User.objects.create_user(**self.validated_data)
 
-        # Create the profile
-        Profile.objects.create(user=self.user)
-
         return self.user
 
     def get_token(self, obj) -> GenericToken:
@@ -98,7 +96,7 @@ class ProfileSerializer(serializers.ModelSerializer):
     profile_picture = serializers.SerializerMethodField()
 
     def get_profile_picture(self, obj):
-        return obj.metadata.get("profile_picture", None)
+        return obj.profile_picture
 
     class Meta:
         model = Profile
@@ -146,7 +144,7 @@ class GoogleCallbackSerializer(serializers.Serializer):
         flow = GoogleRawLoginFlowService()
         auth_tokens = flow.get_tokens(code=self.code)
 
-        id_token_decoded = auth_tokens.decode_id_token()
+        id_token_decoded = flow.decode_id_token(auth_token=auth_tokens)
         user_info = flow.get_user_info(auth_token=auth_tokens)
 
         user_email = id_token_decoded["email"]
@@ -161,14 +159,12 @@ class GoogleCallbackSerializer(serializers.Serializer):
                 last_name=last_name,
                 password=User.objects.make_random_password(),
             )
-            Profile.objects.create(user=user, metadata=user_info)
-            return user
-
-        if not hasattr(user, "profile"):
-            Profile.objects.create(user=user, metadata=user_info)
+            profile = user.profile
+        else:
+            profile, _ = Profile.objects.get_or_create(user=user)
 
-        if not user.profile.metadata:
-            user.profile.metadata = user_info
-            user.profile.save()
+        if not profile.metadata:
+            profile.metadata = user_info
+            profile.save(update_fields=["metadata", "modified"])
 
         return user
@@ -1,4 +1,7 @@
-from typing import Dict
+import os
+import threading
+import time
+from typing import Dict, Optional
 from urllib.parse import urlencode
 
 import jwt
@@ -7,6 +10,129 @@ from attrs import define
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.crypto import get_random_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    HTTP session shared by the current process
+
+    Connections to each host are pooled and kept alive, so repeated calls
+    skip the TCP/TLS handshake. Failed connects and 5xx responses to GETs
+    are retried with backoff; POSTs are only retried if nothing was sent.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.GOOGLE_HTTP_RETRIES,
+                    backoff_factor=0.3,
+                    status_forcelist=[500, 502, 503, 504],
+                    allowed_methods=["GET"],
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=settings.GOOGLE_HTTP_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def reset_http_session():
+    """Close the shared session, e.g. after the HTTP settings changed"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+class JWKSCache:
+    """
+    Signing keys of a JWKS endpoint, cached for GOOGLE_JWKS_TTL seconds
+
+    A token signed with a key missing from the cache triggers a refetch, at
+    most once per GOOGLE_JWKS_MIN_REFRESH seconds, so key rotation is picked
+    up without letting bad tokens hammer the endpoint.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        response = get_http_session().get(
+            self.url, timeout=settings.GOOGLE_HTTP_TIMEOUT
+        )
+        if not response.ok:
+            raise Exception(f"Failed to obtain signing keys: {response.text}")
+
+        key_set = jwt.PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in key_set.keys}
+        self._fetched_at = time.monotonic()
+
+    def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        with self._lock:
+            age = (
+                None
+                if self._fetched_at is None
+                else time.monotonic() - self._fetched_at
+            )
+            if age is None or age > settings.GOOGLE_JWKS_TTL:
+                self._fetch()
+            elif kid not in self._keys and age > settings.GOOGLE_JWKS_MIN_REFRESH:
+                self._fetch()
+
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+
+
+_jwks_caches: Dict[str, JWKSCache] = {}
+
+
+def get_jwks_cache(url: str) -> JWKSCache:
+    """Key cache shared by the current process for a JWKS endpoint"""
+    with _session_lock:
+        if url not in _jwks_caches:
+            _jwks_caches[url] = JWKSCache(url)
+        return _jwks_caches[url]
+
+
+def _forget_http_state():
+    # Pooled sockets can't be shared with a forked child
+    global _session, _session_lock
+
+    _session = None
+    _session_lock = threading.Lock()
+    for jwks in _jwks_caches.values():
+        jwks._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_http_state)
 
 
 @define
@@ -21,9 +147,22 @@ class GoogleAuthToken:
     id_token: str
     access_token: str
 
-    def decode_id_token(self) -> Dict[str, str]:
+    def decode_id_token(self, *, audience: str, jwks_url: str) -> Dict[str, str]:
+        """
+        Claims of the id token, after checking its signature against the
+        cached keys of jwks_url and its issuer, audience and expiry
+        """
         id_token = self.id_token
-        decoded_token = jwt.decode(jwt=id_token, options={"verify_signature": False})
+        kid = jwt.get_unverified_header(id_token).get("kid")
+        signing_key = get_jwks_cache(jwks_url).get_signing_key(kid)
+        decoded_token = jwt.decode(
+            jwt=id_token,
+            key=signing_key.key,
+            algorithms=["RS256"],
+            audience=audience,
+            issuer=GOOGLE_ISSUERS,
+            leeway=settings.GOOGLE_ID_TOKEN_LEEWAY,
+        )
         return decoded_token
 
 
@@ -32,6 +171,7 @@ class GoogleRawLoginFlowService:
     GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/auth"
     GOOGLE_ACCESS_TOKEN_OBTAIN_URL = "https://oauth2.googleapis.com/token"
     GOOGLE_USER_INFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+    GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
 
     SCOPES = [
         "https://www.googleapis.com/auth/userinfo.email",
@@ -101,7 +241,11 @@ class GoogleRawLoginFlowService:
             "grant_type": "authorization_code",
         }
 
-        response = requests.post(self.GOOGLE_ACCESS_TOKEN_OBTAIN_URL, data=data)
+        response = get_http_session().post(
+            self.GOOGLE_ACCESS_TOKEN_OBTAIN_URL,
+            data=data,
+            timeout=settings.GOOGLE_HTTP_TIMEOUT,
+        )
 
         if not response.ok:
             raise Exception(
@@ -120,11 +264,18 @@ class GoogleRawLoginFlowService:
     def get_user_info(self, *, auth_token: GoogleAuthToken):
         access_token = auth_token.access_token
 
-        response = requests.get(
-            self.GOOGLE_USER_INFO_URL, params={"access_token": access_token}
+        response = get_http_session().get(
+            self.GOOGLE_USER_INFO_URL,
+            params={"access_token": access_token},
+            timeout=settings.GOOGLE_HTTP_TIMEOUT,
         )
 
         if not response.ok:
             raise Exception(f"Failed to obtain user info from Google: {response.text}")
 
         return response.json()
+
+    def decode_id_token(self, *, auth_token: GoogleAuthToken) -> Dict[str, str]:
+        return auth_token.decode_id_token(
+            audience=self._credentials.client_id, jwks_url=self.GOOGLE_JWKS_URL
+        )
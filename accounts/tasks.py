@@ -1,13 +1,12 @@
 import json
 import logging
 
-import pika
 from celery import shared_task
 from celery.exceptions import Reject
-from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from pika.exchange_type import ExchangeType
+from django.core.cache import cache
 
+from .mail import FLUSH_SCHEDULED_KEY, build_message, flush_mail_queue
+from .messaging import get_publisher
 from .types import EmailData, MessagePayload
 
 logger = logging.getLogger(__name__)
@@ -17,22 +16,30 @@ logger = logging.getLogger(__name__)
 def send_mail(email_data: EmailData, **kwargs):
     """Mails get handled by celery"""
     try:
-        msg = EmailMultiAlternatives(
-            subject=email_data["subject"],
-            from_email=email_data.get("from_email", settings.DEFAULT_FROM_EMAIL),
-            to=email_data["recipient_list"],
-            body=email_data["message"],
-            cc=email_data.get("cc"),
-            bcc=email_data.get("bcc"),
-        )
-        msg.attach_alternative(email_data["message"], "text/html")
-        msg.send()
+        build_message(email_data).send()
         logger.info(f"Email Sent to {email_data.get('recipient_list')}")
     except Exception as e:
         logger.error(str(e))
         raise Reject(e, requeue=False)
 
 
+@shared_task(name="Send Queued Emails", bind=True, priority=2, max_retries=3)
+def send_queued_mail(self):
+    """Send the queued emails in batches over one SMTP connection each"""
+    # Emails queued from now on schedule the next flush
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    try:
+        result = flush_mail_queue()
+    except Exception as e:
+        logger.error(f"Email batch failed: {str(e)}")
+        raise self.retry(exc=e, countdown=2**self.request.retries * 10)
+
+    if result["queued"] and cache.add(FLUSH_SCHEDULED_KEY, True, timeout=60):
+        # More than a batch was waiting
+        send_queued_mail.delay()
+    return result
+
+
 @shared_task(name="Publish Message to Queue", max_retries=3)
 def publish_message(topic: str, exchange: str, routing_key: str, data: dict):
     payload = MessagePayload(
@@ -42,33 +49,29 @@ def publish_message(topic: str, exchange: str, routing_key: str, data: dict):
         message=json.dumps(data),
     )
 
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters(
-            host=settings.RABBITMQ_HOST,
-            port=settings.RABBITMQ_PORT,
-            virtual_host=settings.RABBITMQ_VHOST,
-            credentials=pika.PlainCredentials(
-                username=settings.RABBITMQ_USER, password=settings.RABBITMQ_PASSWORD
-            ),
-        )
-    )
     try:
-        channel = connection.channel()
-        channel.exchange_declare(
-            exchange=payload.exchange, exchange_type=ExchangeType.topic
-        )
-        channel.basic_publish(
-            exchange=payload.exchange,
-            routing_key=payload.routing_key,
-            body=payload.message.encode("utf-8"),
-            properties=pika.BasicProperties(
-                delivery_mode=2,
-            ),
+        get_publisher().publish(
+            payload.exchange, payload.routing_key, payload.message, "topic"
         )
         logger.info(
             f"Message published to exchange {payload.exchange} | topic {payload.topic}"
         )
     except Exception as e:
         logger.error(f"Publish Message Error : {e}")
-    finally:
-        connection.close()
+
+
+@shared_task(name="Publish Messages to Queue", max_retries=3)
+def publish_messages(exchange: str, messages: list[dict]):
+    """Publish a burst of messages to a topic exchange over one channel"""
+    try:
+        published = get_publisher().publish_batch(
+            exchange,
+            [
+                (message.get("routing_key", ""), json.dumps(message["data"]))
+                for message in messages
+            ],
+            "topic",
+        )
+        logger.info(f"{published} messages published to exchange {exchange}")
+    except Exception as e:
+        logger.error(f"Publish Messages Error : {e}")
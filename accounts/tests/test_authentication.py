@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import CachedJWTAuthentication
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_repeat_requests_skip_the_database(self):
+        token = AccessToken.for_user(self.user)
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(token)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                cached_user, _ = self.authenticate(token)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+    def test_new_token_is_checked_once(self):
+        self.authenticate(AccessToken.for_user(self.user))
+        token = AccessToken.for_user(self.user)
+
+        with self.assertNumQueries(1):
+            self.authenticate(token)
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+    def test_user_change_invalidates_the_cache(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deleted_user_is_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+
+        self.user.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
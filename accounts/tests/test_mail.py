@@ -0,0 +1,215 @@
+import smtplib
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.template import engines
+from django.template.loaders.base import Loader
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.mail import (
+    FLUSH_SCHEDULED_KEY,
+    flush_mail_queue,
+    queue_mail,
+)
+from accounts.models import QueuedEmail
+from accounts.tasks import send_queued_mail
+
+
+def email_data(i):
+    return {
+        "from_email": None,
+        "cc": None,
+        "bcc": None,
+        "subject": f"Subject {i}",
+        "message": f"<p>Message {i}</p>",
+        "recipient_list": [f"user{i}@example.com"],
+    }
+
+
+@override_settings(EMAIL_BATCH_WINDOW=5, EMAIL_BATCH_SIZE=100)
+class MailQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_queue_schedules_one_flush(self):
+        with patch("accounts.tasks.send_queued_mail.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    queue_mail(email_data(i))
+
+        self.assertEqual(QueuedEmail.objects.filter(status="pending").count(), 5)
+        apply_async.assert_called_once_with(countdown=5)
+        self.assertEqual(mail.outbox, [])
+
+    def test_flush_sends_batch_over_one_connection(self):
+        for i in range(5):
+            queue_mail(email_data(i))
+
+        with patch(
+            "accounts.mail.get_connection", side_effect=get_connection
+        ) as connect:
+            result = flush_mail_queue()
+
+        connect.assert_called_once()
+        self.assertEqual(result, {"sent": 5, "failed": 0, "queued": 0})
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [[f"user{i}@example.com"] for i in range(5)],
+        )
+        self.assertEqual(QueuedEmail.objects.filter(status="sent").count(), 5)
+
+    def test_failed_email_does_not_stop_the_batch(self):
+        queue_mail(email_data(0))
+        broken = queue_mail({"subject": "No recipients", "message": "Hi"})
+        queue_mail(email_data(2))
+
+        result = flush_mail_queue()
+
+        self.assertEqual(result, {"sent": 2, "failed": 1, "queued": 0})
+        self.assertEqual(len(mail.outbox), 2)
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, "failed")
+        self.assertIn("recipient_list", broken.error)
+
+    def test_connection_failure_requeues_batch(self):
+        queue_mail(email_data(0))
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=OSError("Connection refused"),
+        ):
+            with self.assertRaises(OSError):
+                flush_mail_queue()
+
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, "pending")
+        self.assertIsNone(email.batch)
+
+    def test_lost_connection_requeues_the_rest_of_the_batch(self):
+        emails = [queue_mail(email_data(i)) for i in range(3)]
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=[1, smtplib.SMTPServerDisconnected("Connection lost")],
+        ):
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                flush_mail_queue()
+
+        for email in emails:
+            email.refresh_from_db()
+        self.assertEqual(
+            [email.status for email in emails], ["sent", "pending", "pending"]
+        )
+        self.assertIsNone(emails[1].batch)
+
+        self.assertEqual(flush_mail_queue(), {"sent": 2, "failed": 0, "queued": 0})
+
+    def test_rejected_recipient_is_failed(self):
+        rejected = queue_mail(email_data(0))
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPRecipientsRefused({}),
+        ):
+            result = flush_mail_queue()
+
+        self.assertEqual(result, {"sent": 0, "failed": 1, "queued": 0})
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, "failed")
+
+    def test_batch_size(self):
+        for i in range(3):
+            queue_mail(email_data(i))
+
+        self.assertEqual(
+            flush_mail_queue(batch_size=2), {"sent": 2, "failed": 0, "queued": 1}
+        )
+
+    @override_settings(EMAIL_SENDING_TIMEOUT=300)
+    def test_stalled_batch_is_requeued(self):
+        stalled = queue_mail(email_data(0))
+        in_flight = queue_mail(email_data(1))
+        QueuedEmail.objects.filter(pk=stalled.pk).update(
+            status="sending",
+            batch=uuid.uuid4(),
+            modified=timezone.now() - timedelta(minutes=10),
+        )
+        QueuedEmail.objects.filter(pk=in_flight.pk).update(
+            status="sending", batch=uuid.uuid4(), modified=timezone.now()
+        )
+
+        result = flush_mail_queue()
+
+        self.assertEqual(result, {"sent": 1, "failed": 0, "queued": 0})
+        self.assertEqual(mail.outbox[0].to, ["user0@example.com"])
+        in_flight.refresh_from_db()
+        self.assertEqual(in_flight.status, "sending")
+
+    def test_beat_flushes_the_queue(self):
+        schedule = settings.CELERY_BEAT_SCHEDULE["flush-queued-emails"]
+        self.assertEqual(schedule["task"], send_queued_mail.name)
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_task_continues_with_the_rest(self):
+        for i in range(3):
+            queue_mail(email_data(i))
+        cache.set(FLUSH_SCHEDULED_KEY, True)
+
+        with patch("accounts.tasks.send_queued_mail.delay") as delay:
+            send_queued_mail()
+
+        delay.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+
+
+@override_settings(EMAIL_BATCH_WINDOW=5, EMAIL_BATCH_SIZE=100)
+class InviteEmailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        engines["django"].engine.template_loaders[0].reset()
+
+    def test_invite_is_queued_on_commit_without_rendering(self):
+        user = User.objects.create_user(username="new", email="new@example.com")
+
+        with patch("accounts.mail.get_template") as get_template:
+            with self.captureOnCommitCallbacks() as callbacks:
+                user.send_invite_email()
+                self.assertFalse(QueuedEmail.objects.exists())
+            with patch("accounts.tasks.send_queued_mail.apply_async"):
+                for callback in callbacks:
+                    callback()
+
+        get_template.assert_not_called()
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.data["template_name"], "accounts/emails/invitation.html")
+        self.assertEqual(email.data["recipient_list"], ["new@example.com"])
+
+    def test_template_is_compiled_once(self):
+        for i in range(3):
+            queue_mail(
+                {
+                    **email_data(i),
+                    "message": "",
+                    "template_name": "accounts/emails/invitation.html",
+                    "context": {},
+                }
+            )
+
+        # Called by the cached loader only when the template isn't cached
+        with patch.object(
+            Loader, "get_template", autospec=True, side_effect=Loader.get_template
+        ) as load_template:
+            result = flush_mail_queue()
+
+        self.assertEqual(result, {"sent": 3, "failed": 0, "queued": 0})
+        load_template.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("<html>", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], mail.outbox[0].body)
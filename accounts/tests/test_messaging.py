@@ -0,0 +1,104 @@
+import json
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from kombu import Connection, Exchange, Queue
+from kombu.transport import memory
+
+from accounts.messaging import Publisher, get_publisher, reset_publisher
+from accounts.tasks import publish_message, publish_messages
+from accounts.utils import publish_message as publish_notification
+
+
+@override_settings(MESSAGE_BROKER_URL="memory://", MESSAGE_BROKER_POOL_LIMIT=2)
+class PublisherTest(SimpleTestCase):
+    """Publishing against kombu's in-memory broker"""
+
+    def setUp(self):
+        reset_publisher()
+        self.addCleanup(reset_publisher)
+        self.consumer_connection = Connection("memory://")
+        self.addCleanup(self.consumer_connection.release)
+
+    def _bind(self, exchange, exchange_type, routing_key="#"):
+        queue = Queue(
+            f"test-{exchange}",
+            Exchange(exchange, type=exchange_type, durable=False),
+            routing_key=routing_key,
+        )
+        bound = queue(self.consumer_connection.default_channel)
+        bound.declare()
+        self.addCleanup(bound.delete)
+        return bound
+
+    def _drain(self, queue):
+        bodies = []
+        while (message := queue.get(no_ack=True)) is not None:
+            bodies.append(json.loads(message.body))
+        return bodies
+
+    def test_publish(self):
+        queue = self._bind("events", "topic", "user.*")
+        publisher = Publisher()
+        self.addCleanup(publisher.close)
+
+        publisher.publish("events", "user.created", json.dumps({"id": 1}))
+
+        self.assertEqual(self._drain(queue), [{"id": 1}])
+
+    def test_publish_batch(self):
+        queue = self._bind("events", "topic")
+        publisher = Publisher()
+        self.addCleanup(publisher.close)
+
+        published = publisher.publish_batch(
+            "events", [("user.created", json.dumps({"id": i})) for i in range(50)]
+        )
+
+        self.assertEqual(published, 50)
+        self.assertEqual(self._drain(queue), [{"id": i} for i in range(50)])
+
+    def test_connection_and_declaration_are_reused(self):
+        self._bind("events", "topic")
+        publisher = Publisher()
+        self.addCleanup(publisher.close)
+
+        with patch.object(
+            memory.Transport,
+            "establish_connection",
+            autospec=True,
+            side_effect=memory.Transport.establish_connection,
+        ) as connect, patch.object(
+            memory.Channel,
+            "exchange_declare",
+            autospec=True,
+            side_effect=memory.Channel.exchange_declare,
+        ) as declare:
+            for i in range(10):
+                publisher.publish("events", "user.created", json.dumps({"id": i}))
+
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(declare.call_count, 1)
+
+    def test_shared_publisher(self):
+        self.assertIs(get_publisher(), get_publisher())
+
+    def test_publish_message_task(self):
+        queue = self._bind("events", "topic")
+
+        publish_message("signup", "events", "user.created", {"id": 7})
+        publish_messages(
+            "events",
+            [{"routing_key": "user.updated", "data": {"id": i}} for i in range(3)],
+        )
+
+        self.assertEqual(
+            self._drain(queue), [{"id": 7}, {"id": 0}, {"id": 1}, {"id": 2}]
+        )
+
+    def test_publish_notification(self):
+        queue = self._bind("notifications", "fanout", "")
+
+        publish_notification(json.dumps({"text": "hello"}), "greeting")
+
+        self.assertEqual(self._drain(queue), [{"text": "hello"}])
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from accounts.models import Profile
+
+
+class ProfileTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+
+    def test_profile_is_created_with_user(self):
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+
+        self.user.save()
+
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+
+    def test_profile_picture_without_extra_queries(self):
+        Profile.objects.filter(user=self.user).update(
+            metadata={"profile_picture": "test.jpg"}
+        )
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile_picture, "test.jpg")
+            self.assertEqual(user.profile_picture, "test.jpg")
+
+    def test_profile_picture_without_profile(self):
+        self.user.profile.delete()
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(user.profile_picture)
+        self.assertFalse(Profile.objects.filter(user=self.user).exists())
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+from django.test import TestCase
+
+from accounts.selectors import get_user
+
+
+class GetUserTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="Test.User@Example.com", password="testpass123"
+        )
+        User.objects.create_user(username="nomail", password="testpass123")
+
+    def test_email_lookup_ignores_case(self):
+        self.assertEqual(get_user("test.user@example.com"), self.user)
+        self.assertEqual(get_user("TEST.USER@EXAMPLE.COM"), self.user)
+
+    def test_username_lookup_after_email(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                get_user("other@example.com", username="testuser"), self.user
+            )
+        with self.assertNumQueries(1):
+            get_user("test.user@example.com", username="someone")
+
+    def test_no_match(self):
+        self.assertIsNone(get_user("other@example.com", username="someone"))
+
+    def test_blank_email_matches_nobody(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_user(""))
+
+    def test_email_lookup_uses_index(self):
+        plan = (
+            User.objects.alias(email_lower=Lower("email"))
+            .filter(email_lower="test.user@example.com")
+            .order_by("pk")[:1]
+            .explain()
+        )
+        self.assertIn("user_email_lower_idx", plan)
@@ -4,7 +4,6 @@ from django.contrib.auth.models import User
 from django.test import RequestFactory, TestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from accounts.models import Profile
 from accounts.serializers import (
     ProfileSerializer,
     TokenSerializer,
@@ -97,9 +96,9 @@ class ProfileSerializerTest(TestCase):
         self.user = User.objects.create_user(
             username="testuser", email="test@example.com", password="testpass123"
         )
-        self.profile = Profile.objects.create(
-            user=self.user, metadata={"profile_picture": "test.jpg"}
-        )
+        self.profile = self.user.profile
+        self.profile.metadata = {"profile_picture": "test.jpg"}
+        self.profile.save()
 
     def test_profile_serializer(self):
         serializer = ProfileSerializer(instance=self.profile)
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase, override_settings
+from jwt.algorithms import RSAAlgorithm
+
+from accounts.services import (
+    GoogleAuthToken,
+    GoogleRawLoginFlowService,
+    get_jwks_cache,
+    reset_http_session,
+)
+
+CLIENT_ID = "client-id.apps.googleusercontent.com"
+
+
+class FakeGoogle(BaseHTTPRequestHandler):
+    """Token, userinfo and JWKS endpoints of a stand-in OAuth server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if form["code"] != ["good-code"]:
+            return self._send(400, {"error": "invalid_grant"})
+        self._send(
+            200, {"id_token": self.server.id_token, "access_token": "access-token"}
+        )
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/certs":
+            self.server.jwks_requests += 1
+            return self._send(200, {"keys": self.server.jwks})
+        if url.path == "/userinfo":
+            if parse_qs(url.query)["access_token"] != ["access-token"]:
+                return self._send(401, {"error": "invalid_token"})
+            return self._send(200, {"given_name": "Ada", "family_name": "Lovelace"})
+        self._send(404, {})
+
+
+def signing_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private_key, jwk
+
+
+def id_token(private_key, kid, **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "email": "ada@example.com",
+        "iat": now,
+        "exp": now + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+@override_settings(
+    GOOGLE_OAUTH2_CLIENT_ID=CLIENT_ID,
+    GOOGLE_OAUTH2_CLIENT_SECRET="secret",
+    GOOGLE_PROJECT_ID="project",
+    PLACES_URL="localhost:8000",
+    GOOGLE_HTTP_RETRIES=0,
+    GOOGLE_JWKS_TTL=3600,
+    GOOGLE_JWKS_MIN_REFRESH=0,
+)
+class GoogleRawLoginFlowServiceTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key, jwk = signing_key("key-1")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGoogle)
+        cls.server.jwks = [jwk]
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        for name, path in [
+            ("GOOGLE_ACCESS_TOKEN_OBTAIN_URL", "/token"),
+            ("GOOGLE_USER_INFO_URL", "/userinfo"),
+            ("GOOGLE_JWKS_URL", "/certs"),
+        ]:
+            patcher = patch.object(GoogleRawLoginFlowService, name, base + path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        reset_http_session()
+        self.addCleanup(reset_http_session)
+        get_jwks_cache(base + "/certs").clear()
+        self.server.id_token = id_token(self.private_key, "key-1")
+        self.server.connections = 0
+        self.server.jwks_requests = 0
+
+    def test_login_verifies_id_token(self):
+        flow = GoogleRawLoginFlowService()
+
+        tokens = flow.get_tokens(code="good-code")
+        claims = flow.decode_id_token(auth_token=tokens)
+        user_info = flow.get_user_info(auth_token=tokens)
+
+        self.assertEqual(claims["email"], "ada@example.com")
+        self.assertEqual(user_info["given_name"], "Ada")
+
+    def test_connections_and_keys_are_reused(self):
+        for _ in range(5):
+            flow = GoogleRawLoginFlowService()
+            tokens = flow.get_tokens(code="good-code")
+            flow.decode_id_token(auth_token=tokens)
+            flow.get_user_info(auth_token=tokens)
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.jwks_requests, 1)
+
+    def test_failed_token_exchange(self):
+        with self.assertRaisesMessage(Exception, "invalid_grant"):
+            GoogleRawLoginFlowService().get_tokens(code="bad-code")
+
+    def test_rejects_tampered_and_foreign_tokens(self):
+        flow = GoogleRawLoginFlowService()
+        other_key, _ = signing_key("key-1")
+
+        for token in [
+            id_token(other_key, "key-1"),
+            id_token(self.private_key, "key-1", aud="someone-else"),
+            id_token(self.private_key, "key-1", iss="https://evil.example.com"),
+            id_token(self.private_key, "key-1", exp=int(time.time()) - 60),
+        ]:
+            with self.assertRaises(jwt.InvalidTokenError):
+                flow.decode_id_token(
+                    auth_token=GoogleAuthToken(id_token=token, access_token="")
+                )
+
+    def test_rotated_key_is_fetched(self):
+        flow = GoogleRawLoginFlowService()
+        flow.decode_id_token(
+            auth_token=GoogleAuthToken(id_token=self.server.id_token, access_token="")
+        )
+
+        new_key, jwk = signing_key("key-2")
+        self.server.jwks = self.server.jwks + [jwk]
+        self.addCleanup(setattr, self.server, "jwks", self.server.jwks[:1])
+
+        claims = flow.decode_id_token(
+            auth_token=GoogleAuthToken(
+                id_token=id_token(new_key, "key-2"), access_token=""
+            )
+        )
+
+        self.assertEqual(claims["email"], "ada@example.com")
+        self.assertEqual(self.server.jwks_requests, 2)
+
+    @override_settings(GOOGLE_JWKS_MIN_REFRESH=60)
+    def test_unknown_keys_are_not_refetched_immediately(self):
+        flow = GoogleRawLoginFlowService()
+        unknown_key, _ = signing_key("key-3")
+
+        for _ in range(3):
+            with self.assertRaises(jwt.InvalidTokenError):
+                flow.decode_id_token(
+                    auth_token=GoogleAuthToken(
+                        id_token=id_token(unknown_key, "key-3"), access_token=""
+                    )
+                )
+
+        self.assertEqual(self.server.jwks_requests, 1)
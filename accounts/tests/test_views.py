@@ -25,6 +25,7 @@ class UserViewSetTest(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Profile.objects.filter(user__username="newuser").count(), 1)
 
     def test_login_user(self):
         url = reverse("user-login")
@@ -52,9 +53,9 @@ class ProfileViewSetTest(APITestCase):
         self.user = User.objects.create_user(
             username="testuser", email="test@example.com", password="testpassword123"
         )
-        self.profile = Profile.objects.create(
-            user=self.user, metadata={"profile_picture": "test.jpg"}
-        )
+        self.profile = self.user.profile
+        self.profile.metadata = {"profile_picture": "test.jpg"}
+        self.profile.save()
         self.token = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token.access_token}")
 
@@ -71,6 +72,14 @@ class ProfileViewSetTest(APITestCase):
         self.profile.refresh_from_db()
         self.assertEqual(self.profile.metadata["profile_picture"], "updated.jpg")
 
+    def test_list_profiles_query_count(self):
+        url = reverse("profile-list")
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data[0]["user"]["username"], "testuser")
+        self.assertEqual(response.data[0]["profile_picture"], "test.jpg")
+
     def test_get_profile_not_found(self):
         self.profile.delete()
         url = reverse("profile-me")
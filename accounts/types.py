@@ -1,6 +1,6 @@
 from argparse import Namespace
 
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 
 class EmailData(TypedDict):
@@ -10,6 +10,9 @@ class EmailData(TypedDict):
     message: str
     cc: str | None
     bcc: str | None
+    # Rendered into the message when the email is sent
+    template_name: NotRequired[str]
+    context: NotRequired[dict]
 
 
 class GenericToken(TypedDict):
@@ -4,8 +4,9 @@ from rest_framework.routers import DefaultRouter
 from .views import ProfileViewSet, UserViewSet
 
 router = DefaultRouter()
-router.register(r"", UserViewSet, basename="user")
+# Before the user routes, whose detail pattern would also match "profiles/"
 router.register(r"profiles", ProfileViewSet, basename="profile")
+router.register(r"", UserViewSet, basename="user")
 
 urlpatterns = [
     path("", include(router.urls)),
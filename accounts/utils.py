@@ -2,58 +2,55 @@
 
 import logging
 
-import pika
-from django.conf import settings
-from django.template.loader import render_to_string
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 
-from .tasks import send_mail
+from .mail import queue_mail
+from .messaging import get_publisher
 from .types import EmailData
 
 logger = logging.getLogger(__name__)
 
 
 def send_invite_email(self, **kwargs):
+    """
+    Queue the invitation once the surrounding transaction commits
+
+    The body is rendered by the worker that sends the email, so registering
+    neither renders the template nor writes the queue inside its transaction.
+    """
     subject = "Thank you for registering with us"
     data = EmailData(
         from_email=None,
         cc=None,
         bcc=None,
         subject=subject,
-        message=render_to_string(
-            template_name="accounts/emails/invitation.html",
-        ),
+        message="",
+        template_name="accounts/emails/invitation.html",
+        context={},
         recipient_list=[self.email],
     )
-    send_mail.delay(data)
+    transaction.on_commit(lambda: queue_mail(data))
 
 
 @property
 def profile_picture(self):
-    profile = getattr(self, "profile", None)
-    if not profile:
-        profile = self.profile.create()
+    """
+    Picture from the user's profile
+
+    Costs no query when the profile was loaded with select_related("profile");
+    Profile caches the picture itself.
+    """
+    try:
+        profile = self.profile
+    except ObjectDoesNotExist:
+        return None
     return profile.profile_picture
 
 
 def publish_message(message: str, topic: str, exchange="notifications"):
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters(
-            host=settings.RABBITMQ_HOST,
-            port=settings.RABBITMQ_PORT,
-            virtual_host=settings.RABBITMQ_VHOST,
-            credentials=pika.PlainCredentials(
-                username=settings.RABBITMQ_USER, password=settings.RABBITMQ_PASSWORD
-            ),
-        )
-    )
     try:
-        channel = connection.channel()
-        channel.exchange_declare(exchange=exchange, exchange_type="fanout")
-        channel.basic_publish(
-            exchange=exchange, routing_key="", body=message.encode("utf-8")
-        )
+        get_publisher().publish(exchange, "", message, "fanout")
         logger.info(f"Message published to {exchange} with topic {topic}")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
-    finally:
-        connection.close()
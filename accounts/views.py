@@ -28,7 +28,7 @@ class UserViewSet(
     ViewSet for handling user-related operations.
     """
 
-    queryset = User.objects.all()
+    queryset = User.objects.select_related("profile")
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -147,7 +147,7 @@ class ProfileViewSet(
     ViewSet for handling profile-related operations.
     """
 
-    queryset = Profile.objects.all()
+    queryset = Profile.objects.select_related("user")
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
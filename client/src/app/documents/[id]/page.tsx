@@ -30,7 +30,7 @@ export default function ComparisonView() {
   const fetchDocument = async () => {
     try {
       const DEV_API_URL = process.env.NEXT_PUBLIC_DEV_BASE_API_URL;
-      const response = await fetch(`${DEV_API_URL}/api/documents/${id}`, {
+      const response = await fetch(`${DEV_API_URL}/api/documents/${id}?expand=content,suggestions`, {
         headers: {
           "Authorization": `Bearer ${localStorage.getItem('authToken')}`
         }
@@ -83,8 +83,10 @@ export default function ComparisonView() {
       const response = await fetch(`${DEV_API_URL}/api/documents/${id}/export/`, {
         method: "POST",
         headers: {
-          "Authorization": `Bearer ${localStorage.getItem('authToken')}`
-        }
+          "Authorization": `Bearer ${localStorage.getItem('authToken')}`,
+          "Content-Type": "application/json"
+        },
+        body: JSON.stringify({ delivery: "stream" })
       });
 
       if (!response.ok) {
@@ -96,7 +98,7 @@ export default function ComparisonView() {
       const a = document.createElement("a");
       a.style.display = "none";
       a.href = url;
-      a.download = doc?.title ? `${doc.title}_improved.json` : "improved_document.json";
+      a.download = doc?.title ? `${doc.title}_improved.docx` : "improved_document.docx";
       document.body.appendChild(a);
       a.click();
       window.URL.revokeObjectURL(url);
@@ -16,7 +16,7 @@ interface DashboardClientProps {
 }
 
 const DashboardClient = ({ authToken }: DashboardClientProps) => {
-  const [documents, setDocuments] = useState([]);
+  const [documents, setDocuments] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [showUpload, setShowUpload] = useState(false);
@@ -31,31 +31,45 @@ const DashboardClient = ({ authToken }: DashboardClientProps) => {
     recentActivity: [],
   });
 
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const authHeaders = {
+    Authorization: `Bearer ${authToken}`,
+    Accept: "application/json",
+  };
+
+  // The list is cursor-paginated: one page is loaded at a time, and the
+  // stats come from a separate counts endpoint instead of the whole list
+  const fetchPage = async (url: string) => {
+    const response = await fetch(url, { headers: authHeaders });
+    if (!response.ok) {
+      throw new Error("Failed to fetch documents");
+    }
+    const page = await response.json();
+    setNextPage(page.next);
+    return page.results;
+  };
+
   const fetchDocuments = async () => {
     try {
-      const response = await fetch("https://ada.share-hub.co/api/documents/", {
-        headers: {
-          Authorization: `Bearer ${authToken}`,
-          Accept: "application/json",
-        },
-      });
-  
-      if (!response.ok) {
-        throw new Error("Failed to fetch documents");
-      }
-  
-      const data = await response.json();
+      const [data, counts] = await Promise.all([
+        fetchPage("https://ada.share-hub.co/api/documents/"),
+        fetch("https://ada.share-hub.co/api/documents/stats/", {
+          headers: authHeaders,
+        }).then((response) => {
+          if (!response.ok) {
+            throw new Error("Failed to fetch document stats");
+          }
+          return response.json();
+        }),
+      ]);
   
       setDocuments(data);
   
-      // Dynamically build stats from the documents array
-      const improvementsApplied = data.filter((doc: any) =>
-        doc.versions?.some((v: any) => v.version_type === "improved")
-      ).length;
-  
       setStats({
-        totalDocuments: data.length,
-        improvementsApplied,
+        totalDocuments: counts.total_documents,
+        improvementsApplied: counts.improved_documents,
         recentActivity: data.slice(0, 5).map((doc: any) => ({
           type: "upload",
           description: `Uploaded ${doc.title}`,
@@ -69,6 +83,20 @@ const DashboardClient = ({ authToken }: DashboardClientProps) => {
       setLoading(false);
     }
   };
+
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchPage(nextPage);
+      setDocuments((documents) => [...documents, ...data]);
+    } catch (err) {
+      console.error("Error fetching documents:", err);
+      setError("Failed to load documents. Please try again.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
   
 
   useEffect(() => {
@@ -192,7 +220,20 @@ const DashboardClient = ({ authToken }: DashboardClientProps) => {
           ) : error ? (
             <div className="p-6 text-center text-red-500">{error}</div>
           ) : (
-            <DocumentList documents={documents} />
+            <>
+              <DocumentList documents={documents} />
+              {nextPage && (
+                <div className="p-4 text-center border-t border-gray-200">
+                  <button
+                    className="text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                  >
+                    {loadingMore ? "Loading..." : "Load more"}
+                  </button>
+                </div>
+              )}
+            </>
           )}
         </div>
       </div>
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Document, DocumentVersion
+from .models import Document, DocumentJob, DocumentVersion
 
 admin.site.register(Document)
 admin.site.register(DocumentVersion)
+admin.site.register(DocumentJob)
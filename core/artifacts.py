@@ -0,0 +1,199 @@
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import BatchExport, DocumentExport, ExportArtifact
+
+logger = logging.getLogger(__name__)
+
+EXPORTS_DIR = "exports"
+
+# Cache keys of the eviction counters
+EVICTED_BYTES_KEY = "export-artifacts:evicted-bytes"
+EVICTED_COUNT_KEY = "export-artifacts:evicted-count"
+
+# Access times closer together than this aren't written again
+TOUCH_INTERVAL = timedelta(minutes=1)
+
+# Unregistered files younger than this may still be being written
+ORPHAN_GRACE_PERIOD = 60 * 60
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "DOCUMENT_EXPORT_TTL", 60 * 60))
+
+
+def _quota() -> int:
+    return getattr(settings, "EXPORT_STORAGE_QUOTA", 2 * 1024**3)
+
+
+def _absolute_path(path: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, path)
+
+
+def register_artifact(path: str) -> ExportArtifact:
+    """
+    Record a file written under MEDIA_ROOT and enforce the disk quota
+
+    Args:
+        path (str): Path of the file relative to MEDIA_ROOT
+
+    Returns:
+        The ExportArtifact
+    """
+    now = timezone.now()
+    artifact, _ = ExportArtifact.objects.update_or_create(
+        path=path,
+        defaults={
+            "size": os.path.getsize(_absolute_path(path)),
+            "expires_at": now + _ttl(),
+            "last_accessed_at": now,
+        },
+    )
+    enforce_quota(keep=artifact.pk)
+    return artifact
+
+
+def touch_artifact(path: str):
+    """Mark an artifact as used, so LRU eviction takes it last"""
+    now = timezone.now()
+    ExportArtifact.objects.filter(
+        path=path, last_accessed_at__lt=now - TOUCH_INTERVAL
+    ).update(last_accessed_at=now)
+
+
+def _count_eviction(size: int):
+    for key, amount in ((EVICTED_BYTES_KEY, size), (EVICTED_COUNT_KEY, 1)):
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Evicted from the cache between add and incr
+            cache.set(key, amount, timeout=None)
+
+
+def delete_artifact(artifact: ExportArtifact, reason: str) -> bool:
+    """
+    Delete an artifact's file and row and unlink the exports pointing to it
+
+    Exports left without a file are rendered again on their next request.
+
+    Returns:
+        True if this call deleted the artifact
+    """
+    deleted, _ = ExportArtifact.objects.filter(pk=artifact.pk).delete()
+    if not deleted:
+        # Already removed by another worker
+        return False
+
+    DocumentExport.objects.filter(file=artifact.path).update(file="")
+    BatchExport.objects.filter(file=artifact.path).update(file="")
+    try:
+        os.remove(_absolute_path(artifact.path))
+    except FileNotFoundError:
+        pass
+
+    _count_eviction(artifact.size)
+    logger.info(f"Deleted {reason} export {artifact.path} ({artifact.size} bytes)")
+    return True
+
+
+def evict_expired() -> int:
+    """Delete every expired artifact, returning how many were deleted"""
+    expired = ExportArtifact.objects.filter(expires_at__lte=timezone.now())
+    return sum(delete_artifact(artifact, "expired") for artifact in expired)
+
+
+def enforce_quota(quota: Optional[int] = None, keep=None) -> int:
+    """
+    Delete least recently used artifacts until the total size fits the quota
+
+    Args:
+        quota (int): Byte budget, defaults to EXPORT_STORAGE_QUOTA
+        keep: Primary key of an artifact never to evict (e.g. one just written)
+
+    Returns:
+        Number of artifacts deleted
+    """
+    quota = _quota() if quota is None else quota
+    stored = ExportArtifact.objects.aggregate(total=Sum("size"))["total"] or 0
+    if stored <= quota:
+        return 0
+
+    evicted = 0
+    candidates = ExportArtifact.objects.exclude(pk=keep).order_by("last_accessed_at")
+    for artifact in candidates.iterator():
+        if stored <= quota:
+            break
+        if delete_artifact(artifact, "least recently used"):
+            stored -= artifact.size
+            evicted += 1
+
+    if stored > quota:
+        logger.warning(f"Export storage is {stored} bytes, over the {quota} quota")
+    return evicted
+
+
+def remove_orphans() -> int:
+    """
+    Delete files under MEDIA_ROOT/exports that no artifact records, such as
+    exports written before artifacts were tracked or abandoned partial files
+
+    Returns:
+        Number of files deleted
+    """
+    root = _absolute_path(EXPORTS_DIR)
+    cutoff = time.time() - ORPHAN_GRACE_PERIOD
+    known = set(ExportArtifact.objects.values_list("path", flat=True))
+
+    removed = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            absolute_path = os.path.join(directory, filename)
+            path = os.path.relpath(absolute_path, settings.MEDIA_ROOT)
+            try:
+                if path in known or os.path.getmtime(absolute_path) > cutoff:
+                    continue
+                size = os.path.getsize(absolute_path)
+                os.remove(absolute_path)
+            except FileNotFoundError:
+                continue
+            _count_eviction(size)
+            removed += 1
+    return removed
+
+
+def artifact_metrics() -> Dict[str, Any]:
+    """Bytes and files currently stored, and evicted since the counters reset"""
+    stored = ExportArtifact.objects.aggregate(count=Count("id"), total=Sum("size"))
+    return {
+        "artifacts": stored["count"],
+        "bytes_stored": stored["total"] or 0,
+        "quota_bytes": _quota(),
+        "bytes_evicted": cache.get(EVICTED_BYTES_KEY, 0),
+        "artifacts_evicted": cache.get(EVICTED_COUNT_KEY, 0),
+    }
+
+
+def cleanup_artifacts() -> Dict[str, Any]:
+    """
+    Run the janitor: drop expired artifacts, orphaned files, then enforce
+    the quota
+
+    Returns:
+        Counts of deleted files and the storage metrics afterwards
+    """
+    result = {
+        "expired": evict_expired(),
+        "orphaned": remove_orphans(),
+        "over_quota": enforce_quota(),
+    }
+    result.update(artifact_metrics())
+    return result
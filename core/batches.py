@@ -0,0 +1,186 @@
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .artifacts import register_artifact
+from .models import BatchExport, DocumentExport
+
+logger = logging.getLogger(__name__)
+
+# Documents accepted in one batch export request
+MAX_BATCH_DOCUMENTS = 500
+
+DONE_STATUSES = ("completed", "failed")
+
+
+def with_progress(queryset):
+    """Annotate batch exports with their total, rendered and failed counts"""
+    return queryset.annotate(
+        total=Count("exports"),
+        rendered=Count("exports", filter=Q(exports__status="completed")),
+        failed=Count("exports", filter=Q(exports__status="failed")),
+    )
+
+
+def create_batch_export(
+    user, versions: Iterable, template_name, output_format, include_comments
+):
+    """
+    Create a batch export over versions, reusing their cached exports
+
+    Exports missing for a version are created as pending; failed, expired
+    or missing artifacts are reset to pending so they're rendered again.
+
+    Returns:
+        The new BatchExport
+    """
+    keys = {
+        DocumentExport.build_cache_key(
+            version, template_name, output_format, include_comments
+        ): version
+        for version in versions
+    }
+
+    with transaction.atomic():
+        DocumentExport.objects.bulk_create(
+            [
+                DocumentExport(
+                    version=version,
+                    cache_key=key,
+                    template_name=template_name,
+                    output_format=output_format,
+                    include_comments=include_comments,
+                )
+                for key, version in keys.items()
+            ],
+            ignore_conflicts=True,
+        )
+        exports = list(DocumentExport.objects.filter(cache_key__in=keys))
+
+        stale = [export.pk for export in exports if export.needs_render()]
+        if stale:
+            DocumentExport.objects.filter(pk__in=stale).update(
+                status="pending",
+                error="",
+                queued_at=timezone.now(),
+                completed_at=None,
+            )
+
+        batch = BatchExport.objects.create(
+            user=user,
+            version_type=next(iter(keys.values())).version_type,
+            template_name=template_name,
+            output_format=output_format,
+            include_comments=include_comments,
+        )
+        batch.exports.set(exports)
+    return batch
+
+
+def check_batch_export(batch_id) -> bool:
+    """
+    Queue the archive assembly once every export of a batch is done
+
+    Safe to call from any number of workers: only the caller that moves the
+    batch from rendering to assembling queues the assembly.
+
+    Returns:
+        True if this call queued the assembly
+    """
+    from .tasks import assemble_batch_export_task
+
+    batch = BatchExport.objects.filter(pk=batch_id, status="rendering").first()
+    if batch is None or batch.exports.exclude(status__in=DONE_STATUSES).exists():
+        return False
+
+    claimed = BatchExport.objects.filter(pk=batch_id, status="rendering").update(
+        status="assembling"
+    )
+    if claimed:
+        assemble_batch_export_task.delay(str(batch_id))
+    return bool(claimed)
+
+
+def notify_batches(export_id):
+    """Check every batch waiting on an export that just finished"""
+    batch_ids = BatchExport.objects.filter(
+        exports=export_id, status="rendering"
+    ).values_list("id", flat=True)
+    for batch_id in batch_ids:
+        check_batch_export(batch_id)
+
+
+def _member_name(export) -> str:
+    document = export.version.document
+    title = slugify(document.title) or "document"
+    return f"{title}-{str(document.id)[:8]}.{export.output_format}"
+
+
+def assemble_batch_export(batch) -> str:
+    """
+    Copy the rendered exports of a batch into one zip archive
+
+    Members are copied from disk in chunks and stored uncompressed, since
+    docx and pdf files are already compressed. Exports that failed are left
+    out.
+
+    Returns:
+        Path of the archive relative to MEDIA_ROOT
+    """
+    exports = batch.exports.filter(status="completed").select_related(
+        "version__document"
+    )
+
+    batch_dir = os.path.join(settings.MEDIA_ROOT, "exports", "batches")
+    os.makedirs(batch_dir, exist_ok=True)
+    final_path = os.path.join(batch_dir, f"{uuid.uuid4().hex}.zip")
+    partial_path = f"{final_path}.part"
+
+    added = 0
+    try:
+        with zipfile.ZipFile(partial_path, "w", zipfile.ZIP_STORED) as archive:
+            for export in exports:
+                if not export.file or not export.file.storage.exists(export.file.name):
+                    logger.warning(f"Export {export.id} has no file, skipping")
+                    continue
+                with export.file.open("rb") as source, archive.open(
+                    _member_name(export), "w", force_zip64=True
+                ) as target:
+                    shutil.copyfileobj(source, target)
+                added += 1
+
+        if not added:
+            raise ValueError("None of the documents could be exported")
+        os.replace(partial_path, final_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return os.path.relpath(final_path, settings.MEDIA_ROOT)
+
+
+def complete_batch_export(batch_id):
+    """Assemble the archive of a batch and record the outcome"""
+    batch = BatchExport.objects.get(pk=batch_id)
+    try:
+        batch.file.name = assemble_batch_export(batch)
+        batch.status = "completed"
+        batch.completed_at = timezone.now()
+        batch.save(update_fields=["file", "status", "completed_at"])
+        register_artifact(batch.file.name)
+    except Exception as e:
+        logger.error(f"Batch export {batch_id} failed: {str(e)}")
+        batch.status = "failed"
+        batch.error = str(e)
+        batch.save(update_fields=["status", "error"])
+    return batch
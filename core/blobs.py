@@ -0,0 +1,96 @@
+import json
+import logging
+import time
+import uuid
+import zlib
+from typing import Any, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+BLOBS_DIR = "blobs"
+
+# Blobs older than this belong to pipelines that died and are deleted
+BLOB_TTL = 24 * 60 * 60
+
+
+def _blob_name(key: str) -> str:
+    return f"{BLOBS_DIR}/{key[:2]}/{key}.z"
+
+
+def put_blob(data: bytes) -> str:
+    """
+    Store data compressed in the blob store
+
+    Pipeline stages pass the returned key between Celery tasks instead of
+    the data, so messages stay small whatever the document size.
+
+    Returns:
+        Key of the blob
+    """
+    key = uuid.uuid4().hex
+    default_storage.save(_blob_name(key), ContentFile(zlib.compress(data)))
+    return key
+
+
+def get_blob(key: str) -> bytes:
+    """
+    Read a blob back
+
+    Raises:
+        FileNotFoundError: If there is no blob with that key
+    """
+    with default_storage.open(_blob_name(key), "rb") as blob:
+        return zlib.decompress(blob.read())
+
+
+def put_text(text: str) -> str:
+    return put_blob(text.encode("utf-8"))
+
+
+def get_text(key: str) -> str:
+    return get_blob(key).decode("utf-8")
+
+
+def put_json(value: Any) -> str:
+    return put_blob(json.dumps(value).encode("utf-8"))
+
+
+def get_json(key: str) -> Any:
+    return json.loads(get_blob(key))
+
+
+def delete_blobs(*keys: Optional[str]):
+    """Delete blobs, ignoring empty and already deleted keys"""
+    for key in filter(None, keys):
+        try:
+            default_storage.delete(_blob_name(key))
+        except OSError as e:
+            logger.warning(f"Failed to delete blob {key}: {str(e)}")
+
+
+def delete_stale_blobs(max_age: int = BLOB_TTL) -> int:
+    """
+    Delete blobs left behind by pipelines that never reached the save stage
+
+    Returns:
+        Number of blobs deleted
+    """
+    if not default_storage.exists(BLOBS_DIR):
+        return 0
+
+    cutoff = time.time() - max_age
+    deleted = 0
+    for directory in default_storage.listdir(BLOBS_DIR)[0]:
+        for filename in default_storage.listdir(f"{BLOBS_DIR}/{directory}")[1]:
+            name = f"{BLOBS_DIR}/{directory}/{filename}"
+            try:
+                if default_storage.get_modified_time(name).timestamp() > cutoff:
+                    continue
+                default_storage.delete(name)
+            except (FileNotFoundError, NotImplementedError):
+                continue
+            deleted += 1
+    return deleted
@@ -0,0 +1,192 @@
+import io
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+COMMENTS_PART = "word/comments.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+COMMENTS_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"
+)
+COMMENTS_RELATIONSHIP_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments"
+)
+COMMENTS_RELATIONSHIP_ID = "rIdAdaComments"
+
+WORDPROCESSINGML_NAMESPACE = (
+    "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+)
+
+COMMENT_AUTHOR = "ADA AI Document Improver"
+COMMENT_INITIALS = "ADA"
+
+# Replacements listed in a comment at most
+MAX_COMMENT_REPLACEMENTS = 5
+
+# Characters not allowed in XML 1.0 documents
+INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def xml_text(text: str) -> str:
+    """Escape text for a w:t element, dropping characters XML can't hold"""
+    return escape(INVALID_XML_CHARS.sub("", text))
+
+
+def iter_paragraphs(text: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yield the export paragraphs of text: one per non-blank line, stripped
+
+    Yields:
+        Tuples of (offset of the paragraph in text, paragraph text)
+    """
+    offset = 0
+    for line in io.StringIO(text):
+        paragraph = line.strip()
+        if paragraph:
+            yield offset + len(line) - len(line.lstrip()), paragraph
+        offset += len(line)
+
+
+class CommentAnchors:
+    """
+    Suggestions anchored to the export paragraphs they point into
+
+    Paragraph start offsets are collected in one pass over the text, then
+    each suggestion is placed with a binary search, so anchoring m comments
+    in a text of n paragraphs costs O(n + m log n) instead of rescanning the
+    paragraphs for every suggestion. Suggestions without an offset are
+    attached to the start of the first paragraph.
+
+    Offsets are character offsets into text: the pipeline analyzes the
+    improved text it stores, so a version's suggestions point into its own
+    content.
+    """
+
+    def __init__(self, text: str, suggestions: Iterable[Dict[str, Any]]):
+        self.comments: List[Dict[str, Any]] = []
+        self._by_paragraph: Dict[int, List[Tuple[int, int, int]]] = defaultdict(list)
+
+        starts, lengths = [], []
+        for start, paragraph in iter_paragraphs(text):
+            starts.append(start)
+            lengths.append(len(paragraph))
+        if not starts:
+            return
+
+        for suggestion in sorted(
+            suggestions,
+            key=lambda item: (item.get("offset") is not None, item.get("offset") or 0),
+        ):
+            offset = suggestion.get("offset")
+            if offset is None:
+                paragraph_index, start, end = 0, 0, 0
+            else:
+                paragraph_index = max(bisect_right(starts, offset) - 1, 0)
+                paragraph_length = lengths[paragraph_index]
+                start = min(max(offset - starts[paragraph_index], 0), paragraph_length)
+                end = min(start + (suggestion.get("length") or 0), paragraph_length)
+
+            comment_id = len(self.comments)
+            self.comments.append(suggestion)
+            self._by_paragraph[paragraph_index].append((start, end, comment_id))
+
+    def __bool__(self):
+        return bool(self.comments)
+
+    def for_paragraph(self, paragraph_index: int) -> List[Tuple[int, int, int]]:
+        """(start, end, comment id) of the comments in a paragraph"""
+        return self._by_paragraph.get(paragraph_index, [])
+
+
+def paragraph_content_xml(
+    text: str, comments: List[Tuple[int, int, int]], run_open: str, run_close: str
+) -> str:
+    """
+    Runs of a paragraph with comment ranges and references inserted
+
+    Args:
+        text (str): Paragraph text
+        comments (list): (start, end, comment id) within the paragraph
+        run_open (str): XML opening a text run, up to and including <w:t>
+        run_close (str): XML closing a text run
+    """
+    if not comments:
+        return run_open + xml_text(text) + run_close
+
+    # Ranges closing at a position end before new ones open there; empty
+    # ranges open and close in place
+    events = []
+    for start, end, comment_id in comments:
+        events.append((start, 1, f'<w:commentRangeStart w:id="{comment_id}"/>'))
+        events.append(
+            (
+                end,
+                0 if end > start else 2,
+                f'<w:commentRangeEnd w:id="{comment_id}"/>'
+                f'<w:r><w:commentReference w:id="{comment_id}"/></w:r>',
+            )
+        )
+    events.sort(key=lambda event: event[:2])
+
+    parts = []
+    position = 0
+    for event_position, _, markup in events:
+        if event_position > position:
+            parts.append(run_open + xml_text(text[position:event_position]) + run_close)
+            position = event_position
+        parts.append(markup)
+    if position < len(text):
+        parts.append(run_open + xml_text(text[position:]) + run_close)
+    return "".join(parts)
+
+
+def _comment_text(suggestion: Dict[str, Any]) -> str:
+    text = suggestion.get("message") or suggestion.get("type", "").title()
+    replacements = [str(r) for r in suggestion.get("replacements") or []]
+    if replacements:
+        text += f" Suggested: {', '.join(replacements[:MAX_COMMENT_REPLACEMENTS])}"
+    return text
+
+
+def comments_part_xml(comments: List[Dict[str, Any]]) -> str:
+    """word/comments.xml holding one comment per anchored suggestion"""
+    date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    author = quoteattr(COMMENT_AUTHOR)
+    body = "".join(
+        f'<w:comment w:id="{comment_id}" w:author={author} '
+        f'w:initials="{COMMENT_INITIALS}" w:date="{date}">'
+        f'<w:p><w:r><w:t xml:space="preserve">{xml_text(_comment_text(comment))}'
+        "</w:t></w:r></w:p></w:comment>"
+        for comment_id, comment in enumerate(comments)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<w:comments xmlns:w="{WORDPROCESSINGML_NAMESPACE}">{body}</w:comments>'
+    )
+
+
+def add_comments_relationship(rels_xml: str) -> str:
+    """Reference the comments part from the document relationships"""
+    if COMMENTS_RELATIONSHIP_TYPE in rels_xml:
+        return rels_xml
+    relationship = (
+        f'<Relationship Id="{COMMENTS_RELATIONSHIP_ID}" '
+        f'Type="{COMMENTS_RELATIONSHIP_TYPE}" Target="comments.xml"/>'
+    )
+    return rels_xml.replace("</Relationships>", relationship + "</Relationships>")
+
+
+def add_comments_content_type(content_types_xml: str) -> str:
+    """Declare the comments part in [Content_Types].xml"""
+    if f'PartName="/{COMMENTS_PART}"' in content_types_xml:
+        return content_types_xml
+    override = (
+        f'<Override PartName="/{COMMENTS_PART}" '
+        f'ContentType="{COMMENTS_CONTENT_TYPE}"/>'
+    )
+    return content_types_xml.replace("</Types>", override + "</Types>")
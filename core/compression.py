@@ -0,0 +1,91 @@
+import os
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# First byte of every stored value, naming how the rest was compressed
+RAW = 0
+ZLIB = 1
+ZSTD = 2
+
+# Values shorter than this are stored as they are
+MIN_COMPRESS_SIZE = 128
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def dictionary_path(dict_id: int) -> str:
+    """Where the zstd dictionary with an id is kept"""
+    return os.path.join(settings.TEXT_COMPRESSION_DICTIONARY_DIR, f"{dict_id}.zdict")
+
+
+@lru_cache(maxsize=None)
+def _load_dictionary(dict_id: int):
+    try:
+        with open(dictionary_path(dict_id), "rb") as f:
+            return zstandard.ZstdCompressionDict(f.read())
+    except FileNotFoundError:
+        raise ImproperlyConfigured(
+            f"zstd dictionary {dict_id} not found in "
+            f"{settings.TEXT_COMPRESSION_DICTIONARY_DIR}"
+        )
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImproperlyConfigured("zstd compression needs the zstandard package")
+
+
+def _compression_dictionary() -> Optional["zstandard.ZstdCompressionDict"]:
+    dict_id = getattr(settings, "TEXT_COMPRESSION_DICTIONARY_ID", 0)
+    return _load_dictionary(dict_id) if dict_id else None
+
+
+def compress(data: bytes) -> bytes:
+    """
+    Compress data with the codec named by TEXT_COMPRESSION
+
+    zstd frames record the id of the dictionary they were compressed with,
+    so values stay readable after a new dictionary is trained as long as the
+    old dictionary file is kept.
+
+    Returns:
+        A codec byte followed by the compressed data
+    """
+    if len(data) < MIN_COMPRESS_SIZE:
+        return bytes([RAW]) + data
+
+    if getattr(settings, "TEXT_COMPRESSION", "zlib") == "zstd":
+        _require_zstandard()
+        compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=_compression_dictionary()
+        )
+        return bytes([ZSTD]) + compressor.compress(data)
+
+    return bytes([ZLIB]) + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes) -> bytes:
+    """Reverse compress(), whichever codec the data was written with"""
+    codec, payload = data[0], data[1:]
+    if codec == RAW:
+        return payload
+    if codec == ZLIB:
+        return zlib.decompress(payload)
+    if codec == ZSTD:
+        _require_zstandard()
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=_load_dictionary(dict_id) if dict_id else None
+        )
+        return decompressor.decompress(payload)
+    raise ValueError(f"Unknown compression codec {codec}")
@@ -0,0 +1,40 @@
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+
+def artifact_response(path, filename, content_type):
+    """
+    Response serving a file under MEDIA_ROOT as an attachment
+
+    With EXPORT_SENDFILE_BACKEND set, the web server sends the file bytes:
+    - "nginx": X-Accel-Redirect to EXPORT_SENDFILE_PREFIX + the media path,
+      which must be an internal location aliased to MEDIA_ROOT
+    - "apache": X-Sendfile with the absolute path (mod_xsendfile, lighttpd)
+    Otherwise the file is streamed from Python with FileResponse.
+
+    Args:
+        path (str): Absolute path of the file
+        filename (str): Download file name
+        content_type (str): MIME type of the file
+
+    Returns:
+        HttpResponse
+    """
+    backend = getattr(settings, "EXPORT_SENDFILE_BACKEND", None)
+    if backend == "nginx":
+        prefix = getattr(settings, "EXPORT_SENDFILE_PREFIX", "/protected/media/")
+        relative_path = os.path.relpath(path, settings.MEDIA_ROOT)
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(relative_path)
+    elif backend == "apache":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    else:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    return response
@@ -1,28 +1,136 @@
+import io
 import os
-import shutil
+import re
+import uuid
+import zipfile
 from django.conf import settings
+from django.db.models import F
 from datetime import datetime, timedelta
-import tempfile
 from pathlib import Path
 
 from docx import Document
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.shared import Pt, RGBColor
 
+from .comments import (
+    COMMENTS_PART,
+    CONTENT_TYPES_PART,
+    DOCUMENT_RELS_PART,
+    CommentAnchors,
+    add_comments_content_type,
+    add_comments_relationship,
+    comments_part_xml,
+    iter_paragraphs,
+    paragraph_content_xml,
+)
+from .models import Suggestion
+from .pdf import PDF_CHUNK_SIZE, render_pdf_in_pool
+from .suggestions import iter_suggestions
+from .template_registry import template_registry
+
+# Placeholder paragraph marking where the generated body goes
+BODY_MARKER = "__ADA_EXPORT_BODY__"
+
+DOCUMENT_PART = "word/document.xml"
+
+EXPORT_CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+# Body paragraphs written to the zip per write call
+PARAGRAPH_CHUNK_SIZE = 256
+
+PARAGRAPH_PROPERTIES = re.compile(r"<w:pPr>.*?</w:pPr>|<w:pPr/>", re.S)
+RUN_PROPERTIES = re.compile(r"<w:rPr>.*?</w:rPr>|<w:rPr/>", re.S)
+
+
+def _split_at_marker(xml):
+    """
+    Split document XML around the paragraph holding BODY_MARKER
+
+    Returns:
+        Tuple of (XML before the paragraph, the paragraph, XML after it)
+    """
+    marker = xml.index(BODY_MARKER)
+    start = max(xml.rfind("<w:p>", 0, marker), xml.rfind("<w:p ", 0, marker))
+    end = xml.index("</w:p>", marker) + len("</w:p>")
+    return xml[:start], xml[start:end], xml[end:]
+
+
+def _body_paragraphs_xml(template_paragraph, text, anchors=None):
+    """
+    Yield WordprocessingML for each non-blank line of text, in chunks
+
+    Paragraph and run properties are copied from the marker paragraph so the
+    body keeps the shell's alignment and character formatting. Comments in
+    anchors are wrapped around the text they point at.
+    """
+    paragraph_properties = PARAGRAPH_PROPERTIES.search(template_paragraph)
+    runs = template_paragraph[
+        paragraph_properties.end() if paragraph_properties else 0 :
+    ]
+    run_properties = RUN_PROPERTIES.search(runs)
+    paragraph_open = "<w:p>" + (
+        paragraph_properties.group(0) if paragraph_properties else ""
+    )
+    run_open = (
+        "<w:r>"
+        + (run_properties.group(0) if run_properties else "")
+        + '<w:t xml:space="preserve">'
+    )
+    run_close = "</w:t></w:r>"
+
+    chunk = []
+    for index, (_, paragraph) in enumerate(iter_paragraphs(text)):
+        comments = anchors.for_paragraph(index) if anchors else None
+        chunk.append(
+            paragraph_open
+            + paragraph_content_xml(paragraph, comments, run_open, run_close)
+            + "</w:p>"
+        )
+        if len(chunk) >= PARAGRAPH_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+class _StreamSink:
+    """Write-only, unseekable buffer drained by DocumentExporter.stream"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
 
 class ExportResult:
     def __init__(self, filepath):
         self.filepath = filepath
-        self._expiry = datetime.utcnow() + timedelta(hours=1)
+        self._expiry = datetime.utcnow() + timedelta(
+            seconds=getattr(settings, "DOCUMENT_EXPORT_TTL", 60 * 60)
+        )
 
     @property
     def url(self):
         filename = Path(self.filepath).name
         return f"/media/exports/{filename}"
-    
+
     @property
     def expiry(self):
         return self._expiry
+
     def __str__(self):
         return f"Exported file at: {self.filepath}"
 
@@ -42,7 +150,8 @@ class DocumentExporter:
         self.output_format = output_format
         self.include_comments = include_comments
 
-    def _apply_template_style(self, text, output_path):
+    def _styled_shell(self):
+        """Blank document with the house header, footer and title"""
         doc = Document()
 
         style = doc.styles["Normal"]
@@ -65,10 +174,8 @@ class DocumentExporter:
         title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
         title.space_after = Pt(12)
 
-        for para in text.split("\n"):
-            if para.strip():
-                p = doc.add_paragraph(para.strip())
-                p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
+        body = doc.add_paragraph(BODY_MARKER)
+        body.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
 
         footer = doc.sections[0].footer
         footer_paragraph = footer.paragraphs[0]
@@ -79,39 +186,165 @@ class DocumentExporter:
         footer_run.font.size = Pt(9)
         footer_run.font.color.rgb = RGBColor(128, 128, 128)
 
-        doc.save(output_path)
+        return doc
 
-    def _populate_template(self, doc):
-        data = {
+    def _template_context(self):
+        return {
             "title": f"Exported Document v{self.version}",
             "author": "Document Export System",
-            "body": "This is the body content of the document.",
+            "body": BODY_MARKER,
         }
 
-        for paragraph in doc.paragraphs:
-            for key, value in data.items():
-                if f"{{{{{key}}}}}" in paragraph.text:
-                    paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", value)
+    def _body_text(self):
+        if self.text_content:
+            return self.text_content
+        return getattr(self.version, "content", "") or ""
+
+    def _shell(self):
+        """The export's .docx shell, read like a zipfile.ZipFile"""
+        if self.text_content:
+            shell_bytes = io.BytesIO()
+            self._styled_shell().save(shell_bytes)
+            return zipfile.ZipFile(shell_bytes)
+        if self.template_path:
+            return template_registry.render(
+                self.template_path, self._template_context()
+            )
+        raise ValueError("Either template_path or text_content must be provided.")
+
+    def _suggestions(self):
+        """Suggestions of the exported version, as iter_suggestions dicts"""
+        version_id = getattr(self.version, "pk", None)
+        if version_id is not None:
+            rows = list(
+                Suggestion.objects.filter(version_id=version_id).values(
+                    "severity",
+                    "offset",
+                    "length",
+                    "message",
+                    "replacements",
+                    type=F("suggestion_type"),
+                )
+            )
+            if rows:
+                return rows
+        return list(iter_suggestions(getattr(self.version, "suggestions", None)))
+
+    def _write_docx(self, source, text, output):
+        """
+        Copy the shell's parts from source to output with the body marker
+        paragraph replaced by one paragraph per line of text, yielding after
+        each write
+
+        The body XML is generated directly and streamed into the zip entry,
+        so time and memory stay linear in the text size instead of going
+        through python-docx's object model per paragraph. output only needs
+        a write() method; it doesn't have to be seekable.
 
+        With include_comments, the version's suggestions are added as Word
+        comments anchored at their offsets.
+        """
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+            document_xml = source.read(DOCUMENT_PART).decode("utf-8")
+            anchors = None
+            if self.include_comments and BODY_MARKER in document_xml:
+                anchors = CommentAnchors(text, self._suggestions()) or None
 
+            for item in source.infolist():
+                if anchors and item.filename == COMMENTS_PART:
+                    # Replaced by the suggestion comments
+                    continue
+                if anchors and item.filename == DOCUMENT_RELS_PART:
+                    xml = source.read(item.filename).decode("utf-8")
+                    target.writestr(item, add_comments_relationship(xml))
+                    yield
+                    continue
+                if anchors and item.filename == CONTENT_TYPES_PART:
+                    xml = source.read(item.filename).decode("utf-8")
+                    target.writestr(item, add_comments_content_type(xml))
+                    yield
+                    continue
+                if item.filename != DOCUMENT_PART:
+                    target.writestr(item, source.read(item.filename))
+                    yield
+                    continue
+
+                if BODY_MARKER not in document_xml:
+                    # Template without a {{body}} placeholder
+                    target.writestr(item, document_xml)
+                    yield
+                    continue
+
+                head, body_paragraph, tail = _split_at_marker(document_xml)
+                with target.open(DOCUMENT_PART, "w") as part:
+                    part.write(head.encode("utf-8"))
+                    for chunk in _body_paragraphs_xml(body_paragraph, text, anchors):
+                        part.write(chunk.encode("utf-8"))
+                        yield
+                    part.write(tail.encode("utf-8"))
+
+            if anchors:
+                target.writestr(COMMENTS_PART, comments_part_xml(anchors.comments))
+                yield
+
+    def _render_pdf(self):
+        """
+        PDF of the body text with the house header, footer and title
+
+        Rendered in the PDF process pool. .docx templates don't apply to PDF
+        output, which always uses the house layout.
+        """
+        data, _ = render_pdf_in_pool(self._body_text())
+        return data
+
+    def write(self, output):
+        """Write the export file to a writable file object"""
+        if self.output_format == "pdf":
+            output.write(self._render_pdf())
+            return
+        for _ in self._write_docx(self._shell(), self._body_text(), output):
+            pass
+
+    def stream(self):
+        """
+        Yield the export file in chunks as it is generated, without writing
+        it to disk first (e.g. for a StreamingHttpResponse)
+        """
+        if self.output_format == "pdf":
+            data = self._render_pdf()
+            for start in range(0, len(data), PDF_CHUNK_SIZE):
+                yield data[start : start + PDF_CHUNK_SIZE]
+            return
+
+        sink = _StreamSink()
+        for _ in self._write_docx(self._shell(), self._body_text(), sink):
+            if chunk := sink.drain():
+                yield chunk
+        if chunk := sink.drain():
+            yield chunk
 
     def generate(self):
-        output = tempfile.NamedTemporaryFile(delete=False, suffix=f".{self.output_format}")
+        """
+        Write the export file straight into MEDIA_ROOT/exports
 
-        if self.text_content:
-            self._apply_template_style(self.text_content, output.name)
-        elif self.template_path:
-            doc = Document(self.template_path)
-            self._populate_template(doc)
-            doc.save(output.name)
-        else:
-            raise ValueError("Either template_path or text_content must be provided.")
-
-        # ✅ Move to MEDIA_ROOT/exports
+        The file is written under a temporary name in the same directory and
+        renamed into place, so readers never see a partial archive and
+        nothing is copied between filesystems.
+        """
         export_dir = os.path.join(settings.MEDIA_ROOT, "exports")
         os.makedirs(export_dir, exist_ok=True)
 
-        final_path = os.path.join(export_dir, Path(output.name).name)
-        shutil.move(output.name, final_path)
+        final_path = os.path.join(
+            export_dir, f"{uuid.uuid4().hex}.{self.output_format}"
+        )
+        partial_path = f"{final_path}.part"
+        try:
+            with open(partial_path, "wb") as output:
+                self.write(output)
+            os.replace(partial_path, final_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
 
         return ExportResult(final_path)
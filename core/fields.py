@@ -0,0 +1,108 @@
+import json
+from abc import ABCMeta, abstractmethod
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .compression import compress, decompress
+
+
+class Compressed:
+    """Stored bytes of a compressed field, decompressed on first access"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __repr__(self):
+        return f"<Compressed: {len(self.data)} bytes>"
+
+
+class CompressedAttribute(DeferredAttribute):
+    """
+    Descriptor decompressing a field's value the first time it's read
+
+    Rows loaded without touching the field, e.g. to update other columns,
+    never pay for decompressing it.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, Compressed):
+            value = self.field.decode(decompress(value.data))
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedFieldMixin(metaclass=ABCMeta):
+    """
+    Store a field's value compressed in a binary column
+
+    Values read from the database stay compressed until accessed through the
+    model attribute, and are written back as they are if never accessed.
+    .values() and .values_list() return Compressed objects. The compressed
+    bytes can't be filtered on.
+    """
+
+    descriptor_class = CompressedAttribute
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    @abstractmethod
+    def encode(self, value) -> bytes:
+        """Serialize a value to the bytes that are compressed"""
+
+    @abstractmethod
+    def decode(self, data: bytes):
+        """Rebuild a value from decompressed bytes"""
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Compressed(value)
+
+    def to_python(self, value):
+        if isinstance(value, Compressed):
+            return self.decode(decompress(value.data))
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the stored value without decompressing it
+        return model_instance.__dict__[self.attname]
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None or hasattr(value, "as_sql"):
+            return value
+        if isinstance(value, Compressed):
+            data = value.data
+        else:
+            data = compress(self.encode(value))
+        return connection.Database.Binary(data)
+
+    def get_db_prep_save(self, value, connection):
+        return self.get_db_prep_value(value, connection)
+
+
+class CompressedTextField(CompressedFieldMixin, models.TextField):
+    """TextField stored compressed"""
+
+    def encode(self, value) -> bytes:
+        return str(value).encode("utf-8")
+
+    def decode(self, data: bytes) -> str:
+        return data.decode("utf-8")
+
+
+class CompressedJSONField(CompressedFieldMixin, models.JSONField):
+    """JSONField stored compressed; JSON key lookups aren't supported"""
+
+    def encode(self, value) -> bytes:
+        return json.dumps(value, cls=self.encoder).encode("utf-8")
+
+    def decode(self, data: bytes):
+        return json.loads(data, cls=self.decoder)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Document, DocumentJob
+
+logger = logging.getLogger(__name__)
+
+JOB_STATE_CACHE_PREFIX = "document-job-state"
+
+# Progress reported for each stage when the caller doesn't supply one
+STAGE_PERCENT = {
+    "queued": 0,
+    "reading": 10,
+    "paraphrasing": 30,
+    "analyzing": 60,
+    "saving": 90,
+    "completed": 100,
+    "failed": 100,
+}
+
+TERMINAL_STAGES = ("completed", "failed")
+
+
+def _cache_key(document_id) -> str:
+    return f"{JOB_STATE_CACHE_PREFIX}:{document_id}"
+
+
+def _cache_timeout() -> int:
+    return getattr(settings, "DOCUMENT_JOB_STATE_TTL", 60 * 60)
+
+
+def update_job_state(
+    document_id, stage: str, *, percent: Optional[int] = None, error: str = ""
+) -> Optional[Dict[str, Any]]:
+    """
+    Record the current pipeline stage of a document and refresh the cached state
+
+    Args:
+        document_id: ID of the document being processed
+        stage: One of DocumentJob.STAGE_CHOICES
+        percent: Progress override, defaults to the stage's nominal progress
+        error: Error message for failed jobs
+
+    Returns:
+        The refreshed job state, or None if the document no longer exists
+    """
+    now = timezone.now()
+    defaults = {
+        "stage": stage,
+        "percent": STAGE_PERCENT[stage] if percent is None else percent,
+        "error": error,
+    }
+    if stage == "queued":
+        defaults.update(started_at=now, finished_at=None)
+    elif stage in TERMINAL_STAGES:
+        defaults["finished_at"] = now
+
+    DocumentJob.objects.update_or_create(document_id=document_id, defaults=defaults)
+    return refresh_job_state(document_id)
+
+
+def refresh_job_state(document_id) -> Optional[Dict[str, Any]]:
+    """
+    Rebuild the job state of a document from the database and cache it
+
+    Args:
+        document_id: ID of the document
+
+    Returns:
+        The job state, or None if the document doesn't exist
+    """
+    document = (
+        Document.objects.select_related("job")
+        .only("id", "user_id", "status", "uploaded_at", "job")
+        .filter(pk=document_id)
+        .first()
+    )
+    if document is None:
+        cache.delete(_cache_key(document_id))
+        return None
+
+    versions = document.versions.order_by("created_at").values_list(
+        "version_type", "created_at"
+    )
+    state = _build_state(document, getattr(document, "job", None), versions)
+    cache.set(_cache_key(document_id), state, _cache_timeout())
+    return state
+
+
+def get_job_state(document_id) -> Optional[Dict[str, Any]]:
+    """
+    Return the job state of a document, hitting the database only on a cache miss
+
+    Args:
+        document_id: ID of the document
+
+    Returns:
+        The job state, or None if the document doesn't exist
+    """
+    state = cache.get(_cache_key(document_id))
+    if state is None:
+        state = refresh_job_state(document_id)
+    return state
+
+
+def _build_state(document, job, versions) -> Dict[str, Any]:
+    """Serialize job state into a cache-friendly dict with a content ETag"""
+    last_updated = job.updated_at if job else document.uploaded_at
+    state = {
+        "user_id": document.user_id,
+        "document_id": str(document.id),
+        "status": document.status,
+        "last_updated": last_updated.isoformat(),
+        "job": (
+            {
+                "stage": job.stage,
+                "percent": job.percent,
+                "started_at": job.started_at.isoformat(),
+                "finished_at": job.finished_at and job.finished_at.isoformat(),
+                "error": job.error,
+            }
+            if job
+            else None
+        ),
+        "versions": [
+            {"type": version_type, "created_at": created_at.isoformat()}
+            for version_type, created_at in versions
+        ],
+    }
+    state["etag"] = hashlib.sha1(
+        json.dumps(state, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return state
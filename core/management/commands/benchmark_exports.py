@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.pdf import render_pdf, render_pdf_in_pool
+
+SAMPLE_PARAGRAPH = (
+    "The committee reviewed the quarterly results and agreed that the revised "
+    "forecast, while conservative, reflects the risks identified in the "
+    "previous audit. Further analysis will be circulated before the next "
+    "meeting so that members can comment on the proposed changes."
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark PDF export rendering in pages per second"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--paragraphs",
+            type=int,
+            default=2000,
+            help="Paragraphs in each rendered document",
+        )
+        parser.add_argument(
+            "--documents",
+            type=int,
+            default=8,
+            help="Documents rendered per run",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Renders submitted at once to the process pool",
+        )
+
+    def handle(self, *args, **options):
+        text = "\n".join([SAMPLE_PARAGRAPH] * options["paragraphs"])
+        documents = options["documents"]
+
+        # Start the pool workers before timing
+        render_pdf_in_pool("warm up")
+
+        self._report("inline", lambda: [render_pdf(text) for _ in range(documents)])
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as threads:
+            self._report(
+                "process pool",
+                lambda: list(threads.map(render_pdf_in_pool, [text] * documents)),
+            )
+
+    def _report(self, label, run):
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+
+        pages = sum(page_count for _, page_count in results)
+        size = sum(len(data) for data, _ in results)
+        self.stdout.write(
+            f"{label}: {len(results)} documents, {pages} pages, "
+            f"{size / 1024 / 1024:.1f} MiB in {elapsed:.2f}s "
+            f"({pages / elapsed:.0f} pages/s)"
+        )
@@ -0,0 +1,92 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.blobs import put_json, put_text
+from core.models import Document
+from core.tasks import save_document_version_task
+
+SAMPLE_LINE = "The quick brown fox jumps over the lazy dog near the riverbank.\n"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent document saves against the configured database, "
+        "the way Celery workers write processed uploads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--documents", type=int, default=200, help="Documents saved in total"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Concurrent writers (threads)"
+        )
+        parser.add_argument(
+            "--lines", type=int, default=200, help="Lines of text per document"
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            username=f"benchmark-{uuid.uuid4().hex[:12]}"
+        )
+        content = SAMPLE_LINE * options["lines"]
+        improvements = {
+            "grammar": {
+                "suggestions": [
+                    {
+                        "message": "Check this",
+                        "offset": i * len(SAMPLE_LINE),
+                        "length": 3,
+                    }
+                    for i in range(0, options["lines"], 10)
+                ]
+            }
+        }
+
+        def save(_):
+            try:
+                document = Document.objects.create(
+                    user=user,
+                    title="benchmark",
+                    original_file=f"uploads/benchmark-{uuid.uuid4().hex}.txt",
+                    status="processing",
+                )
+                # What the earlier pipeline stages hand over
+                document_data = {
+                    "document_id": str(document.id),
+                    "file_path": document.original_file.name,
+                    "paraphrased_key": put_text(content),
+                    "improvements_key": put_json(improvements),
+                }
+                started = time.perf_counter()
+                result = save_document_version_task(document_data)
+                return time.perf_counter() - started, "document_version_id" in result
+            finally:
+                connection.close()
+
+        self.stdout.write(
+            f"Saving {options['documents']} documents with {options['workers']} "
+            f"writers on {connection.vendor}"
+        )
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(save, range(options["documents"])))
+            elapsed = time.perf_counter() - started
+        finally:
+            user.delete()
+
+        latencies = sorted(duration for duration, _ in results)
+        failed = sum(1 for _, saved in results if not saved)
+        self.stdout.write(
+            f"{len(results) / elapsed:.1f} saves/s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, "
+            f"{failed} failed"
+        )
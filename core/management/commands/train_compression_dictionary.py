@@ -0,0 +1,53 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.compression import dictionary_path, zstandard
+from core.models import DocumentVersion
+
+
+class Command(BaseCommand):
+    help = (
+        "Train a zstd dictionary on stored document versions, for compressing "
+        "version content and suggestions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples", type=int, default=2000, help="Versions sampled at most"
+        )
+        parser.add_argument(
+            "--size", type=int, default=112640, help="Dictionary size in bytes"
+        )
+
+    def handle(self, *args, **options):
+        if zstandard is None:
+            raise CommandError("Training a dictionary needs the zstandard package")
+
+        samples = []
+        versions = DocumentVersion.objects.order_by("-created_at").only(
+            "id", "content", "suggestions"
+        )[: options["samples"]]
+        for version in versions.iterator():
+            samples.append(version.content.encode("utf-8"))
+            samples.append(json.dumps(version.suggestions).encode("utf-8"))
+        if not samples:
+            raise CommandError("No document versions to train on")
+
+        try:
+            dictionary = zstandard.train_dictionary(options["size"], samples)
+        except zstandard.ZstdError as e:
+            raise CommandError(f"Training failed, add more documents: {str(e)}")
+
+        dict_id = dictionary.dict_id()
+        os.makedirs(settings.TEXT_COMPRESSION_DICTIONARY_DIR, exist_ok=True)
+        with open(dictionary_path(dict_id), "wb") as f:
+            f.write(dictionary.as_bytes())
+
+        self.stdout.write(
+            f"Trained dictionary {dict_id} on {len(samples)} samples. Set "
+            f"TEXT_COMPRESSION=zstd and TEXT_COMPRESSION_DICTIONARY_ID={dict_id} "
+            "to use it."
+        )
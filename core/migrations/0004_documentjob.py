@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_documentversion_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentJob',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='job', serialize=False, to='core.document')),
+                ('stage', models.CharField(choices=[('queued', 'Queued'), ('reading', 'Reading'), ('paraphrasing', 'Paraphrasing'), ('analyzing', 'Analyzing'), ('saving', 'Saving'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('percent', models.PositiveSmallIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Document Job',
+                'verbose_name_plural': 'Document Jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_documentjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Suggestion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "suggestion_type",
+                    models.CharField(
+                        choices=[("grammar", "Grammar"), ("style", "Style")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[
+                            ("info", "Info"),
+                            ("warning", "Warning"),
+                            ("error", "Error"),
+                        ],
+                        default="warning",
+                        max_length=20,
+                    ),
+                ),
+                ("offset", models.PositiveIntegerField(blank=True, null=True)),
+                ("length", models.PositiveIntegerField(blank=True, null=True)),
+                ("message", models.TextField(blank=True)),
+                ("replacements", models.JSONField(blank=True, default=list)),
+                ("context", models.TextField(blank=True)),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="suggestion_items",
+                        to="core.documentversion",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Suggestion",
+                "verbose_name_plural": "Suggestions",
+                "ordering": ["offset", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["version", "suggestion_type", "offset"],
+                        name="suggestion_version_type_idx",
+                    ),
+                    models.Index(
+                        fields=["version", "offset"], name="suggestion_version_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from core.suggestions import SUGGESTION_BATCH_SIZE, build_suggestions
+
+
+def backfill_suggestions(apps, schema_editor):
+    DocumentVersion = apps.get_model("core", "DocumentVersion")
+    Suggestion = apps.get_model("core", "Suggestion")
+
+    versions = DocumentVersion.objects.exclude(suggestions={}).only("id", "suggestions")
+    for version in versions.iterator():
+        rows = build_suggestions(Suggestion, version.id, version.suggestions)
+        Suggestion.objects.bulk_create(rows, batch_size=SUGGESTION_BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_suggestion"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_suggestions, migrations.RunPython.noop),
+    ]
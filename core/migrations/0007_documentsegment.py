@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_backfill_suggestions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentSegment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                ("start_offset", models.PositiveIntegerField()),
+                ("text", models.TextField()),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="segments",
+                        to="core.documentversion",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Document Segment",
+                "verbose_name_plural": "Document Segments",
+                "ordering": ["index"],
+                "indexes": [
+                    models.Index(
+                        fields=["version", "start_offset"],
+                        name="segment_version_offset_idx",
+                    )
+                ],
+                "unique_together": {("version", "index")},
+            },
+        ),
+    ]
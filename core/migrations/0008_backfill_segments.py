@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from core.segments import SEGMENT_BATCH_SIZE, build_segments
+
+
+def backfill_segments(apps, schema_editor):
+    DocumentVersion = apps.get_model("core", "DocumentVersion")
+    DocumentSegment = apps.get_model("core", "DocumentSegment")
+
+    for version in DocumentVersion.objects.only("id", "content").iterator():
+        rows = build_segments(DocumentSegment, version.id, version.content)
+        DocumentSegment.objects.bulk_create(rows, batch_size=SEGMENT_BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_documentsegment"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_segments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:03
+
+import django.db.models.deletion
+import hashlib
+import uuid
+from django.db import migrations, models
+
+
+def backfill_content_hashes(apps, schema_editor):
+    DocumentVersion = apps.get_model("core", "DocumentVersion")
+
+    for version in DocumentVersion.objects.only("id", "content").iterator():
+        content_hash = hashlib.sha256(
+            (version.content or "").encode("utf-8")
+        ).hexdigest()
+        DocumentVersion.objects.filter(pk=version.pk).update(content_hash=content_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_backfill_segments"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentversion",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name="DocumentExport",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("template_name", models.CharField(max_length=100)),
+                ("output_format", models.CharField(max_length=10)),
+                ("include_comments", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("file", models.FileField(blank=True, upload_to="exports/")),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exports",
+                        to="core.documentversion",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Document Export",
+                "verbose_name_plural": "Document Exports",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:14
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_documentexport"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BatchExport",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("version_type", models.CharField(max_length=20)),
+                ("template_name", models.CharField(max_length=100)),
+                ("output_format", models.CharField(max_length=10)),
+                ("include_comments", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("rendering", "Rendering"),
+                            ("assembling", "Assembling"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="rendering",
+                        max_length=20,
+                    ),
+                ),
+                ("file", models.FileField(blank=True, upload_to="exports/batches/")),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "exports",
+                    models.ManyToManyField(
+                        related_name="batches", to="core.documentexport"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="batch_exports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Batch Export",
+                "verbose_name_plural": "Batch Exports",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
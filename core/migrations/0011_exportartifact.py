@@ -0,0 +1,70 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:17
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def register_existing_exports(apps, schema_editor):
+    """Track files of already rendered exports so the janitor can expire them"""
+    ExportArtifact = apps.get_model("core", "ExportArtifact")
+    ttl = timedelta(seconds=getattr(settings, "DOCUMENT_EXPORT_TTL", 60 * 60))
+
+    for model_name in ("DocumentExport", "BatchExport"):
+        model = apps.get_model("core", model_name)
+        completed = model.objects.filter(status="completed").exclude(file="")
+        for name, completed_at in completed.values_list("file", "completed_at"):
+            try:
+                size = os.path.getsize(os.path.join(settings.MEDIA_ROOT, name))
+            except OSError:
+                continue
+            ExportArtifact.objects.get_or_create(
+                path=name,
+                defaults={
+                    "size": size,
+                    "expires_at": completed_at + ttl,
+                    "last_accessed_at": completed_at,
+                },
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_batchexport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportArtifact",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=255, unique=True)),
+                ("size", models.BigIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField()),
+                ("last_accessed_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Export Artifact",
+                "verbose_name_plural": "Export Artifacts",
+                "indexes": [
+                    models.Index(fields=["expires_at"], name="artifact_expires_idx"),
+                    models.Index(
+                        fields=["last_accessed_at"], name="artifact_accessed_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(register_existing_exports, migrations.RunPython.noop),
+    ]
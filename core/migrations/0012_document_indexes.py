@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_exportartifact"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "-uploaded_at"], name="document_user_uploaded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "status"], name="document_user_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(fields=["original_file"], name="document_file_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="documentversion",
+            index=models.Index(
+                fields=["document", "created_at"], name="version_document_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+import core.fields
+
+COPY_BATCH_SIZE = 200
+
+
+def _copier(source_suffix, target_suffix):
+    def copy_columns(apps, schema_editor):
+        DocumentVersion = apps.get_model("core", "DocumentVersion")
+        sources = [f"content{source_suffix}", f"suggestions{source_suffix}"]
+        targets = [f"content{target_suffix}", f"suggestions{target_suffix}"]
+
+        batch = []
+        for version in DocumentVersion.objects.only("id", *sources).iterator(
+            chunk_size=COPY_BATCH_SIZE
+        ):
+            for source, target in zip(sources, targets):
+                setattr(version, target, getattr(version, source))
+            batch.append(version)
+            if len(batch) == COPY_BATCH_SIZE:
+                DocumentVersion.objects.bulk_update(batch, targets)
+                batch = []
+        if batch:
+            DocumentVersion.objects.bulk_update(batch, targets)
+
+    return copy_columns
+
+
+class Migration(migrations.Migration):
+    """
+    Move version content and suggestions into compressed binary columns
+
+    The column type changes, so the values are copied into new columns
+    rather than altered in place.
+    """
+
+    dependencies = [
+        ("core", "0012_document_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentversion",
+            name="content_compressed",
+            field=core.fields.CompressedTextField(default="No content Provided"),
+        ),
+        migrations.AddField(
+            model_name="documentversion",
+            name="suggestions_compressed",
+            field=core.fields.CompressedJSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(_copier("", "_compressed"), _copier("_compressed", "")),
+        migrations.RemoveField(
+            model_name="documentversion",
+            name="content",
+        ),
+        migrations.RemoveField(
+            model_name="documentversion",
+            name="suggestions",
+        ),
+        migrations.RenameField(
+            model_name="documentversion",
+            old_name="content_compressed",
+            new_name="content",
+        ),
+        migrations.RenameField(
+            model_name="documentversion",
+            old_name="suggestions_compressed",
+            new_name="suggestions",
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_compress_version_columns"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="document",
+            name="document_file_idx",
+        ),
+    ]
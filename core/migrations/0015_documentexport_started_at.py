@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_remove_document_file_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentexport",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
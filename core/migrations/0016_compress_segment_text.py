@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+import core.fields
+
+COPY_BATCH_SIZE = 500
+
+
+def _copier(source, target):
+    def copy_text(apps, schema_editor):
+        DocumentSegment = apps.get_model("core", "DocumentSegment")
+
+        batch = []
+        for segment in DocumentSegment.objects.only("id", source).iterator(
+            chunk_size=COPY_BATCH_SIZE
+        ):
+            setattr(segment, target, getattr(segment, source))
+            batch.append(segment)
+            if len(batch) == COPY_BATCH_SIZE:
+                DocumentSegment.objects.bulk_update(batch, [target])
+                batch = []
+        if batch:
+            DocumentSegment.objects.bulk_update(batch, [target])
+
+    return copy_text
+
+
+class Migration(migrations.Migration):
+    """
+    Move segment text into a compressed binary column, like the version
+    content it's sliced from
+    """
+
+    dependencies = [
+        ("core", "0015_documentexport_started_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentsegment",
+            name="text_compressed",
+            field=core.fields.CompressedTextField(default=""),
+            preserve_default=False,
+        ),
+        # Nullable while it's removed, so unapplying can add it back before
+        # the text is copied into it
+        migrations.AlterField(
+            model_name="documentsegment",
+            name="text",
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(
+            _copier("text", "text_compressed"), _copier("text_compressed", "text")
+        ),
+        migrations.RemoveField(
+            model_name="documentsegment",
+            name="text",
+        ),
+        migrations.RenameField(
+            model_name="documentsegment",
+            old_name="text_compressed",
+            new_name="text",
+        ),
+    ]
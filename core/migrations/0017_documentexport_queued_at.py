@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_compress_segment_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentexport",
+            name="queued_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,7 +1,14 @@
+import hashlib
 import uuid
+from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from .fields import CompressedJSONField, CompressedTextField
+from .template_registry import get_template_mtime_ns
 
 User = get_user_model()
 
@@ -29,6 +36,13 @@ class Document(models.Model):
         ordering = ["-uploaded_at"]
         verbose_name = "Document"
         verbose_name_plural = "Documents"
+        indexes = [
+            # Document lists: a user's documents, newest first
+            models.Index(
+                fields=["user", "-uploaded_at"], name="document_user_uploaded_idx"
+            ),
+            models.Index(fields=["user", "status"], name="document_user_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title or 'Untitled'} - {self.get_status_display()}"
@@ -57,12 +71,13 @@ class DocumentVersion(models.Model):
         max_length=20, choices=VERSION_TYPES, default="original"
     )
 
-    content = models.TextField(default="No content Provided")
+    content = CompressedTextField(default="No content Provided")
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     file = models.FileField(upload_to="document_versions/", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     # Improvement metadata
-    suggestions = models.JSONField(
+    suggestions = CompressedJSONField(
         default=dict, blank=True
     )  # Stores all types of suggestions
 
@@ -70,7 +85,312 @@ class DocumentVersion(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Document Version"
         verbose_name_plural = "Document Versions"
+        # Also the index for (document, version_type) lookups
         unique_together = ["document", "version_type"]
+        indexes = [
+            models.Index(
+                fields=["document", "created_at"], name="version_document_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.document} - {self.get_version_type_display()}"
+
+    def save(self, *args, **kwargs):
+        if "content" not in self.get_deferred_fields():
+            self.content_hash = self.hash_content(self.content)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def hash_content(content):
+        return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+class DocumentJob(models.Model):
+    """
+    Latest processing job state for a document, mirrored into the cache
+    """
+
+    STAGE_CHOICES = [
+        ("queued", "Queued"),
+        ("reading", "Reading"),
+        ("paraphrasing", "Paraphrasing"),
+        ("analyzing", "Analyzing"),
+        ("saving", "Saving"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    document = models.OneToOneField(
+        Document, on_delete=models.CASCADE, related_name="job", primary_key=True
+    )
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default="queued")
+    percent = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Document Job"
+        verbose_name_plural = "Document Jobs"
+
+    def __str__(self):
+        return f"{self.document_id} - {self.get_stage_display()} ({self.percent}%)"
+
+
+class Suggestion(models.Model):
+    """
+    Individual grammar/style suggestion for a document version, normalized
+    out of DocumentVersion.suggestions so it can be filtered and paginated
+
+    Rows are stored uncompressed: message and context are mostly shorter
+    than compression.MIN_COMPRESS_SIZE, so compressing each row would save
+    almost nothing.
+    """
+
+    SUGGESTION_TYPES = [
+        ("grammar", "Grammar"),
+        ("style", "Style"),
+    ]
+    SEVERITY_CHOICES = [
+        ("info", "Info"),
+        ("warning", "Warning"),
+        ("error", "Error"),
+    ]
+
+    version = models.ForeignKey(
+        DocumentVersion, on_delete=models.CASCADE, related_name="suggestion_items"
+    )
+    suggestion_type = models.CharField(max_length=20, choices=SUGGESTION_TYPES)
+    severity = models.CharField(
+        max_length=20, choices=SEVERITY_CHOICES, default="warning"
+    )
+    offset = models.PositiveIntegerField(null=True, blank=True)
+    length = models.PositiveIntegerField(null=True, blank=True)
+    message = models.TextField(blank=True)
+    replacements = models.JSONField(default=list, blank=True)
+    context = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["offset", "id"]
+        verbose_name = "Suggestion"
+        verbose_name_plural = "Suggestions"
+        indexes = [
+            models.Index(
+                fields=["version", "suggestion_type", "offset"],
+                name="suggestion_version_type_idx",
+            ),
+            models.Index(fields=["version", "offset"], name="suggestion_version_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_suggestion_type_display()} @ {self.offset}: {self.message}"
+
+
+class DocumentSegment(models.Model):
+    """
+    Ordered slice of a version's text (a paragraph, or part of a long one)
+    so ranges can be read without loading the whole content
+
+    The text is stored compressed like the version's content. Paragraphs
+    shorter than compression.MIN_COMPRESS_SIZE are kept as they are.
+    """
+
+    version = models.ForeignKey(
+        DocumentVersion, on_delete=models.CASCADE, related_name="segments"
+    )
+    index = models.PositiveIntegerField()
+    start_offset = models.PositiveIntegerField()
+    text = CompressedTextField()
+
+    class Meta:
+        ordering = ["index"]
+        verbose_name = "Document Segment"
+        verbose_name_plural = "Document Segments"
+        unique_together = ["version", "index"]
+        indexes = [
+            models.Index(
+                fields=["version", "start_offset"], name="segment_version_offset_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.version} - segment {self.index}"
+
+    @property
+    def end_offset(self):
+        return self.start_offset + len(self.text)
+
+
+class DocumentExport(models.Model):
+    """
+    Rendered export of a document version, shared by all identical requests
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    version = models.ForeignKey(
+        DocumentVersion, on_delete=models.CASCADE, related_name="exports"
+    )
+    cache_key = models.CharField(max_length=64, unique=True)
+    template_name = models.CharField(max_length=100)
+    output_format = models.CharField(max_length=10)
+    include_comments = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    file = models.FileField(upload_to="exports/", blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    queued_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Document Export"
+        verbose_name_plural = "Document Exports"
+
+    def __str__(self):
+        return f"{self.version} - {self.output_format} ({self.get_status_display()})"
+
+    @staticmethod
+    def build_cache_key(version, template_name, output_format, include_comments):
+        """
+        Key identifying an export of this exact content and configuration
+
+        The template's mtime is part of the key, so editing a template
+        invalidates its exports. PDF exports always use the house layout
+        without comments, so the template and comment options aren't part of
+        their key.
+        """
+        if output_format == "pdf":
+            template_name, include_comments, template_mtime_ns = "", False, 0
+        else:
+            template_mtime_ns = get_template_mtime_ns(template_name)
+        parts = [
+            str(version.pk),
+            version.content_hash,
+            template_name,
+            str(template_mtime_ns),
+            output_format,
+            str(bool(include_comments)),
+        ]
+        return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()
+
+    @property
+    def expires_at(self):
+        if not self.completed_at:
+            return None
+        return self.completed_at + timedelta(
+            seconds=getattr(settings, "DOCUMENT_EXPORT_TTL", 60 * 60)
+        )
+
+    @staticmethod
+    def stalled_since():
+        """Time before which pending or processing exports are stalled"""
+        timeout = getattr(settings, "EXPORT_RENDER_TIMEOUT", 10 * 60)
+        return timezone.now() - timedelta(seconds=timeout)
+
+    def is_stalled(self):
+        """
+        Whether the export has been waiting for a worker, or processing,
+        longer than any render takes, i.e. its task was lost or its worker
+        died
+        """
+        if self.status == "processing":
+            since = self.started_at or self.queued_at
+        else:
+            since = self.queued_at
+        return since <= self.stalled_since()
+
+    def needs_render(self):
+        """Failed, stalled, expired or missing artifacts are rendered again"""
+        if self.status == "failed":
+            return True
+        if self.status in ("pending", "processing"):
+            return self.is_stalled()
+        if self.status != "completed":
+            return False
+        return (
+            not self.file
+            or self.expires_at <= timezone.now()
+            or not self.file.storage.exists(self.file.name)
+        )
+
+
+class BatchExport(models.Model):
+    """
+    Archive bundling the exports of many documents
+
+    Each document is rendered as a regular DocumentExport, so already rendered
+    exports are reused and renders are shared with single-document requests.
+    """
+
+    STATUS_CHOICES = [
+        ("rendering", "Rendering"),
+        ("assembling", "Assembling"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="batch_exports"
+    )
+    exports = models.ManyToManyField(DocumentExport, related_name="batches")
+    version_type = models.CharField(max_length=20)
+    template_name = models.CharField(max_length=100)
+    output_format = models.CharField(max_length=10)
+    include_comments = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="rendering"
+    )
+    file = models.FileField(upload_to="exports/batches/", blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Batch Export"
+        verbose_name_plural = "Batch Exports"
+
+    def __str__(self):
+        return f"{self.user} - {self.output_format} ({self.get_status_display()})"
+
+    @property
+    def expires_at(self):
+        if not self.completed_at:
+            return None
+        return self.completed_at + timedelta(
+            seconds=getattr(settings, "DOCUMENT_EXPORT_TTL", 60 * 60)
+        )
+
+
+class ExportArtifact(models.Model):
+    """
+    File written under MEDIA_ROOT/exports, tracked for expiry and the disk quota
+    """
+
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    last_accessed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Export Artifact"
+        verbose_name_plural = "Export Artifacts"
+        indexes = [
+            models.Index(fields=["expires_at"], name="artifact_expires_idx"),
+            models.Index(fields=["last_accessed_at"], name="artifact_accessed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.path} ({self.size} bytes)"
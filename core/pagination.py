@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class DocumentCursorPagination(CursorPagination):
+    """
+    Cursor pagination over a user's documents, newest first
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-uploaded_at"
+
+
+class SuggestionPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination over a version's suggestions
+    """
+
+    default_limit = 50
+    max_limit = 500
@@ -0,0 +1,307 @@
+import io
+import logging
+import multiprocessing
+import re
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# US Letter, in points
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 72
+
+HEADER_TEXT = "ADA AI Document Improver"
+FOOTER_TEXT = "Confidential | Generated by AI Document Improver"
+TITLE_TEXT = "Improved Document"
+
+BODY_FONT_SIZE = 11
+BODY_LEADING = 14
+PARAGRAPH_SPACING = 6
+TITLE_SPACING = 12
+
+# Standard 14 fonts, so nothing has to be embedded
+FONTS = {
+    "F1": "Helvetica",
+    "F2": "Helvetica-Bold",
+    "F3": "Helvetica-Oblique",
+}
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the AFM
+HELVETICA_WIDTHS = dict(
+    zip(
+        map(chr, range(32, 127)),
+        (
+            278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278,
+            333, 278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556,
+            278, 278, 584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611,
+            778, 722, 278, 500, 667, 556, 833, 722, 778, 667, 778, 722, 667,
+            611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556, 333,
+            556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833,
+            556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500,
+            334, 260, 334, 584,
+        ),
+    )
+)  # fmt: skip
+DEFAULT_WIDTH = 556
+
+CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+# Bytes per chunk when streaming a rendered PDF
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+def text_width(text: str, size: float) -> float:
+    """Width of text set in Helvetica at size, in points"""
+    return sum(HELVETICA_WIDTHS.get(c, DEFAULT_WIDTH) for c in text) * size / 1000
+
+
+def _pdf_string(text: str) -> bytes:
+    """Literal PDF string in WinAnsiEncoding"""
+    data = text.encode("cp1252", errors="replace")
+    return (
+        b"("
+        + (data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)"))
+        + b")"
+    )
+
+
+def wrap_paragraph(text: str, width: float, size: float) -> List[List[str]]:
+    """
+    Greedily break a paragraph into lines no wider than width
+
+    Words longer than a line are broken between characters.
+
+    Returns:
+        List of lines, each a list of words
+    """
+    space = text_width(" ", size)
+    lines, line, line_width = [], [], 0.0
+
+    for word in text.split():
+        word_width = text_width(word, size)
+        while word_width > width:
+            if line:
+                lines.append(line)
+                line, line_width = [], 0.0
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], size) > width:
+                cut -= 1
+            lines.append([word[:cut]])
+            word = word[cut:]
+            word_width = text_width(word, size)
+
+        if line and line_width + space + word_width > width:
+            lines.append(line)
+            line, line_width = [], 0.0
+        line_width += word_width + (space if line else 0)
+        line.append(word)
+
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _centered_text(font: str, size: float, rgb: Tuple[float, ...], y, text) -> bytes:
+    x = (PAGE_WIDTH - text_width(text, size)) / 2
+    return b"BT /%s %g Tf %g %g %g rg %.2f %.2f Td %s Tj ET\n" % (
+        font.encode(),
+        size,
+        *rgb,
+        x,
+        y,
+        _pdf_string(text),
+    )
+
+
+def _page_decorations() -> bytes:
+    """House header and footer drawn on every page"""
+    return _centered_text(
+        "F2", 14, (0, 0.2, 0.4), PAGE_HEIGHT - 45, HEADER_TEXT
+    ) + _centered_text("F3", 9, (0.5, 0.5, 0.5), 35, FOOTER_TEXT)
+
+
+def layout_pages(text: str) -> List[bytes]:
+    """
+    Lay out the title and one justified paragraph per non-blank line of
+    text, returning the content stream of each page
+    """
+    body_width = PAGE_WIDTH - 2 * MARGIN
+    top = PAGE_HEIGHT - MARGIN
+    bottom = MARGIN
+    decorations = _page_decorations()
+
+    pages = []
+    page = [decorations]
+    y = top - BODY_FONT_SIZE
+    page.append(_centered_text("F2", BODY_FONT_SIZE, (0, 0, 0), y, TITLE_TEXT))
+    y -= BODY_LEADING + TITLE_SPACING
+
+    for raw_line in io.StringIO(text):
+        paragraph = CONTROL_CHARS.sub(" ", raw_line).strip()
+        if not paragraph:
+            continue
+
+        lines = wrap_paragraph(paragraph, body_width, BODY_FONT_SIZE)
+        for index, words in enumerate(lines):
+            if y < bottom:
+                pages.append(b"".join(page))
+                page = [decorations]
+                y = top - BODY_FONT_SIZE
+
+            line_text = " ".join(words)
+            word_spacing = 0.0
+            if index < len(lines) - 1 and len(words) > 1:
+                # Justify every line but the paragraph's last
+                slack = body_width - text_width(line_text, BODY_FONT_SIZE)
+                word_spacing = slack / (len(words) - 1)
+            page.append(
+                b"BT /F1 %d Tf 0 g %.3f Tw %d %.2f Td %s Tj ET\n"
+                % (BODY_FONT_SIZE, word_spacing, MARGIN, y, _pdf_string(line_text))
+            )
+            y -= BODY_LEADING
+        y -= PARAGRAPH_SPACING
+
+    pages.append(b"".join(page))
+    return pages
+
+
+def render_pdf(text: str) -> Tuple[bytes, int]:
+    """
+    Render text as a PDF with the house header, footer and title
+
+    Args:
+        text (str): Document text, one paragraph per line
+
+    Returns:
+        Tuple of (PDF bytes, page count)
+    """
+    pages = layout_pages(text)
+    font_ids = {name: 3 + i for i, name in enumerate(FONTS)}
+    first_page_id = 3 + len(FONTS)
+    page_ids = [first_page_id + 2 * i for i in range(len(pages))]
+
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % i for i in page_ids), len(pages)),
+    }
+    for name, base_font in FONTS.items():
+        objects[font_ids[name]] = (
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+            b"/Encoding /WinAnsiEncoding >>" % base_font.encode()
+        )
+
+    font_resources = b" ".join(
+        b"/%s %d 0 R" % (name.encode(), object_id)
+        for name, object_id in font_ids.items()
+    )
+    for page_id, content in zip(page_ids, pages):
+        stream = zlib.compress(content)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, font_resources, page_id + 1)
+        )
+        objects[page_id + 1] = (
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+            % (len(stream), stream)
+        )
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for object_id in range(1, len(objects) + 1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id]))
+
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    output.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    output.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref_offset)
+    )
+    return output.getvalue(), len(pages)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _in_daemon_process() -> bool:
+    """
+    Whether this is a daemonic process, such as a Celery prefork pool worker
+
+    Daemonic processes can't start children. They are already separate from
+    the web process, so they render inline instead of through the pool.
+    """
+    if multiprocessing.current_process().daemon:
+        return True
+    try:
+        # Celery's prefork workers are billiard processes
+        from billiard.process import current_process
+    except ImportError:
+        return False
+    return bool(current_process().daemon)
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool shared by the current process, None when disabled or in a
+    daemonic process
+    """
+    global _executor
+
+    workers = getattr(settings, "PDF_RENDER_WORKERS", 2)
+    if not workers or _in_daemon_process():
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a threaded web or Celery worker isn't safe
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_pdf_in_pool(text: str) -> Tuple[bytes, int]:
+    """
+    Render a PDF in the worker process pool so large documents don't hold
+    the calling process's GIL
+
+    Renders inline when PDF_RENDER_WORKERS is 0, in daemonic processes such
+    as Celery prefork workers, or when the pool breaks.
+
+    Args:
+        text (str): Document text, one paragraph per line
+
+    Returns:
+        Tuple of (PDF bytes, page count)
+    """
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return render_pdf(text)
+        return executor.submit(render_pdf, text).result()
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"PDF render pool unavailable, rendering inline: {str(e)}")
+        _reset_executor()
+        return render_pdf(text)
@@ -0,0 +1,114 @@
+from typing import Iterator, Tuple
+
+from django.db import transaction
+
+# Longest segment stored; longer paragraphs are split at whitespace
+MAX_SEGMENT_LENGTH = 4000
+
+# Segments inserted per INSERT statement
+SEGMENT_BATCH_SIZE = 500
+
+
+def split_segments(
+    text: str, max_length: int = MAX_SEGMENT_LENGTH
+) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into contiguous segments, one per paragraph
+
+    Line endings stay attached to their segment, so joining the segments
+    gives back the original text and every offset is exact. Paragraphs
+    longer than max_length are split at the last whitespace in the window.
+
+    Args:
+        text (str): Text to split
+        max_length (int): Maximum segment length
+
+    Yields:
+        Tuples of (start offset, segment text)
+    """
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_length:
+            cut = line.rfind(" ", 0, max_length) + 1 or max_length
+            yield offset, line[:cut]
+            offset += cut
+            line = line[cut:]
+        if line:
+            yield offset, line
+            offset += len(line)
+
+
+def build_segments(segment_model, version_id, text: str):
+    """
+    Build unsaved segment rows for a version's text
+
+    Takes the model class so data migrations can pass their historical model.
+    """
+    return [
+        segment_model(
+            version_id=version_id, index=index, start_offset=start, text=segment
+        )
+        for index, (start, segment) in enumerate(split_segments(text or ""))
+    ]
+
+
+@transaction.atomic
+def write_segments(version) -> int:
+    """
+    Replace the stored segments of a version with its current content
+
+    Args:
+        version: DocumentVersion whose content should be segmented
+
+    Returns:
+        Number of segments written
+    """
+    from .models import DocumentSegment
+
+    DocumentSegment.objects.filter(version=version).delete()
+    rows = build_segments(DocumentSegment, version.pk, version.content)
+    DocumentSegment.objects.bulk_create(rows, batch_size=SEGMENT_BATCH_SIZE)
+    return len(rows)
+
+
+def read_range(version_id, offset: int, length: int) -> Tuple[str, int]:
+    """
+    Read length characters of a version's text starting at offset
+
+    Touches only the segments overlapping the range, so the cost depends on
+    the range size rather than on the document size.
+
+    Args:
+        version_id: ID of the DocumentVersion
+        offset (int): First character to read
+        length (int): Number of characters to read
+
+    Returns:
+        Tuple of (text, total length of the version's text)
+    """
+    from .models import DocumentSegment
+
+    # Model instances rather than .values_list(), so the compressed text is
+    # decoded by the field
+    segments = DocumentSegment.objects.filter(version_id=version_id).only(
+        "start_offset", "text"
+    )
+    last = segments.order_by("-index").first()
+    if last is None:
+        return "", 0
+
+    first = (
+        segments.filter(start_offset__lte=offset)
+        .order_by("-start_offset")
+        .values_list("index", flat=True)
+        .first()
+    ) or 0
+    overlapping = list(
+        segments.filter(index__gte=first, start_offset__lt=offset + length)
+    )
+    if not overlapping:
+        return "", last.end_offset
+
+    skip = offset - overlapping[0].start_offset
+    text = "".join(segment.text for segment in overlapping)
+    return text[skip : skip + length], last.end_offset
@@ -1,20 +1,77 @@
-import os
-
-from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
+from django.urls import reverse
 from rest_framework import serializers
 from PyPDF2 import PdfReader
 
-from .models import Document, DocumentVersion
+from .batches import MAX_BATCH_DOCUMENTS
+from .models import (
+    BatchExport,
+    Document,
+    DocumentExport,
+    DocumentSegment,
+    DocumentVersion,
+    Suggestion,
+)
+from .segments import write_segments
+from .template_registry import get_template_path, template_registry
+
+
+def parse_field_list(value):
+    """Split a comma separated query parameter into a set of names"""
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for request driven field selection:
+    - ?fields=a,b limits the output to the listed fields
+    - ?expand=x includes fields listed in Meta.expandable_fields, which are
+      omitted by default
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        query_params = getattr(request, "query_params", {})
+
+        expand = parse_field_list(query_params.get("expand"))
+        for name in getattr(self.Meta, "expandable_fields", []):
+            if name not in expand:
+                self.fields.pop(name, None)
 
+        requested = parse_field_list(query_params.get("fields"))
+        if requested:
+            for name in set(self.fields) - requested - expand:
+                self.fields.pop(name)
 
-class DocumentVersionSerializer(serializers.ModelSerializer):
+
+class DeferredFieldsMixin:
+    """
+    Serializer mixin that leaves out model fields deferred on the instance
+    instead of loading each of them with an extra query
+    """
+
+    def to_representation(self, instance):
+        self._deferred_fields = instance.get_deferred_fields()
+        return super().to_representation(instance)
+
+    @property
+    def _readable_fields(self):
+        deferred = getattr(self, "_deferred_fields", set())
+        for field in super()._readable_fields:
+            if field.source not in deferred:
+                yield field
+
+
+class DocumentVersionSerializer(DeferredFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for DocumentVersion with:
     - Content validation
     - Secure file handling
-    - Dynamic field selection
+    - Dynamic field selection (deferred content/suggestions are omitted)
     """
 
     class Meta:
@@ -46,7 +103,9 @@ class DocumentVersionSerializer(serializers.ModelSerializer):
         if file_obj:
             validated_data["content"] = self._extract_file_content(file_obj)
 
-        return super().create(validated_data)
+        version = super().create(validated_data)
+        write_segments(version)
+        return version
 
     def _extract_file_content(self, file):
         """Extract text content from uploaded file"""
@@ -69,6 +128,66 @@ class DocumentVersionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"File processing failed: {str(e)}")
 
 
+class DocumentVersionSummarySerializer(serializers.ModelSerializer):
+    """
+    Version metadata without content or suggestions
+    """
+
+    class Meta:
+        model = DocumentVersion
+        fields = ["id", "version_type", "created_at"]
+        read_only_fields = fields
+
+
+class DocumentListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Lightweight Document serializer for listings:
+    - No version content or suggestions
+    - Versions only when requested with ?expand=versions
+    """
+
+    versions = DocumentVersionSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Document
+        fields = ["id", "title", "status", "uploaded_at", "versions"]
+        read_only_fields = fields
+        expandable_fields = ["versions"]
+
+
+class SuggestionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a single normalized suggestion
+    """
+
+    type = serializers.CharField(source="suggestion_type", read_only=True)
+
+    class Meta:
+        model = Suggestion
+        fields = [
+            "id",
+            "type",
+            "severity",
+            "offset",
+            "length",
+            "message",
+            "replacements",
+            "context",
+        ]
+        read_only_fields = fields
+
+
+class DocumentSegmentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a stored segment of a version's text
+    """
+
+    class Meta:
+        model = DocumentSegment
+        fields = ["index", "start_offset", "text"]
+        read_only_fields = fields
+
+
 class DocumentSerializer(serializers.ModelSerializer):
     """
     Comprehensive Document serializer with:
@@ -115,12 +234,13 @@ class DocumentSerializer(serializers.ModelSerializer):
         document = Document.objects.create(**validated_data)
 
         # Create original version
-        DocumentVersion.objects.create(
+        original = DocumentVersion.objects.create(
             document=document,
             version_type="original",
             file=file_obj,
             content=DocumentVersionSerializer()._extract_file_content(file_obj),
         )
+        write_segments(original)
 
         return document
 
@@ -161,7 +281,9 @@ class DocumentImprovementSerializer(serializers.Serializer):
     def validate_document_id(self, value):
         """Verify document exists and is processable"""
         try:
-            document = Document.objects.get(pk=value)
+            document = self.context.get("document")
+            if document is None or document.pk != value:
+                document = Document.objects.get(pk=value)
             if document.status != "completed":
                 raise serializers.ValidationError("Document must be in completed state")
             return document
@@ -176,6 +298,7 @@ class DocumentExportSerializer(serializers.Serializer):
     - Version verification
     - Export configuration options
     """
+
     version_type = serializers.ChoiceField(
         choices=DocumentVersion.VERSION_TYPES,
         default="improved",
@@ -197,6 +320,15 @@ class DocumentExportSerializer(serializers.Serializer):
         required=False,
         help_text="Whether to include improvement suggestions as comments",
     )
+    delivery = serializers.ChoiceField(
+        choices=[("url", "Download URL"), ("stream", "Stream in response")],
+        default="url",
+        required=False,
+        help_text=(
+            "Return a download URL (rendered by a worker) or, if the export "
+            "is already rendered, the file itself"
+        ),
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -205,7 +337,9 @@ class DocumentExportSerializer(serializers.Serializer):
     def validate_document_id(self, value):
         """Verify document exists and is exportable"""
         try:
-            document = Document.objects.get(pk=value)
+            document = self.context.get("document")
+            if document is None or document.pk != value:
+                document = Document.objects.get(pk=value)
             if document.status != "completed":
                 raise ValidationError(
                     "Document must be in completed state before export"
@@ -230,7 +364,9 @@ class DocumentExportSerializer(serializers.Serializer):
             raise ValidationError("Document must be in completed state before export")
 
         try:
-            version = DocumentVersion.objects.get(
+            # The cache key only needs the content hash; the text is loaded
+            # when the export is rendered
+            version = DocumentVersion.objects.defer("content", "suggestions").get(
                 document=document, version_type=data["version_type"]
             )
             data["version"] = version
@@ -240,35 +376,147 @@ class DocumentExportSerializer(serializers.Serializer):
                 f"{data['version_type']} version not found for document"
             )
 
-
     def _get_available_templates(self):
         """Discover available templates in templates directory"""
-        template_dir = getattr(settings, "DOCUMENT_TEMPLATES_DIR", "document_templates")
-        template_path = os.path.join(settings.BASE_DIR, template_dir)
-
-        templates = []
-        if os.path.exists(template_path):
-            for f in os.listdir(template_path):
-                if f.endswith(".docx"):
-                    templates.append(f.replace(".docx", ""))
-        return templates
+        return template_registry.names()
 
     def get_export_config(self):
         """Return validated data in export-ready format"""
         return {
             "version": self.validated_data["version"],
-            "template_path": os.path.join(
-                settings.BASE_DIR,
-                getattr(settings, "DOCUMENT_TEMPLATES_DIR", "document_templates"),
-                f"{self.validated_data['template_name']}.docx",
-            ),
+            "template_path": get_template_path(self.validated_data["template_name"]),
             "output_format": self.validated_data["format"],
             "include_comments": self.validated_data["include_comments"],
         }
 
+    def get_cache_key(self):
+        """Key shared by all requests for an identical export"""
+        return DocumentExport.build_cache_key(
+            self.validated_data["version"],
+            self.validated_data["template_name"],
+            self.validated_data["format"],
+            self.validated_data["include_comments"],
+        )
+
     class Meta:
         ref_name = "DocumentExport"
         extra_kwargs = {
             "version_type": {"write_only": True},
         }
 
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Status of an export job, with a download link once rendered
+    """
+
+    format = serializers.CharField(source="output_format", read_only=True)
+    download_url = serializers.SerializerMethodField()
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = DocumentExport
+        fields = [
+            "id",
+            "status",
+            "format",
+            "template_name",
+            "include_comments",
+            "created_at",
+            "completed_at",
+            "expires_at",
+            "download_url",
+            "error",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != "completed" or not obj.file:
+            return None
+        return reverse(
+            "document-export-download",
+            kwargs={"id": obj.version.document_id, "export_id": obj.id},
+        )
+
+
+class BatchExportSerializer(DocumentExportSerializer):
+    """
+    Serializer for exporting many documents into one archive
+    """
+
+    document_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=MAX_BATCH_DOCUMENTS,
+        help_text="IDs of the documents to export",
+    )
+    delivery = None
+
+    def validate(self, data):
+        """Resolve the requested version of every document in one query"""
+        document_ids = set(data["document_ids"])
+        versions = list(
+            DocumentVersion.objects.filter(
+                document_id__in=document_ids,
+                document__user=self.context["user"],
+                document__status="completed",
+                version_type=data["version_type"],
+            ).only("id", "document_id", "version_type", "content_hash")
+        )
+
+        missing = document_ids - {version.document_id for version in versions}
+        if missing:
+            raise ValidationError(
+                f"No exportable {data['version_type']} version for documents: "
+                f"{', '.join(sorted(str(i) for i in missing))}"
+            )
+        data["versions"] = versions
+        return data
+
+    class Meta:
+        ref_name = "BatchExport"
+
+
+class BatchExportStatusSerializer(serializers.ModelSerializer):
+    """
+    Progress of a batch export, with a download link once assembled
+    """
+
+    format = serializers.CharField(source="output_format", read_only=True)
+    total = serializers.IntegerField(read_only=True)
+    rendered = serializers.IntegerField(read_only=True)
+    failed = serializers.IntegerField(read_only=True)
+    percent = serializers.SerializerMethodField()
+    expires_at = serializers.DateTimeField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BatchExport
+        fields = [
+            "id",
+            "status",
+            "format",
+            "template_name",
+            "version_type",
+            "include_comments",
+            "total",
+            "rendered",
+            "failed",
+            "percent",
+            "created_at",
+            "completed_at",
+            "expires_at",
+            "download_url",
+            "error",
+        ]
+        read_only_fields = fields
+
+    def get_percent(self, obj):
+        if not obj.total:
+            return 0
+        return round(100 * (obj.rendered + obj.failed) / obj.total)
+
+    def get_download_url(self, obj):
+        if obj.status != "completed" or not obj.file:
+            return None
+        return reverse("batch-export-download", kwargs={"batch_id": obj.id})
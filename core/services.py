@@ -89,13 +89,10 @@ class DocumentProcessingService:
             if not content:
                 raise ValueError("Empty document content")
 
-            # Parallel processing of different components
-            with ThreadPoolExecutor() as executor:
-                future_paraphrase = executor.submit(self._paraphrase_content, content)
-                future_analysis = executor.submit(self._analyze_content, content)
-
-                paraphrased = future_paraphrase.result()
-                analysis = future_analysis.result()
+            # The paraphrased text is what the improved version stores, so
+            # it's the text analyzed: suggestion offsets point into it
+            paraphrased = self._paraphrase_content(content)
+            analysis = self._analyze_content(paraphrased)
 
             return {
                 "status": "success",
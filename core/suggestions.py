@@ -0,0 +1,100 @@
+from typing import Any, Dict, Iterator
+
+from django.db import transaction
+
+# Suggestions inserted per INSERT statement
+SUGGESTION_BATCH_SIZE = 1000
+
+# Severity assigned to each suggestion type
+SEVERITY_BY_TYPE = {"grammar": "error", "style": "info"}
+
+
+def iter_suggestions(improvements: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Flatten the improvements produced by the processing pipeline into a
+    stream of individual suggestions
+
+    Handles both the Celery pipeline shape (grammar/style_suggestions) and
+    the synchronous service shape (grammar/style).
+
+    Args:
+        improvements (dict): DocumentVersion.suggestions payload
+
+    Yields:
+        Dict with type, severity, message, replacements, context, offset
+        and length
+    """
+    if not isinstance(improvements, dict):
+        return
+
+    grammar = improvements.get("grammar") or {}
+    for item in grammar.get("suggestions", []):
+        yield {
+            "type": "grammar",
+            "severity": SEVERITY_BY_TYPE["grammar"],
+            "message": item.get("message", ""),
+            "replacements": item.get("suggestions", item.get("replacements", [])),
+            "context": item.get("context", ""),
+            "offset": item.get("offset"),
+            "length": item.get("length"),
+        }
+
+    style = improvements.get("style_suggestions") or improvements.get("style") or []
+    if isinstance(style, dict):
+        style = [
+            {"type": kind, **item}
+            for kind, items in style.items()
+            if isinstance(items, list)
+            for item in items
+        ]
+    for item in style:
+        yield {
+            "type": "style",
+            "severity": SEVERITY_BY_TYPE["style"],
+            "message": item.get("suggestion") or item.get("type", ""),
+            "replacements": [],
+            "context": item.get("word", ""),
+            "offset": item.get("offset"),
+            "length": item.get("length"),
+        }
+
+
+def build_suggestions(suggestion_model, version_id, improvements: Dict[str, Any]):
+    """
+    Build unsaved suggestion rows for a version from its improvements
+
+    Takes the model class so data migrations can pass their historical model.
+    """
+    return [
+        suggestion_model(
+            version_id=version_id,
+            suggestion_type=item["type"],
+            severity=item["severity"],
+            message=item["message"] or "",
+            replacements=item["replacements"] or [],
+            context=item["context"] or "",
+            offset=item["offset"],
+            length=item["length"],
+        )
+        for item in iter_suggestions(improvements)
+    ]
+
+
+@transaction.atomic
+def write_suggestions(version, improvements: Dict[str, Any]) -> int:
+    """
+    Replace the normalized suggestions of a version in bulk
+
+    Args:
+        version: DocumentVersion the suggestions belong to
+        improvements (dict): Improvements payload from the processing pipeline
+
+    Returns:
+        Number of suggestions written
+    """
+    from .models import Suggestion
+
+    Suggestion.objects.filter(version=version).delete()
+    rows = build_suggestions(Suggestion, version.pk, improvements)
+    Suggestion.objects.bulk_create(rows, batch_size=SUGGESTION_BATCH_SIZE)
+    return len(rows)
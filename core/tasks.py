@@ -1,36 +1,65 @@
 import logging
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Optional
 
 from celery import chain, group, shared_task
 from celery.result import AsyncResult, GroupResult
-
-
-from .models import Document, DocumentVersion
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .artifacts import cleanup_artifacts, register_artifact
+from .blobs import (
+    delete_blobs,
+    delete_stale_blobs,
+    get_json,
+    get_text,
+    put_json,
+    put_text,
+)
+from .batches import check_batch_export, complete_batch_export, notify_batches
+from .exporter import DocumentExporter
+from .jobs import update_job_state
+from .models import Document, DocumentExport
 from .utils import clean_text, read_document_content
 from .services import DocumentProcessingService
+from .template_registry import get_template_path
+from .versions import mark_document_failed, save_improved_version
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3)
-def read_document_content_task(self, file_path: str) -> Dict[str, Any]:
+def read_document_content_task(
+    self, file_path: str, document_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Celery task to read document content
 
     Args:
         file_path (str): Path to the document file
+        document_id (str): ID of the document, used for job state tracking
 
     Returns:
-        Dict with document content and metadata
+        Dict with the blob key of the document content and metadata
     """
+    _record_stage(document_id, "reading")
     try:
         content = read_document_content(file_path)
 
         if not content:
             raise ValueError("Could not extract content from the document")
 
-        return {"content": clean_text(content), "file_path": file_path}
+        return {
+            "content_key": put_text(clean_text(content)),
+            "file_path": file_path,
+            "document_id": document_id,
+        }
     except Exception as e:
+        if self.request.retries >= self.max_retries:
+            if document_id:
+                mark_document_failed(document_id)
+            _record_stage(document_id, "failed", error=str(e))
         self.retry(exc=e, countdown=2**self.request.retries)
 
 
@@ -40,18 +69,19 @@ def paraphrase_document_task(self, document_data: Dict[str, Any]) -> Dict[str, A
     Celery task to paraphrase document content
 
     Args:
-        document_data (dict): Dictionary containing document content
+        document_data (dict): Dictionary with the blob key of the content
 
     Returns:
-        Dict with original and paraphrased content
+        Dict with the blob keys of the original and paraphrased content
     """
+    _record_stage(document_data.get("document_id"), "paraphrasing")
     try:
         from transformers import pipeline
 
         paraphraser = pipeline("text2text-generation", model="t5-small")
 
         # Break text into chunks to avoid model length limitations
-        chunks = _split_text_into_chunks(document_data["content"])
+        chunks = _split_text_into_chunks(get_text(document_data["content_key"]))
 
         paraphrased_chunks = [
             _paraphrase_text_chunk(paraphraser, chunk) for chunk in chunks
@@ -59,7 +89,7 @@ def paraphrase_document_task(self, document_data: Dict[str, Any]) -> Dict[str, A
 
         paraphrased_text = " ".join(paraphrased_chunks)
 
-        return {**document_data, "paraphrased_content": paraphrased_text}
+        return {**document_data, "paraphrased_key": put_text(paraphrased_text)}
     except Exception as e:
         logger.error(f"Paraphrasing failed: {str(e)}")
         return document_data
@@ -70,12 +100,16 @@ def analyze_document_task(self, document_data: Dict[str, Any]) -> Dict[str, Any]
     """
     Celery task to analyze document content
 
+    The paraphrased text is analyzed when there is one, since that's the
+    text the improved version stores: suggestion offsets point into it.
+
     Args:
-        document_data (dict): Dictionary containing document content
+        document_data (dict): Dictionary with the blob keys of the content
 
     Returns:
-        Dict with analysis results
+        Dict with the blob key of the analysis results
     """
+    _record_stage(document_data.get("document_id"), "analyzing")
     try:
         import language_tool_python
         import spacy
@@ -83,24 +117,23 @@ def analyze_document_task(self, document_data: Dict[str, Any]) -> Dict[str, Any]
         # Load models
         nlp = spacy.load("en_core_web_sm")
         grammar_tool = language_tool_python.LanguageTool("en-US")
+        content = get_text(_improved_text_key(document_data))
 
         # Grammar analysis
-        grammar_analysis = _analyze_grammar(grammar_tool, document_data["content"])
+        grammar_analysis = _analyze_grammar(grammar_tool, content)
 
         # Readability analysis
-        readability = _analyze_readability(nlp, document_data["content"])
+        readability = _analyze_readability(nlp, content)
 
         # Style suggestions
-        style_suggestions = _generate_style_suggestions(nlp, document_data["content"])
+        style_suggestions = _generate_style_suggestions(nlp, content)
 
-        return {
-            **document_data,
-            "improvements": {
-                "grammar": grammar_analysis,
-                "readability": readability,
-                "style_suggestions": style_suggestions,
-            },
+        improvements = {
+            "grammar": grammar_analysis,
+            "readability": readability,
+            "style_suggestions": style_suggestions,
         }
+        return {**document_data, "improvements_key": put_json(improvements)}
     except Exception as e:
         logger.error(f"Document analysis failed: {str(e)}")
         return document_data
@@ -111,28 +144,40 @@ def save_document_version_task(document_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Celery task to save document version
 
+    The blobs of the earlier stages are deleted once the version is saved.
+
     Args:
-        document_data (dict): Dictionary containing processed document data
+        document_data (dict): Dictionary with the blob keys of the processed
+            document data
 
     Returns:
         Dict with saved document version details
     """
+    document_id = document_data.get("document_id")
+    blob_keys = [
+        document_data.get(key)
+        for key in ("content_key", "paraphrased_key", "improvements_key")
+    ]
+    _record_stage(document_id, "saving")
     try:
-        # Retrieve the original document
-        document = Document.objects.get(original_file=document_data["file_path"])
-
-        # Create a new document version
-        document_version = DocumentVersion.objects.create(
-            document=document,
-            version_type="improved",
-            content=document_data.get("paraphrased_content", ""),
-            suggestions=document_data.get("improvements", {}),
+        improved_key = _improved_text_key(document_data)
+        improvements_key = document_data.get("improvements_key")
+        document_version = save_improved_version(
+            document_id,
+            get_text(improved_key) if improved_key else "",
+            get_json(improvements_key) if improvements_key else {},
         )
 
+        _record_stage(document_id, "completed")
         return {"document_version_id": str(document_version.id), **document_data}
     except Exception as e:
         logger.error(f"Saving document version failed: {str(e)}")
+        if document_id:
+            mark_document_failed(document_id)
+        _record_stage(document_id, "failed", error=str(e))
         return document_data
+    finally:
+        delete_blobs(*blob_keys)
 
 
 def process_document(document_id: str) -> AsyncResult:
@@ -147,10 +192,13 @@ def process_document(document_id: str) -> AsyncResult:
     """
     # Retrieve the document
     document = Document.objects.get(id=document_id)
+    update_job_state(document.id, "queued")
 
     # Create processing workflow using Celery's chain
     processing_workflow = chain(
-        read_document_content_task.s(document.original_file.path),
+        read_document_content_task.s(
+            document.original_file.path, document_id=str(document.id)
+        ),
         paraphrase_document_task.s(),
         analyze_document_task.s(),
         save_document_version_task.s(),
@@ -161,6 +209,24 @@ def process_document(document_id: str) -> AsyncResult:
 
 
 # Helper functions for text processing
+def _improved_text_key(document_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Blob key of the improved text: the paraphrased text, or the original
+    content when paraphrasing failed
+    """
+    return document_data.get("paraphrased_key") or document_data.get("content_key")
+
+
+def _record_stage(document_id: Optional[str], stage: str, **kwargs) -> None:
+    """Update job state without letting bookkeeping failures break the pipeline"""
+    if not document_id:
+        return
+    try:
+        update_job_state(document_id, stage, **kwargs)
+    except Exception as e:
+        logger.warning(f"Failed to record job stage {stage} for {document_id}: {e}")
+
+
 def _split_text_into_chunks(text: str, max_chunk_size: int = 200) -> List[str]:
     """Split text into manageable chunks"""
     words = text.split()
@@ -301,3 +367,156 @@ def process_document_task(self, document_path):
         return service.process_document(document_path, async_mode=False)
     except Exception as e:
         self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def export_document_task(self, export_id: str) -> Dict[str, Any]:
+    """
+    Celery task to render a document export
+
+    Args:
+        export_id (str): ID of the DocumentExport to render
+
+    Returns:
+        Dict with the export id and its final status
+    """
+    claimed = DocumentExport.objects.filter(
+        pk=export_id, status__in=["pending", "failed"]
+    ).update(status="processing", error="", started_at=timezone.now())
+    if not claimed:
+        # Another worker is rendering it or it's already done
+        notify_batches(export_id)
+        return {"export_id": export_id, "status": "skipped"}
+
+    export = DocumentExport.objects.select_related("version").get(pk=export_id)
+    try:
+        exporter = DocumentExporter(
+            version=export.version,
+            template_path=get_template_path(export.template_name),
+            output_format=export.output_format,
+            include_comments=export.include_comments,
+        )
+        result = exporter.generate()
+
+        export.file.name = os.path.relpath(result.filepath, settings.MEDIA_ROOT)
+        export.status = "completed"
+        export.completed_at = timezone.now()
+        export.save(update_fields=["file", "status", "completed_at"])
+        register_artifact(export.file.name)
+    except Exception as e:
+        logger.error(f"Export {export_id} failed: {str(e)}")
+        export.status = "failed"
+        export.error = str(e)
+        export.save(update_fields=["status", "error"])
+
+    notify_batches(export_id)
+    return {"export_id": export_id, "status": export.status}
+
+
+@shared_task
+def requeue_stalled_exports_task() -> int:
+    """
+    Periodic Celery task queueing exports again whose task was lost or whose
+    worker died, so requests and batches waiting on them finish
+
+    Returns:
+        Number of exports queued again
+    """
+    since = DocumentExport.stalled_since()
+    stalled = (
+        Q(status="pending", queued_at__lte=since)
+        | Q(status="processing", started_at__lte=since)
+        | Q(status="processing", started_at__isnull=True, queued_at__lte=since)
+    )
+    export_ids = [
+        str(export_id)
+        for export_id in DocumentExport.objects.filter(stalled).values_list(
+            "id", flat=True
+        )
+    ]
+    if not export_ids:
+        return 0
+
+    DocumentExport.objects.filter(stalled, pk__in=export_ids).update(
+        status="pending", queued_at=timezone.now()
+    )
+    for export_id in export_ids:
+        export_document_task.delay(export_id)
+    logger.warning(f"Requeued {len(export_ids)} stalled exports")
+    return len(export_ids)
+
+
+@shared_task
+def start_batch_export_task(batch_id: str) -> Dict[str, Any]:
+    """
+    Celery task fanning a batch export out to one export task per document
+
+    Exports that are already rendered aren't queued again; if none need
+    rendering the archive is assembled right away.
+
+    Args:
+        batch_id (str): ID of the BatchExport
+
+    Returns:
+        Dict with the batch id and the number of renders queued
+    """
+    export_ids = [
+        str(export_id)
+        for export_id in DocumentExport.objects.filter(
+            batches=batch_id, status__in=["pending", "failed"]
+        ).values_list("id", flat=True)
+    ]
+    if export_ids:
+        group(
+            export_document_task.s(export_id) for export_id in export_ids
+        ).apply_async()
+
+    # Covers batches whose exports were all cached or finished meanwhile
+    check_batch_export(batch_id)
+    return {"batch_id": batch_id, "queued": len(export_ids)}
+
+
+@shared_task
+def assemble_batch_export_task(batch_id: str) -> Dict[str, Any]:
+    """
+    Celery task bundling the rendered exports of a batch into one archive
+
+    Args:
+        batch_id (str): ID of the BatchExport
+
+    Returns:
+        Dict with the batch id and its final status
+    """
+    batch = complete_batch_export(batch_id)
+    return {"batch_id": batch_id, "status": batch.status}
+
+
+@shared_task
+def cleanup_export_artifacts_task() -> Dict[str, Any]:
+    """
+    Periodic Celery task deleting expired, orphaned and over-quota exports
+
+    Returns:
+        Counts of deleted files and the export storage metrics
+    """
+    result = cleanup_artifacts()
+    logger.info(
+        f"Export janitor: {result['expired']} expired, {result['orphaned']} "
+        f"orphaned, {result['over_quota']} over quota; "
+        f"{result['bytes_stored']} bytes stored, "
+        f"{result['bytes_evicted']} bytes evicted"
+    )
+    return result
+
+
+@shared_task
+def cleanup_blobs_task() -> int:
+    """
+    Periodic Celery task deleting pipeline blobs whose jobs died
+
+    Returns:
+        Number of blobs deleted
+    """
+    deleted = delete_stale_blobs()
+    logger.info(f"Blob janitor: {deleted} stale blobs deleted")
+    return deleted
@@ -0,0 +1,210 @@
+import copy
+import logging
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from docx import Document
+from docx.opc.oxml import serialize_part_xml
+from docx.text.paragraph import Paragraph
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+def get_templates_dir():
+    """Absolute path of the directory holding .docx export templates"""
+    return os.path.join(
+        settings.BASE_DIR,
+        getattr(settings, "DOCUMENT_TEMPLATES_DIR", "document_templates"),
+    )
+
+
+def get_template_path(template_name):
+    """Absolute path of the .docx file for a template name"""
+    return os.path.join(get_templates_dir(), f"{template_name}.docx")
+
+
+def get_template_mtime_ns(template_name) -> int:
+    """Modification time of a template's file, 0 if it doesn't exist"""
+    try:
+        return os.stat(get_template_path(template_name)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+class RenderedTemplate:
+    """
+    A rendered template: a filled-in copy of the template's document XML plus
+    its other parts, unchanged
+
+    Reads like a zipfile.ZipFile (infolist(), read()), so exports copy the
+    parts into their archive without a python-docx save and reload.
+    """
+
+    def __init__(self, template: "CompiledTemplate", element):
+        self.template = template
+        self.element = element
+
+    @property
+    def paragraphs(self) -> List[Paragraph]:
+        return [Paragraph(p, None) for p in self.element.body.p_lst]
+
+    def infolist(self) -> List[zipfile.ZipInfo]:
+        return self.template.infos
+
+    def read(self, name: str) -> bytes:
+        if name == self.template.document_part:
+            return serialize_part_xml(self.element)
+        return self.template.parts[name]
+
+    def save(self, output):
+        """Write the rendered .docx to a path or writable file object"""
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as package:
+            for info in self.infolist():
+                package.writestr(info, self.read(info.filename))
+
+
+class CompiledTemplate:
+    """
+    A .docx template parsed once, with its placeholder locations indexed
+
+    Each placeholder is recorded as (paragraph index, run index) when it sits
+    inside a single run, so rendering only touches those runs and keeps their
+    formatting. Placeholders Word split across runs are recorded with a run
+    index of None and replaced at paragraph level.
+
+    The package is read and its document XML parsed once; a render copies
+    the parsed tree (an lxml deep copy) instead of parsing the .docx again.
+    """
+
+    def __init__(self, path: str, mtime_ns: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        with zipfile.ZipFile(path) as package:
+            self.infos = package.infolist()
+            self.parts = {
+                info.filename: package.read(info.filename) for info in self.infos
+            }
+        document = Document(path)
+        self.document_part = document.part.partname.lstrip("/")
+        self.element = document.element
+        self.placeholders = self._index_placeholders(document)
+
+    @staticmethod
+    def _index_placeholders(document) -> List[Tuple[int, Optional[int]]]:
+        locations = []
+        for paragraph_index, paragraph in enumerate(document.paragraphs):
+            if not PLACEHOLDER_PATTERN.search(paragraph.text):
+                continue
+
+            run_indexes = [
+                run_index
+                for run_index, run in enumerate(paragraph.runs)
+                if PLACEHOLDER_PATTERN.search(run.text)
+            ]
+            run_text = "".join(paragraph.runs[i].text for i in run_indexes)
+            if PLACEHOLDER_PATTERN.findall(run_text) == PLACEHOLDER_PATTERN.findall(
+                paragraph.text
+            ):
+                locations.extend((paragraph_index, i) for i in run_indexes)
+            else:
+                locations.append((paragraph_index, None))
+        return locations
+
+    def render(self, context: Dict[str, str]) -> RenderedTemplate:
+        """
+        Return a copy of the template with placeholders replaced
+
+        Args:
+            context (dict): Placeholder values; unknown placeholders are kept
+
+        Returns:
+            A RenderedTemplate
+        """
+
+        def substitute(text):
+            return PLACEHOLDER_PATTERN.sub(
+                lambda match: str(context.get(match.group(1), match.group(0))), text
+            )
+
+        rendered = RenderedTemplate(self, copy.deepcopy(self.element))
+        paragraphs = rendered.paragraphs
+        for paragraph_index, run_index in self.placeholders:
+            paragraph = paragraphs[paragraph_index]
+            if run_index is None:
+                paragraph.text = substitute(paragraph.text)
+            else:
+                run = paragraph.runs[run_index]
+                run.text = substitute(run.text)
+        return rendered
+
+
+class TemplateRegistry:
+    """
+    Process-wide cache of compiled export templates
+
+    Templates are compiled on first use and recompiled when the file's mtime
+    changes; the template listing is refreshed when the directory's mtime
+    changes.
+    """
+
+    def __init__(self, templates_dir: Optional[str] = None):
+        self._templates_dir = templates_dir
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self._names: Optional[Tuple[int, List[str]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def templates_dir(self):
+        return self._templates_dir or get_templates_dir()
+
+    def names(self) -> List[str]:
+        """Names of the available templates (without .docx extension)"""
+        try:
+            mtime_ns = os.stat(self.templates_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        cached = self._names
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        names = sorted(
+            f[: -len(".docx")]
+            for f in os.listdir(self.templates_dir)
+            if f.endswith(".docx")
+        )
+        self._names = (mtime_ns, names)
+        return names
+
+    def get(self, path: str) -> CompiledTemplate:
+        """Compiled template for a .docx path, recompiled if the file changed"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        compiled = self._compiled.get(path)
+        if compiled is not None and compiled.mtime_ns == mtime_ns:
+            return compiled
+
+        with self._lock:
+            compiled = self._compiled.get(path)
+            if compiled is None or compiled.mtime_ns != mtime_ns:
+                logger.info(f"Compiling export template {path}")
+                compiled = CompiledTemplate(path, mtime_ns)
+                self._compiled[path] = compiled
+        return compiled
+
+    def render(self, path: str, context: Dict[str, str]):
+        """Render the template at path with context"""
+        return self.get(path).render(context)
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+            self._names = None
+
+
+template_registry = TemplateRegistry()
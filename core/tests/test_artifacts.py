@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..artifacts import (
+    artifact_metrics,
+    cleanup_artifacts,
+    enforce_quota,
+    register_artifact,
+    touch_artifact,
+)
+from ..models import Document, DocumentExport, DocumentVersion, ExportArtifact
+from ..tasks import export_document_task
+
+User = get_user_model()
+
+
+class ArtifactStoreTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        os.makedirs(os.path.join(self.media_root, "exports"))
+        cache.clear()
+
+    def _write(self, name, size):
+        path = os.path.join("exports", name)
+        with open(os.path.join(self.media_root, path), "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def _exists(self, path):
+        return os.path.exists(os.path.join(self.media_root, path))
+
+    def test_register_records_size_and_expiry(self):
+        artifact = register_artifact(self._write("a.docx", 10))
+        self.assertEqual(artifact.size, 10)
+        self.assertGreater(artifact.expires_at, timezone.now())
+
+    @override_settings(EXPORT_STORAGE_QUOTA=25)
+    def test_least_recently_used_artifacts_are_evicted(self):
+        old = register_artifact(self._write("old.docx", 10))
+        used = register_artifact(self._write("used.docx", 10))
+        ExportArtifact.objects.filter(pk=old.pk).update(
+            last_accessed_at=timezone.now() - timedelta(minutes=10)
+        )
+        ExportArtifact.objects.filter(pk=used.pk).update(
+            last_accessed_at=timezone.now() - timedelta(minutes=20)
+        )
+        touch_artifact(used.path)
+
+        new = register_artifact(self._write("new.docx", 10))
+
+        self.assertFalse(self._exists(old.path))
+        self.assertTrue(self._exists(used.path))
+        self.assertTrue(self._exists(new.path))
+        metrics = artifact_metrics()
+        self.assertEqual(metrics["bytes_stored"], 20)
+        self.assertEqual(metrics["bytes_evicted"], 10)
+        self.assertEqual(metrics["artifacts_evicted"], 1)
+
+    def test_new_artifact_is_kept_over_quota(self):
+        artifact = register_artifact(self._write("big.docx", 100))
+        self.assertEqual(enforce_quota(quota=10, keep=artifact.pk), 0)
+        self.assertTrue(self._exists(artifact.path))
+
+    def test_cleanup_deletes_expired_and_orphaned_files(self):
+        expired = register_artifact(self._write("expired.docx", 5))
+        ExportArtifact.objects.filter(pk=expired.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        live = register_artifact(self._write("live.docx", 5))
+        orphan = self._write("orphan.docx", 7)
+        two_hours_ago = time.time() - 2 * 60 * 60
+        os.utime(os.path.join(self.media_root, orphan), (two_hours_ago, two_hours_ago))
+        in_progress = self._write("rendering.docx.part", 3)
+
+        result = cleanup_artifacts()
+
+        self.assertEqual((result["expired"], result["orphaned"]), (1, 1))
+        self.assertEqual(result["bytes_evicted"], 12)
+        self.assertFalse(self._exists(expired.path))
+        self.assertFalse(self._exists(orphan))
+        self.assertTrue(self._exists(live.path))
+        self.assertTrue(self._exists(in_progress))
+
+
+class EvictedExportTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+        document = Document.objects.create(
+            user=self.user,
+            title="doc",
+            original_file="uploads/doc.txt",
+            status="completed",
+        )
+        DocumentVersion.objects.create(
+            document=document, version_type="improved", content="Text."
+        )
+        self.url = reverse("document-export", args=[document.id])
+        self.enterContext(patch("core.views.export_document_task.delay"))
+
+    def test_evicted_export_is_rendered_again(self):
+        export_id = self.client.post(self.url, {}, format="json").data["id"]
+        export_document_task(str(export_id))
+        artifact = ExportArtifact.objects.get()
+
+        ExportArtifact.objects.update(expires_at=timezone.now())
+        cleanup_artifacts()
+
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, artifact.path)))
+        self.assertEqual(DocumentExport.objects.get().file, "")
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "pending")
+
+    def test_metrics_are_for_staff_only(self):
+        url = reverse("export-storage-metrics")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn("bytes_stored", self.client.get(url).data)
@@ -0,0 +1,132 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from project.celery import app
+
+from ..exporter import DocumentExporter
+from ..models import BatchExport, Document, DocumentExport, DocumentVersion
+from ..tasks import export_document_task
+
+User = get_user_model()
+
+
+class BatchExportViewTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+        self.documents = [self._document(f"Report {i}") for i in range(3)]
+        self.url = reverse("batch-export")
+
+    def _document(self, title, user=None):
+        document = Document.objects.create(
+            user=user or self.user,
+            title=title,
+            original_file="uploads/doc.txt",
+            status="completed",
+        )
+        DocumentVersion.objects.create(
+            document=document, version_type="improved", content=f"{title} body"
+        )
+        return document
+
+    def _export(self, documents, **data):
+        data["document_ids"] = [str(document.id) for document in documents]
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data, format="json")
+
+    def test_documents_are_bundled_into_one_archive(self):
+        response = self._export(self.documents)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["total"], 3)
+
+        status_response = self.client.get(response.data["status_url"])
+        self.assertEqual(status_response.data["status"], "completed")
+        self.assertEqual(status_response.data["rendered"], 3)
+        self.assertEqual(status_response.data["percent"], 100)
+
+        download = self.client.get(status_response.data["download_url"])
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        body = b"".join(download.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            names = archive.namelist()
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all(name.startswith("report-") for name in names))
+
+    def test_rendered_exports_are_reused(self):
+        single = self.client.post(
+            reverse("document-export", args=[self.documents[0].id]),
+            {},
+            format="json",
+        )
+        export_document_task(str(single.data["id"]))
+        rendered = DocumentExport.objects.get()
+
+        with patch.object(
+            DocumentExporter,
+            "generate",
+            autospec=True,
+            side_effect=DocumentExporter.generate,
+        ) as render:
+            self._export(self.documents)
+
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(DocumentExport.objects.count(), 3)
+        self.assertEqual(DocumentExport.objects.get(pk=rendered.pk).file, rendered.file)
+        self.assertEqual(BatchExport.objects.get().status, "completed")
+
+    def test_progress_while_rendering(self):
+        with patch("core.views.start_batch_export_task.delay"):
+            response = self._export(self.documents, format="pdf")
+
+        self.assertEqual(response.data["status"], "rendering")
+        self.assertEqual(response.data["format"], "pdf")
+        self.assertEqual((response.data["total"], response.data["rendered"]), (3, 0))
+        self.assertIsNone(response.data["download_url"])
+
+    def test_failed_documents_are_left_out(self):
+        generate = DocumentExporter.generate
+
+        def render(exporter):
+            if exporter.version.document_id == self.documents[0].id:
+                raise ValueError("Broken document")
+            return generate(exporter)
+
+        with patch.object(
+            DocumentExporter, "generate", autospec=True, side_effect=render
+        ):
+            response = self._export(self.documents)
+
+        batch = self.client.get(response.data["status_url"]).data
+        self.assertEqual(batch["status"], "completed")
+        self.assertEqual((batch["rendered"], batch["failed"]), (2, 1))
+
+    def test_other_users_documents_are_rejected(self):
+        other = User.objects.create_user(username="other", password="password")
+        response = self._export([self.documents[0], self._document("x", other)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BatchExport.objects.exists())
+
+    def test_batch_status_is_private(self):
+        response = self._export(self.documents)
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(
+            self.client.get(response.data["status_url"]).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
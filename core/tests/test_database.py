@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from project.database import SQLITE_OPTIONS, database_config
+
+BASE_DIR = Path("/srv/app")
+
+
+class DatabaseConfigTest(SimpleTestCase):
+    def test_relative_sqlite_path_keeps_rollback_journal(self):
+        config = database_config("sqlite:///db.sqlite3", BASE_DIR)
+        self.assertEqual(config["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(config["NAME"], BASE_DIR / "db.sqlite3")
+        self.assertNotIn("journal_mode", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+    def test_sqlite_wal_mode_is_opt_in(self):
+        config = database_config("sqlite:///db.sqlite3?journal_mode=wal", BASE_DIR)
+        self.assertIn("journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertIn("busy_timeout=5000", config["OPTIONS"]["init_command"])
+        self.assertNotIn("journal_mode", config["OPTIONS"])
+        self.assertEqual(SQLITE_OPTIONS["init_command"], "PRAGMA busy_timeout=5000;")
+
+        with self.assertRaises(ValueError):
+            database_config("sqlite:///db.sqlite3?journal_mode=off", BASE_DIR)
+
+    def test_absolute_sqlite_path(self):
+        config = database_config("sqlite:////data/db.sqlite3", BASE_DIR)
+        self.assertEqual(config["NAME"], Path("/data/db.sqlite3"))
+        self.assertEqual(config["OPTIONS"], SQLITE_OPTIONS)
+
+    def test_postgres_with_persistent_connections(self):
+        config = database_config(
+            "postgres://ada:p%40ss@db:5433/ada?sslmode=require",
+            BASE_DIR,
+            conn_max_age=120,
+        )
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(
+            (config["NAME"], config["USER"], config["PASSWORD"]),
+            ("ada", "ada", "p@ss"),
+        )
+        self.assertEqual((config["HOST"], config["PORT"]), ("db", "5433"))
+        self.assertEqual(config["CONN_MAX_AGE"], 120)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertEqual(config["OPTIONS"], {"sslmode": "require"})
+
+    def test_pool_disables_persistent_connections(self):
+        config = database_config(
+            "postgresql://ada@db/ada", BASE_DIR, pool=True, pool_max_size=20
+        )
+        self.assertEqual(config["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20})
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            database_config("oracle://db/ada", BASE_DIR)
@@ -0,0 +1,223 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Document, DocumentVersion
+from ..segments import read_range, split_segments, write_segments
+from ..suggestions import write_suggestions
+
+User = get_user_model()
+
+
+class DocumentListViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("document-list")
+
+        for i in range(3):
+            document = Document.objects.create(
+                user=self.user, title=f"doc-{i}", original_file=f"uploads/{i}.txt"
+            )
+            DocumentVersion.objects.create(
+                document=document, version_type="original", content="x" * 1000
+            )
+
+    def test_list_is_paginated(self):
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_list_omits_versions_by_default(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("versions", response.data["results"][0])
+
+    def test_expand_versions_excludes_content(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"expand": "versions"})
+        version = response.data["results"][0]["versions"][0]
+        self.assertEqual(version["version_type"], "original")
+        self.assertNotIn("content", version)
+
+    def test_fields_selection(self):
+        response = self.client.get(self.url, {"fields": "id,title"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+
+    def test_only_own_documents(self):
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"], [])
+
+    def test_stats_count_every_document(self):
+        document = Document.objects.first()
+        DocumentVersion.objects.create(
+            document=document, version_type="improved", content="y"
+        )
+        Document.objects.create(
+            user=User.objects.create_user(username="other", password="password"),
+            title="theirs",
+            original_file="uploads/theirs.txt",
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("document-stats"))
+        self.assertEqual(response.data, {"total_documents": 3, "improved_documents": 1})
+
+
+class DocumentVersionEndpointsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+        self.document = Document.objects.create(
+            user=self.user, title="doc", original_file="uploads/doc.txt"
+        )
+        self.version = DocumentVersion.objects.create(
+            document=self.document,
+            version_type="improved",
+            content="abcdefghij" * 10,
+            suggestions={
+                "grammar": {
+                    "total_errors": 3,
+                    "suggestions": [
+                        {"message": f"issue {i}", "suggestions": [], "offset": i}
+                        for i in range(3)
+                    ],
+                },
+                "style_suggestions": [
+                    {"type": "Passive Voice", "suggestion": "Use active voice"}
+                ],
+            },
+        )
+        write_segments(self.version)
+        write_suggestions(self.version, self.version.suggestions)
+        self.kwargs = {"id": self.document.id, "version_id": self.version.id}
+
+    def test_retrieve_defers_large_fields(self):
+        url = reverse("document-retrieve", args=[self.document.id])
+        version = self.client.get(url).data["versions"][0]
+        self.assertNotIn("content", version)
+        self.assertNotIn("suggestions", version)
+
+        version = self.client.get(url, {"expand": "content"}).data["versions"][0]
+        self.assertEqual(version["content"], self.version.content)
+        self.assertNotIn("suggestions", version)
+
+    def test_version_retrieve_is_scoped_to_document(self):
+        url = reverse("document-version-retrieve", kwargs=self.kwargs)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("content", response.data)
+
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(user=other)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_content_range(self):
+        url = reverse("document-version-content", kwargs=self.kwargs)
+        response = self.client.get(url, {"offset": 95, "length": 10})
+        self.assertEqual(response.data["content"], "fghij")
+        self.assertEqual(response.data["total_length"], 100)
+        self.assertIsNone(response.data["next_offset"])
+
+        response = self.client.get(url, {"offset": 0, "length": 4})
+        self.assertEqual(response.data["content"], "abcd")
+        self.assertEqual(response.data["next_offset"], 4)
+
+    def test_content_rejects_bad_range(self):
+        url = reverse("document-version-content", kwargs=self.kwargs)
+        response = self.client.get(url, {"offset": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_suggestions_paginated_and_filtered(self):
+        url = reverse("document-version-suggestions", kwargs=self.kwargs)
+        response = self.client.get(url, {"limit": 2})
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(url, {"type": "style"})
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["message"], "Use active voice")
+        self.assertEqual(response.data["results"][0]["severity"], "info")
+
+    def test_suggestions_offset_window(self):
+        url = reverse("document-version-suggestions", kwargs=self.kwargs)
+        response = self.client.get(url, {"offset_gte": 1, "offset_lt": 3})
+        self.assertEqual(
+            [s["message"] for s in response.data["results"]], ["issue 1", "issue 2"]
+        )
+
+    def test_rewriting_suggestions_replaces_rows(self):
+        count = write_suggestions(self.version, {"grammar": {"suggestions": []}})
+        self.assertEqual(count, 0)
+        self.assertFalse(self.version.suggestion_items.exists())
+
+
+class DocumentSegmentsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+        document = Document.objects.create(
+            user=self.user, title="doc", original_file="uploads/doc.txt"
+        )
+        self.text = "".join(f"Paragraph {i} text.\n" for i in range(120))
+        self.version = DocumentVersion.objects.create(
+            document=document, version_type="original", content=self.text
+        )
+        write_segments(self.version)
+        self.kwargs = {"id": document.id, "version_id": self.version.id}
+
+    def test_split_segments_is_lossless(self):
+        text = "short\n" + "word " * 30 + "\n\nend"
+        segments = list(split_segments(text, max_length=40))
+        self.assertEqual("".join(segment for _, segment in segments), text)
+        self.assertTrue(all(len(segment) <= 40 for _, segment in segments))
+        for start, segment in segments:
+            self.assertEqual(text[start : start + len(segment)], segment)
+
+    def test_read_range_matches_content(self):
+        for offset, length in [(0, 5), (17, 40), (500, 1000), (len(self.text) - 3, 10)]:
+            chunk, total = read_range(self.version.id, offset, length)
+            self.assertEqual(chunk, self.text[offset : offset + length])
+            self.assertEqual(total, len(self.text))
+
+    def test_segment_text_stored_compressed(self):
+        paragraph = "The quick brown fox jumps over the lazy dog. " * 40 + "\n"
+        self.version.content = paragraph * 3
+        self.version.save()
+        write_segments(self.version)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT LENGTH(text) FROM core_documentsegment WHERE version_id = %s",
+                [self.version.pk.hex],
+            )
+            sizes = [size for (size,) in cursor.fetchall()]
+        self.assertEqual(len(sizes), 3)
+        self.assertTrue(all(size < len(paragraph) // 10 for size in sizes))
+
+        chunk, total = read_range(self.version.id, len(paragraph) - 5, 10)
+        self.assertEqual(
+            chunk, (paragraph * 2)[len(paragraph) - 5 : len(paragraph) + 5]
+        )
+        self.assertEqual(total, len(paragraph) * 3)
+
+    def test_segment_range_endpoint(self):
+        url = reverse("document-version-segments", kwargs=self.kwargs)
+        response = self.client.get(url, {"start": 100})
+        self.assertEqual(len(response.data["segments"]), 20)
+        self.assertEqual(response.data["segments"][0]["text"], "Paragraph 100 text.\n")
+        self.assertIsNone(response.data["next_start"])
+
+        response = self.client.get(url, {"start": 0, "end": 10})
+        self.assertEqual(response.data["next_start"], 10)
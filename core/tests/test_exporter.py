@@ -0,0 +1,173 @@
+import re
+import shutil
+import tempfile
+import zipfile
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from docx import Document
+
+from ..comments import CommentAnchors
+from ..exporter import DocumentExporter
+from ..models import Document as DocumentModel
+from ..models import DocumentVersion, Suggestion
+from ..template_registry import get_template_path
+
+User = get_user_model()
+
+
+class DocumentExporterTest(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def test_styled_export_writes_one_paragraph_per_line(self):
+        text = "\n".join(f"Line {i} <&>" for i in range(2000)) + "\n\n  \nlast"
+        result = DocumentExporter(version="v1", text_content=text).generate()
+
+        doc = Document(result.filepath)
+        paragraphs = [p.text for p in doc.paragraphs]
+        self.assertEqual(paragraphs[0], "Improved Document")
+        self.assertEqual(paragraphs[1], "Line 0 <&>")
+        self.assertEqual(paragraphs[-1], "last")
+        self.assertEqual(len(paragraphs), 2002)
+        self.assertEqual(doc.paragraphs[1].alignment, 3)  # JUSTIFY
+
+        section = doc.sections[0]
+        self.assertEqual(section.header.paragraphs[0].text, "ADA AI Document Improver")
+        self.assertIn("Confidential", section.footer.paragraphs[0].text)
+
+    def test_invalid_xml_characters_are_dropped(self):
+        result = DocumentExporter(version="v1", text_content="a\x01b\x0bc").generate()
+        self.assertEqual(Document(result.filepath).paragraphs[1].text, "abc")
+
+    def test_template_export_renders_version_content(self):
+        version = SimpleNamespace(content="First\nSecond")
+        result = DocumentExporter(
+            version=version, template_path=get_template_path("default")
+        ).generate()
+
+        paragraphs = [p.text for p in Document(result.filepath).paragraphs]
+        self.assertEqual(paragraphs[-2:], ["First", "Second"])
+        self.assertIn("Author: Document Export System", paragraphs)
+
+
+class SuggestionCommentsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+        user = User.objects.create_user(username="testuser", password="password")
+        document = DocumentModel.objects.create(
+            user=user, title="doc", original_file="uploads/doc.txt"
+        )
+        self.version = DocumentVersion.objects.create(
+            document=document,
+            version_type="improved",
+            content="Their is a problem.\n\n  We has two.\n",
+        )
+
+    def _export(self, include_comments=True):
+        result = DocumentExporter(
+            version=self.version,
+            template_path=get_template_path("default"),
+            include_comments=include_comments,
+        ).generate()
+        with zipfile.ZipFile(result.filepath) as archive:
+            parts = {
+                name: archive.read(name).decode("utf-8") for name in archive.namelist()
+            }
+        return result, parts
+
+    def test_suggestions_become_anchored_comments(self):
+        Suggestion.objects.bulk_create(
+            [
+                Suggestion(
+                    version=self.version,
+                    suggestion_type="grammar",
+                    offset=26,
+                    length=3,
+                    message="Use 'have'",
+                    replacements=["have"],
+                ),
+                Suggestion(
+                    version=self.version,
+                    suggestion_type="grammar",
+                    offset=0,
+                    length=5,
+                    message="Did you mean 'There'?",
+                    replacements=["There"],
+                ),
+                Suggestion(
+                    version=self.version,
+                    suggestion_type="style",
+                    message="Consider active voice",
+                ),
+            ]
+        )
+
+        result, parts = self._export()
+
+        comments = parts["word/comments.xml"]
+        self.assertIn("Use 'have' Suggested: have", comments)
+        self.assertEqual(comments.count("<w:comment "), 3)
+        self.assertIn("comments.xml", parts["word/_rels/document.xml.rels"])
+        self.assertIn("/word/comments.xml", parts["[Content_Types].xml"])
+
+        document_xml = parts["word/document.xml"]
+        anchored = [
+            re.sub(
+                r"<[^>]+>",
+                "",
+                re.search(
+                    f'<w:commentRangeStart w:id="{i}"/>(.*?)<w:commentRangeEnd w:id="{i}"/>',
+                    document_xml,
+                ).group(1),
+            )
+            for i in range(3)
+        ]
+        # Suggestions without an offset come first, at the start of the body
+        self.assertEqual(anchored, ["", "Their", "has"])
+
+        paragraphs = [p.text for p in Document(result.filepath).paragraphs]
+        self.assertEqual(paragraphs[-2:], ["Their is a problem.", "We has two."])
+
+    def test_comments_fall_back_to_the_suggestions_payload(self):
+        self.version.suggestions = {
+            "grammar": {
+                "suggestions": [{"message": "Agreement", "offset": 26, "length": 3}]
+            }
+        }
+        _, parts = self._export()
+        self.assertIn("Agreement", parts["word/comments.xml"])
+
+    def test_comments_are_only_added_when_requested(self):
+        Suggestion.objects.create(
+            version=self.version, suggestion_type="grammar", offset=0, length=5
+        )
+        _, parts = self._export(include_comments=False)
+        self.assertNotIn("word/comments.xml", parts)
+        self.assertNotIn("commentRangeStart", parts["word/document.xml"])
+
+    def test_thousands_of_comments(self):
+        lines = [f"Sentence number {i} has a typo." for i in range(5000)]
+        text = "\n".join(lines)
+        suggestions = []
+        offset = 0
+        for i, line in enumerate(lines):
+            suggestions.append(
+                {
+                    "type": "grammar",
+                    "message": str(i),
+                    "offset": offset + 16,
+                    "length": len(str(i)),
+                }
+            )
+            offset += len(line) + 1
+
+        anchors = CommentAnchors(text, reversed(suggestions))
+        self.assertEqual(len(anchors.comments), 5000)
+        self.assertEqual(anchors.for_paragraph(4321), [(16, 20, 4321)])
@@ -0,0 +1,233 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Document, DocumentExport, DocumentVersion
+from ..tasks import export_document_task, requeue_stalled_exports_task
+from ..template_registry import get_template_path
+
+User = get_user_model()
+
+
+class DocumentExportViewTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+        self.document = Document.objects.create(
+            user=self.user,
+            title="doc",
+            original_file="uploads/doc.txt",
+            status="completed",
+        )
+        self.version = DocumentVersion.objects.create(
+            document=self.document,
+            version_type="improved",
+            content="First paragraph.\nSecond paragraph.",
+        )
+        self.url = reverse("document-export", args=[self.document.id])
+        self.delay = self.enterContext(patch("core.views.export_document_task.delay"))
+
+    def _export(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data, format="json")
+
+    def test_export_is_queued_once(self):
+        response = self._export()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn("status_url", response.data)
+
+        again = self._export()
+        self.assertEqual(again.data["id"], response.data["id"])
+        self.delay.assert_called_once_with(str(response.data["id"]))
+
+    def test_completed_export_is_returned_immediately(self):
+        export_id = self._export().data["id"]
+        export_document_task(str(export_id))
+
+        response = self._export()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "completed")
+        self.assertEqual(
+            response.data["download_url"],
+            reverse(
+                "document-export-download",
+                kwargs={"id": self.document.id, "export_id": export_id},
+            ),
+        )
+        self.assertEqual(self.delay.call_count, 1)
+
+    def test_changed_content_gets_new_export(self):
+        first = self._export().data["id"]
+        self.version.content = "Edited."
+        self.version.save()
+
+        second = self._export().data["id"]
+        self.assertNotEqual(first, second)
+
+    def test_options_are_part_of_the_key(self):
+        first = self._export().data["id"]
+        second = self._export(include_comments=True).data["id"]
+        self.assertNotEqual(first, second)
+        self.assertEqual(DocumentExport.objects.count(), 2)
+
+    def test_stalled_export_is_rendered_again(self):
+        export_id = self._export().data["id"]
+        DocumentExport.objects.filter(pk=export_id).update(
+            status="processing", started_at=timezone.now() - timedelta(minutes=30)
+        )
+
+        response = self._export()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["id"], export_id)
+        self.assertEqual(self.delay.call_count, 2)
+        export_document_task(str(export_id))
+        self.assertEqual(DocumentExport.objects.get(pk=export_id).status, "completed")
+
+    def test_export_in_progress_is_not_rendered_again(self):
+        export_id = self._export().data["id"]
+        DocumentExport.objects.filter(pk=export_id).update(
+            status="processing", started_at=timezone.now()
+        )
+
+        self.assertEqual(self._export().status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.delay.call_count, 1)
+
+    def test_lost_pending_export_is_queued_again(self):
+        export_id = self._export().data["id"]
+        self.assertEqual(self.delay.call_count, 1)
+
+        self.assertEqual(self._export().status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.delay.call_count, 1)
+
+        DocumentExport.objects.filter(pk=export_id).update(
+            queued_at=timezone.now() - timedelta(minutes=30)
+        )
+        self._export()
+        self.assertEqual(self.delay.call_count, 2)
+        export = DocumentExport.objects.get(pk=export_id)
+        self.assertEqual(export.status, "pending")
+        self.assertFalse(export.is_stalled())
+
+    def test_beat_requeues_stalled_exports(self):
+        stalled = timezone.now() - timedelta(minutes=30)
+        lost = self._export().data["id"]
+        died = self._export(include_comments=True).data["id"]
+        running = self._export(format="pdf").data["id"]
+        DocumentExport.objects.filter(pk=lost).update(queued_at=stalled)
+        DocumentExport.objects.filter(pk=died).update(
+            status="processing", started_at=stalled
+        )
+        DocumentExport.objects.filter(pk=running).update(
+            status="processing", started_at=timezone.now()
+        )
+
+        with patch("core.tasks.export_document_task.delay") as delay:
+            self.assertEqual(requeue_stalled_exports_task(), 2)
+
+        self.assertEqual(
+            sorted(call.args[0] for call in delay.call_args_list),
+            sorted([str(lost), str(died)]),
+        )
+        self.assertEqual(DocumentExport.objects.get(pk=died).status, "pending")
+        self.assertEqual(DocumentExport.objects.get(pk=running).status, "processing")
+
+    def test_edited_template_gets_new_export(self):
+        first = self._export().data["id"]
+
+        path = get_template_path("default")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.addCleanup(os.utime, path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        second = self._export().data["id"]
+        self.assertNotEqual(first, second)
+
+    def test_pdf_key_ignores_template_and_comments(self):
+        keys = {
+            DocumentExport.build_cache_key(self.version, template, "pdf", comments)
+            for template in ("default", "letter")
+            for comments in (False, True)
+        }
+        self.assertEqual(len(keys), 1)
+
+    def test_export_status(self):
+        export_id = self._export().data["id"]
+        url = reverse(
+            "document-export-status",
+            kwargs={"id": self.document.id, "export_id": export_id},
+        )
+        self.assertEqual(self.client.get(url).data["status"], "pending")
+
+        export_document_task(str(export_id))
+        response = self.client.get(url)
+        self.assertEqual(response.data["status"], "completed")
+        self.assertIsNotNone(response.data["expires_at"])
+
+    def _download_url(self):
+        export_id = self._export().data["id"]
+        export_document_task(str(export_id))
+        return reverse(
+            "document-export-download",
+            kwargs={"id": self.document.id, "export_id": export_id},
+        )
+
+    def test_download_streams_the_artifact(self):
+        response = self.client.get(self._download_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("attachment", response["Content-Disposition"])
+        body = b"".join(response.streaming_content)
+        self.assertTrue(body.startswith(b"PK"))
+
+    @override_settings(EXPORT_SENDFILE_BACKEND="nginx")
+    def test_download_through_x_accel_redirect(self):
+        response = self.client.get(self._download_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            response["X-Accel-Redirect"].startswith("/protected/media/exports/")
+        )
+        self.assertEqual(response.content, b"")
+
+    @override_settings(EXPORT_SENDFILE_BACKEND="apache")
+    def test_download_through_x_sendfile(self):
+        response = self.client.get(self._download_url())
+        export = DocumentExport.objects.get()
+        self.assertEqual(response["X-Sendfile"], export.file.path)
+
+    def test_pending_export_cannot_be_downloaded(self):
+        export_id = self._export().data["id"]
+        url = reverse(
+            "document-export-download",
+            kwargs={"id": self.document.id, "export_id": export_id},
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_delivery_queues_unrendered_export(self):
+        # Rendering never happens in the web request
+        with patch("core.exporter.DocumentExporter.stream") as stream:
+            response = self._export(delivery="stream")
+        stream.assert_not_called()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn("status_url", response.data)
+        self.delay.assert_called_once_with(str(response.data["id"]))
+
+    @override_settings(EXPORT_SENDFILE_BACKEND="nginx")
+    def test_stream_delivery_sends_rendered_artifact(self):
+        self._download_url()
+        response = self._export(delivery="stream")
+        self.assertIn("X-Accel-Redirect", response)
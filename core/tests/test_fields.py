@@ -0,0 +1,154 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import TestCase, override_settings
+
+from .. import compression
+from ..compression import compress, decompress
+from ..fields import Compressed, CompressedFieldMixin
+from ..models import Document, DocumentVersion
+
+User = get_user_model()
+
+TEXT = "The quick brown fox jumps over the lazy dog near the riverbank.\n" * 200
+SUGGESTIONS = {"grammar": {"suggestions": [{"message": "Typo", "offset": 4}] * 50}}
+
+
+class CompressionTest(TestCase):
+    def test_zlib_round_trip(self):
+        data = TEXT.encode()
+        stored = compress(data)
+        self.assertEqual(stored[0], compression.ZLIB)
+        self.assertLess(len(stored), len(data) // 10)
+        self.assertEqual(decompress(stored), data)
+
+    def test_short_values_are_stored_raw(self):
+        stored = compress(b"short")
+        self.assertEqual(stored, bytes([compression.RAW]) + b"short")
+        self.assertEqual(decompress(stored), b"short")
+
+    @skipIf(compression.zstandard is None, "zstandard isn't installed")
+    def test_zstd_round_trip(self):
+        data = TEXT.encode()
+        with override_settings(TEXT_COMPRESSION="zstd"):
+            stored = compress(data)
+        self.assertEqual(stored[0], compression.ZSTD)
+        # Readable whatever the current codec is
+        self.assertEqual(decompress(stored), data)
+
+
+class CompressedFieldMixinTest(TestCase):
+    def test_encode_and_decode_are_required(self):
+        class IncompleteField(CompressedFieldMixin, models.TextField):
+            def encode(self, value) -> bytes:
+                return str(value).encode("utf-8")
+
+        with self.assertRaises(TypeError):
+            IncompleteField()
+
+
+class CompressedFieldTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.document = Document.objects.create(
+            user=self.user, title="test.txt", original_file="uploads/test.txt"
+        )
+        self.version = DocumentVersion.objects.create(
+            document=self.document,
+            version_type="improved",
+            content=TEXT,
+            suggestions=SUGGESTIONS,
+        )
+
+    def _stored_size(self, column):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT LENGTH({column}) FROM core_documentversion WHERE id = %s",
+                [self.version.pk.hex],
+            )
+            return cursor.fetchone()[0]
+
+    def test_round_trip(self):
+        version = DocumentVersion.objects.get(pk=self.version.pk)
+        self.assertEqual(version.content, TEXT)
+        self.assertEqual(version.suggestions, SUGGESTIONS)
+        self.assertEqual(version.content_hash, DocumentVersion.hash_content(TEXT))
+
+    def test_stored_compressed(self):
+        self.assertLess(self._stored_size("content"), len(TEXT) // 10)
+        self.assertLess(self._stored_size("suggestions"), 200)
+
+    def test_decompressed_on_first_access(self):
+        version = DocumentVersion.objects.get(pk=self.version.pk)
+        self.assertIsInstance(version.__dict__["content"], Compressed)
+
+        self.assertEqual(version.content, TEXT)
+        self.assertEqual(version.__dict__["content"], TEXT)
+
+    def test_untouched_values_are_not_recompressed(self):
+        version = DocumentVersion.objects.get(pk=self.version.pk)
+        with patch("core.fields.compress") as compress_mock:
+            version.save(update_fields=["suggestions"])
+        compress_mock.assert_not_called()
+
+        version.refresh_from_db()
+        self.assertEqual(version.suggestions, SUGGESTIONS)
+
+    def test_deferred_field_loads_on_access(self):
+        version = DocumentVersion.objects.defer("content").get(pk=self.version.pk)
+        self.assertEqual(version.content, TEXT)
+
+    def test_update(self):
+        DocumentVersion.objects.filter(pk=self.version.pk).update(content="New text")
+        self.version.refresh_from_db()
+        self.assertEqual(self.version.content, "New text")
+
+
+@skipIf(compression.zstandard is None, "zstandard isn't installed")
+class CompressionDictionaryTest(TestCase):
+    def setUp(self):
+        self.dictionary_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dictionary_dir)
+        self.enterContext(
+            override_settings(TEXT_COMPRESSION_DICTIONARY_DIR=self.dictionary_dir)
+        )
+        compression._load_dictionary.cache_clear()
+        self.addCleanup(compression._load_dictionary.cache_clear)
+
+        user = User.objects.create_user(username="testuser", password="password")
+        for i in range(40):
+            document = Document.objects.create(
+                user=user, title=f"doc-{i}", original_file=f"uploads/{i}.txt"
+            )
+            DocumentVersion.objects.create(
+                document=document,
+                content=f"Document {i}. " + TEXT[i:],
+                suggestions=SUGGESTIONS,
+            )
+
+    def test_trained_dictionary_round_trip(self):
+        call_command("train_compression_dictionary", size=4096, stdout=io.StringIO())
+        (filename,) = os.listdir(self.dictionary_dir)
+        dict_id = int(filename.split(".")[0])
+
+        data = ("A sentence that isn't in the corpus. " + TEXT[:500]).encode()
+        with override_settings(
+            TEXT_COMPRESSION="zstd", TEXT_COMPRESSION_DICTIONARY_ID=dict_id
+        ):
+            stored = compress(data)
+        with override_settings(TEXT_COMPRESSION="zstd"):
+            plain = compress(data)
+
+        self.assertLess(len(stored), len(plain))
+        self.assertEqual(
+            compression.zstandard.get_frame_parameters(stored[1:]).dict_id, dict_id
+        )
+        # Found by the id recorded in the frame, not by the current setting
+        self.assertEqual(decompress(stored), data)
@@ -0,0 +1,113 @@
+import io
+import multiprocessing
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import billiard
+
+from django.test import SimpleTestCase, override_settings
+from PyPDF2 import PdfReader
+
+from .. import pdf
+from ..exporter import DocumentExporter
+from ..pdf import render_pdf, render_pdf_in_pool, text_width, wrap_paragraph
+
+
+@override_settings(PDF_RENDER_WORKERS=0)
+class RenderPdfTest(SimpleTestCase):
+    def test_pages_have_header_footer_and_body(self):
+        text = "\n".join(f"Paragraph {i} (with \\ escapes)" for i in range(200))
+        data, page_count = render_pdf(text + "\n\n   \n")
+
+        reader = PdfReader(io.BytesIO(data))
+        self.assertEqual(len(reader.pages), page_count)
+        self.assertGreater(page_count, 1)
+        for page in reader.pages:
+            page_text = page.extract_text()
+            self.assertIn("ADA AI Document Improver", page_text)
+            self.assertIn("Confidential | Generated by AI Document Improver", page_text)
+
+        first_page = reader.pages[0].extract_text()
+        self.assertIn("Improved Document", first_page)
+        self.assertIn("Paragraph 0 (with \\ escapes)", first_page)
+        self.assertIn("Paragraph 199", reader.pages[-1].extract_text())
+
+    def test_lines_fit_the_body_width(self):
+        text = "word " * 300 + "x" * 500
+        lines = wrap_paragraph(text, 468, 11)
+
+        self.assertEqual(
+            "".join("".join(line) for line in lines), text.replace(" ", "")
+        )
+        for line in lines:
+            self.assertLessEqual(text_width(" ".join(line), 11), 468)
+
+    def test_unencodable_characters_are_replaced(self):
+        data, _ = render_pdf("café 中")
+        page_text = PdfReader(io.BytesIO(data)).pages[0].extract_text()
+        self.assertIn("café ?", page_text)
+
+    def test_inline_render_when_the_pool_is_broken(self):
+        with override_settings(PDF_RENDER_WORKERS=1), patch.object(
+            pdf, "_get_executor", side_effect=OSError("no processes")
+        ):
+            data, page_count = render_pdf_in_pool("text")
+        self.assertTrue(data.startswith(b"%PDF-"))
+        self.assertEqual(page_count, 1)
+
+
+def _render_in_child(results):
+    with patch.object(pdf.logger, "warning") as warning:
+        data, _ = render_pdf_in_pool("text")
+    results.put((data[:5], pdf._executor is None, warning.called))
+
+
+class DaemonProcessTest(SimpleTestCase):
+    """Celery prefork workers are daemonic and can't start the pool"""
+
+    def _run(self, context):
+        results = context.Queue()
+        process = context.Process(target=_render_in_child, args=(results,))
+        process.daemon = True
+        process.start()
+        outcome = results.get(timeout=30)
+        process.join(timeout=30)
+        return outcome
+
+    @override_settings(PDF_RENDER_WORKERS=1)
+    def test_daemonic_process_renders_inline(self):
+        outcome = self._run(multiprocessing.get_context("fork"))
+        self.assertEqual(outcome, (b"%PDF-", True, False))
+
+    @override_settings(PDF_RENDER_WORKERS=1)
+    def test_billiard_worker_renders_inline(self):
+        outcome = self._run(billiard.get_context("fork"))
+        self.assertEqual(outcome, (b"%PDF-", True, False))
+
+
+class PdfExportTest(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    @override_settings(PDF_RENDER_WORKERS=1)
+    def test_pdf_export_is_rendered_in_the_pool(self):
+        self.addCleanup(pdf._reset_executor)
+        result = DocumentExporter(
+            version="v1", text_content="First\nSecond", output_format="pdf"
+        ).generate()
+
+        self.assertTrue(result.filepath.endswith(".pdf"))
+        reader = PdfReader(result.filepath)
+        self.assertIn("Second", reader.pages[0].extract_text())
+
+    @override_settings(PDF_RENDER_WORKERS=0)
+    def test_pdf_export_streams(self):
+        exporter = DocumentExporter(
+            version="v1", text_content="Body", output_format="pdf"
+        )
+        data = b"".join(exporter.stream())
+        self.assertTrue(data.startswith(b"%PDF-1.4"))
+        self.assertTrue(data.rstrip().endswith(b"%%EOF"))
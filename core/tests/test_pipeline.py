@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..blobs import (
+    BLOBS_DIR,
+    delete_blobs,
+    delete_stale_blobs,
+    get_json,
+    get_text,
+    put_json,
+    put_text,
+)
+from ..jobs import get_job_state
+from ..models import Document, DocumentVersion
+from ..tasks import (
+    paraphrase_document_task,
+    read_document_content_task,
+    save_document_version_task,
+)
+
+User = get_user_model()
+
+IMPROVEMENTS = {
+    "grammar": {
+        "suggestions": [{"message": "Typo", "offset": 0, "length": 3}],
+    },
+}
+
+
+class BlobTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def _blob_files(self):
+        return [
+            os.path.join(directory, filename)
+            for directory, _, filenames in os.walk(
+                os.path.join(self.media_root, BLOBS_DIR)
+            )
+            for filename in filenames
+        ]
+
+    def test_round_trip(self):
+        text = "A line of text.\n" * 10000
+        text_key = put_text(text)
+        json_key = put_json(IMPROVEMENTS)
+
+        self.assertEqual(get_text(text_key), text)
+        self.assertEqual(get_json(json_key), IMPROVEMENTS)
+        # Stored compressed
+        sizes = [os.path.getsize(path) for path in self._blob_files()]
+        self.assertLess(max(sizes), len(text) // 10)
+
+    def test_delete(self):
+        key = put_text("text")
+        delete_blobs(key, None, "0" * 32)
+
+        self.assertEqual(self._blob_files(), [])
+        with self.assertRaises(FileNotFoundError):
+            get_text(key)
+
+    def test_delete_stale_blobs(self):
+        old_key = put_text("old")
+        new_key = put_text("new")
+        (old_path,) = [path for path in self._blob_files() if old_key in path]
+        os.utime(old_path, (0, 0))
+
+        self.assertEqual(delete_stale_blobs(), 1)
+        self.assertEqual(get_text(new_key), "new")
+        with self.assertRaises(FileNotFoundError):
+            get_text(old_key)
+
+
+class PipelinePayloadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.document = Document.objects.create(
+            user=self.user,
+            title="test.txt",
+            original_file="uploads/test.txt",
+            status="processing",
+        )
+
+    def test_stages_pass_blob_keys(self):
+        path = os.path.join(self.media_root, "notes.txt")
+        with open(path, "w") as f:
+            f.write("A line of text.\n" * 5000)
+
+        data = read_document_content_task(path, document_id=str(self.document.id))
+        data = paraphrase_document_task(data)
+
+        self.assertNotIn("content", data)
+        self.assertLess(len(json.dumps(data)), 500)
+        self.assertIn("A line of text.", get_text(data["content_key"]))
+
+    def test_save_reads_and_deletes_blobs(self):
+        data = {
+            "document_id": str(self.document.id),
+            # The chain passes the absolute file path, which isn't what's stored
+            "file_path": "/srv/media/uploads/test.txt",
+            "content_key": put_text("Original."),
+            "paraphrased_key": put_text("Improved."),
+            "improvements_key": put_json(IMPROVEMENTS),
+        }
+
+        result = save_document_version_task(data)
+
+        version = DocumentVersion.objects.get(document=self.document)
+        self.assertEqual(result["document_version_id"], str(version.id))
+        self.assertEqual(version.content, "Improved.")
+        self.assertEqual(version.suggestions, IMPROVEMENTS)
+        self.assertEqual(get_job_state(self.document.id)["job"]["stage"], "completed")
+        for key in ("content_key", "paraphrased_key", "improvements_key"):
+            with self.assertRaises(FileNotFoundError):
+                get_text(data[key])
+
+    def test_save_falls_back_to_original_text(self):
+        # Paraphrasing failed, so the original text was analyzed and is stored
+        save_document_version_task(
+            {
+                "document_id": str(self.document.id),
+                "content_key": put_text("Original."),
+                "improvements_key": put_json(IMPROVEMENTS),
+            }
+        )
+
+        version = DocumentVersion.objects.get(document=self.document)
+        self.assertEqual(version.content, "Original.")
+        self.assertEqual(version.suggestion_items.get().offset, 0)
+
+    def test_save_records_failure(self):
+        result = save_document_version_task(
+            {"document_id": str(self.document.id), "paraphrased_key": "0" * 32}
+        )
+
+        self.assertNotIn("document_version_id", result)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, "failed")
+        self.assertEqual(get_job_state(self.document.id)["job"]["stage"], "failed")
+
+    def test_read_failure_marks_document_failed(self):
+        result = read_document_content_task.apply(
+            args=(os.path.join(self.media_root, "missing.txt"),),
+            kwargs={"document_id": str(self.document.id)},
+        )
+
+        self.assertTrue(result.failed())
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, "failed")
+        self.assertEqual(get_job_state(self.document.id)["job"]["stage"], "failed")
+
+
+class UploadFailureTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        cache.clear()
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+    def test_failed_sync_processing_marks_document_failed(self):
+        service = self.enterContext(patch("core.views.DocumentProcessingService"))
+        service.return_value.process_document.return_value = {
+            "status": "error",
+            "message": "Could not read the file",
+        }
+        upload = SimpleUploadedFile(
+            "notes.txt", b"Original text.", content_type="text/plain"
+        )
+
+        response = self.client.post(
+            reverse("document-upload"), {"original_file": upload, "title": "t"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        document = Document.objects.get()
+        self.assertEqual(document.status, "failed")
+        self.assertEqual(get_job_state(document.id)["job"]["stage"], "failed")
@@ -0,0 +1,237 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Document, DocumentVersion
+from ..segments import write_segments
+from ..suggestions import write_suggestions
+from ..tasks import export_document_task
+
+User = get_user_model()
+
+IMPROVEMENTS = {
+    "grammar": {
+        "suggestions": [
+            {"message": f"Issue {i}", "offset": i * 10, "length": 4} for i in range(5)
+        ]
+    },
+    "style_suggestions": [{"type": "Passive Voice", "suggestion": "Use active voice"}],
+}
+
+
+class QueryCountTest(APITestCase):
+    """
+    Query counts of every view in core.views
+
+    Counts must not depend on how many documents, versions, segments or
+    suggestions exist, so each list view is checked at two table sizes.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.enterContext(patch("core.views.export_document_task.delay"))
+        self.enterContext(patch("core.views.start_batch_export_task.delay"))
+        cache.clear()
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.document = self._document(0)
+
+    def _document(self, i):
+        document = Document.objects.create(
+            user=self.user,
+            title=f"doc-{i}",
+            original_file=f"uploads/{i}.txt",
+            status="completed",
+        )
+        for version_type in ("original", "improved"):
+            version = DocumentVersion.objects.create(
+                document=document,
+                version_type=version_type,
+                content="A line of text.\n" * 20,
+                suggestions=IMPROVEMENTS,
+            )
+            write_segments(version)
+            write_suggestions(version, IMPROVEMENTS)
+        return document
+
+    def _grow(self, count=4):
+        start = Document.objects.count()
+        for i in range(start, start + count):
+            self._document(i)
+
+    def _version(self, version_type="improved"):
+        return self.document.versions.get(version_type=version_type)
+
+    def _assert_constant(self, num, method, url, data=None):
+        """Same number of queries before and after adding more rows"""
+        with self.assertNumQueries(num):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 400, response.data)
+        self._grow()
+        with self.assertNumQueries(num):
+            getattr(self.client, method)(url, data, format="json")
+        return response
+
+    def _upload(self, lines, suggestions):
+        service = self.enterContext(patch("core.views.DocumentProcessingService"))
+        service.return_value.process_document.return_value = {
+            "status": "success",
+            "paraphrased_text": "Improved text.\n" * lines,
+            "improvements": {
+                "grammar": {
+                    "suggestions": [
+                        {"message": f"Issue {i}", "offset": i * 10, "length": 4}
+                        for i in range(suggestions)
+                    ]
+                },
+            },
+        }
+        upload = SimpleUploadedFile(
+            "notes.txt", b"Original text.\n" * lines, content_type="text/plain"
+        )
+        response = self.client.post(
+            reverse("document-upload"), {"original_file": upload, "title": "t"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+    def test_upload(self):
+        # Segments and suggestions are written in bulk, so the count doesn't
+        # grow with the document. (SQLite splits bulk inserts into batches of
+        # ~100-250 rows, so both sizes stay within one batch.)
+        with self.assertNumQueries(29):
+            self._upload(lines=2, suggestions=1)
+        with self.assertNumQueries(29):
+            self._upload(lines=200, suggestions=100)
+
+    def test_document_list(self):
+        self._assert_constant(1, "get", reverse("document-list"))
+
+    def test_document_list_with_versions(self):
+        self._assert_constant(2, "get", reverse("document-list") + "?expand=versions")
+
+    def test_document_retrieve(self):
+        self._assert_constant(
+            2, "get", reverse("document-retrieve", args=[self.document.id])
+        )
+
+    def test_document_status(self):
+        url = reverse("document-status", args=[self.document.id])
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_version_retrieve(self):
+        url = reverse(
+            "document-version-retrieve",
+            kwargs={"id": self.document.id, "version_id": self._version().id},
+        )
+        self._assert_constant(1, "get", url)
+
+    def test_version_content(self):
+        url = reverse(
+            "document-version-content",
+            kwargs={"id": self.document.id, "version_id": self._version().id},
+        )
+        self._assert_constant(4, "get", url + "?offset=20&length=40")
+
+    def test_version_segments(self):
+        url = reverse(
+            "document-version-segments",
+            kwargs={"id": self.document.id, "version_id": self._version().id},
+        )
+        self._assert_constant(3, "get", url + "?start=5&end=10")
+
+    def test_version_suggestions(self):
+        url = reverse(
+            "document-version-suggestions",
+            kwargs={"id": self.document.id, "version_id": self._version().id},
+        )
+        self._assert_constant(3, "get", url + "?type=grammar")
+
+    def test_improve(self):
+        self.enterContext(patch("core.views.process_document_task.delay"))
+        url = reverse("document-improve", args=[self.document.id])
+        self._assert_constant(1, "post", url, {"document_id": str(self.document.id)})
+
+    def test_export(self):
+        url = reverse("document-export", args=[self.document.id])
+        with self.assertNumQueries(6):
+            response = self.client.post(url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        # Requests for the same export reuse it
+        self._assert_constant(3, "post", url, {})
+
+    def test_export_status_and_download(self):
+        export_id = self.client.post(
+            reverse("document-export", args=[self.document.id]), {}, format="json"
+        ).data["id"]
+        export_document_task(str(export_id))
+        kwargs = {"id": self.document.id, "export_id": export_id}
+
+        self._assert_constant(
+            1, "get", reverse("document-export-status", kwargs=kwargs)
+        )
+        # The lookup and the artifact access time
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("document-export-download", kwargs=kwargs)
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_batch_export(self):
+        self._grow()
+        document_ids = [str(i) for i in Document.objects.values_list("id", flat=True)]
+        response = self._assert_constant(
+            9, "post", reverse("batch-export"), {"document_ids": document_ids}
+        )
+        self._assert_constant(1, "get", response.data["status_url"])
+
+    def test_export_storage_metrics(self):
+        self.user.is_staff = True
+        self.user.save()
+        self._assert_constant(1, "get", reverse("export-storage-metrics"))
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans checked on SQLite")
+class IndexUsageTest(APITestCase):
+    """The hot lookups are answered from indexes, not table scans"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+
+    def _plan(self, queryset):
+        return queryset.explain()
+
+    def test_document_list_uses_user_uploaded_index(self):
+        plan = self._plan(
+            Document.objects.filter(user=self.user).order_by("-uploaded_at")
+        )
+        self.assertIn("document_user_uploaded_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_status_filter_uses_user_status_index(self):
+        plan = self._plan(
+            Document.objects.filter(user=self.user, status="completed").order_by()
+        )
+        self.assertIn("document_user_status_idx", plan)
+
+    def test_version_lookup_uses_unique_index(self):
+        plan = self._plan(
+            DocumentVersion.objects.filter(document_id=1, version_type="improved")
+        )
+        self.assertIn("USING INDEX", plan)
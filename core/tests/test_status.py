@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..jobs import get_job_state, update_job_state
+from ..models import Document, DocumentJob, DocumentVersion
+
+User = get_user_model()
+
+
+class DocumentStatusViewTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client.force_authenticate(user=self.user)
+
+        self.document = Document.objects.create(
+            user=self.user, title="test.txt", original_file="uploads/test.txt"
+        )
+        DocumentVersion.objects.create(
+            document=self.document, version_type="original", content="Sample text"
+        )
+        self.url = reverse("document-status", args=[self.document.id])
+
+    def test_status_reports_job_state(self):
+        update_job_state(self.document.id, "analyzing")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["job"]["stage"], "analyzing")
+        self.assertEqual(response.data["job"]["percent"], 60)
+        self.assertEqual(response.data["versions"][0]["type"], "original")
+        self.assertIn("ETag", response)
+
+    def test_status_without_job(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["job"])
+        self.assertEqual(response.data["status"], "pending")
+
+    def test_cached_poll_skips_database(self):
+        update_job_state(self.document.id, "reading")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["job"]["stage"], "reading")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        update_job_state(self.document.id, "completed")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cache_miss_falls_back_to_database(self):
+        update_job_state(self.document.id, "failed", error="boom")
+        cache.clear()
+
+        state = get_job_state(self.document.id)
+        self.assertEqual(state["job"]["error"], "boom")
+        self.assertIsNotNone(state["job"]["finished_at"])
+
+    def test_requeue_resets_job(self):
+        update_job_state(self.document.id, "failed", error="boom")
+        update_job_state(self.document.id, "queued")
+
+        job = DocumentJob.objects.get(document=self.document)
+        self.assertEqual(job.error, "")
+        self.assertIsNone(job.finished_at)
+
+    def test_other_users_document_not_found(self):
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
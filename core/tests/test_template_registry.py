@@ -0,0 +1,79 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from docx import Document
+
+from ..template_registry import TemplateRegistry
+
+
+class TemplateRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.templates_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.templates_dir)
+        self.registry = TemplateRegistry(self.templates_dir)
+        self.path = self._write_template("report", ["{{title}}", "By {{author}}"])
+
+    def _write_template(self, name, lines, split_runs=False):
+        document = Document()
+        for line in lines:
+            paragraph = document.add_paragraph()
+            if split_runs:
+                middle = len(line) // 2
+                paragraph.add_run(line[:middle])
+                paragraph.add_run(line[middle:]).bold = True
+            else:
+                paragraph.add_run(line)
+        path = os.path.join(self.templates_dir, f"{name}.docx")
+        document.save(path)
+        return path
+
+    def test_names(self):
+        self.assertEqual(self.registry.names(), ["report"])
+
+    def test_render_replaces_placeholders_without_touching_template(self):
+        rendered = self.registry.render(self.path, {"title": "T", "author": "A"})
+        self.assertEqual([p.text for p in rendered.paragraphs], ["T", "By A"])
+
+        again = self.registry.render(self.path, {"title": "X"})
+        self.assertEqual([p.text for p in again.paragraphs], ["X", "By {{author}}"])
+
+    def test_rendered_document_saves_substitutions(self):
+        rendered = self.registry.render(self.path, {"title": "T", "author": "A"})
+        output = io.BytesIO()
+        rendered.save(output)
+
+        saved = Document(output)
+        self.assertEqual([p.text for p in saved.paragraphs], ["T", "By A"])
+
+    def test_run_formatting_is_kept(self):
+        compiled = self.registry.get(self.path)
+        self.assertEqual(compiled.placeholders, [(0, 0), (1, 0)])
+
+    def test_placeholders_split_across_runs(self):
+        path = self._write_template("split", ["{{title}}"], split_runs=True)
+        rendered = self.registry.render(path, {"title": "Split"})
+        self.assertEqual(rendered.paragraphs[0].text, "Split")
+
+    def test_template_is_compiled_once_and_reloaded_on_change(self):
+        compiled = self.registry.get(self.path)
+        self.assertIs(self.registry.get(self.path), compiled)
+
+        stat = os.stat(self.path)
+        self._write_template("report", ["{{body}}"])
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        rendered = self.registry.render(self.path, {"body": "B"})
+        self.assertEqual(rendered.paragraphs[0].text, "B")
+
+    def test_render_does_not_parse_the_package_again(self):
+        self.registry.get(self.path)
+
+        with patch("core.template_registry.Document") as parse:
+            rendered = self.registry.render(self.path, {"title": "T"})
+
+        parse.assert_not_called()
+        self.assertEqual(rendered.paragraphs[0].text, "T")
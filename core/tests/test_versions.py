@@ -0,0 +1,78 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Document, DocumentSegment, DocumentVersion, Suggestion
+from ..versions import save_improved_version
+
+User = get_user_model()
+
+IMPROVEMENTS = {
+    "grammar": {
+        "suggestions": [{"message": "Typo", "offset": 0, "length": 3}],
+    },
+}
+
+
+class SaveImprovedVersionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.document = Document.objects.create(
+            user=self.user,
+            title="test.txt",
+            original_file="uploads/test.txt",
+            status="processing",
+        )
+
+    def test_creates_version_and_completes_document(self):
+        version = save_improved_version(
+            self.document.id, "First line.\nSecond line.\n", IMPROVEMENTS
+        )
+
+        stored = DocumentVersion.objects.get(pk=version.pk)
+        self.assertEqual(stored.version_type, "improved")
+        self.assertEqual(stored.content, "First line.\nSecond line.\n")
+        self.assertEqual(
+            stored.content_hash, DocumentVersion.hash_content(stored.content)
+        )
+        self.assertEqual(DocumentSegment.objects.filter(version=stored).count(), 2)
+        self.assertEqual(Suggestion.objects.filter(version=stored).count(), 1)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, "completed")
+
+    def test_reprocessing_replaces_the_improved_version(self):
+        first = save_improved_version(self.document.id, "Old text.\n", IMPROVEMENTS)
+        second = save_improved_version(self.document.id, "New text.\nMore.\n", {})
+
+        self.assertEqual(first.pk, second.pk)
+        stored = DocumentVersion.objects.get(document=self.document)
+        self.assertEqual(stored.content, "New text.\nMore.\n")
+        self.assertEqual(
+            stored.content_hash, DocumentVersion.hash_content(stored.content)
+        )
+        self.assertEqual(stored.suggestions, {})
+        self.assertEqual(
+            [
+                segment.text
+                for segment in DocumentSegment.objects.filter(version=stored)
+            ],
+            ["New text.\n", "More.\n"],
+        )
+        self.assertFalse(Suggestion.objects.filter(version=stored).exists())
+
+    def test_missing_document(self):
+        with self.assertRaises(Document.DoesNotExist):
+            save_improved_version(uuid.uuid4(), "Text", {})
+        self.assertFalse(DocumentVersion.objects.exists())
+
+    def test_failed_save_rolls_back(self):
+        with self.assertRaises(Exception):
+            save_improved_version(self.document.id, None, {})
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, "processing")
+        self.assertFalse(DocumentVersion.objects.exists())
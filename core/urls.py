@@ -1,12 +1,22 @@
 from django.urls import path
 
 from .views import (
+    BatchExportDownloadView,
+    BatchExportStatusView,
+    BatchExportView,
+    DocumentExportDownloadView,
+    DocumentExportStatusView,
     DocumentExportView,
     DocumentImproveView,
     DocumentRetrieveView,
+    DocumentStatsView,
     DocumentStatusView,
     DocumentUploadView,
+    DocumentVersionContentView,
     DocumentVersionRetrieveView,
+    DocumentVersionSegmentsView,
+    DocumentVersionSuggestionsView,
+    ExportStorageMetricsView,
     DocumentListView,
 )
 
@@ -27,6 +37,31 @@ urlpatterns = [
         DocumentExportView.as_view(),
         name="document-export",
     ),
+    path(
+        "documents/<uuid:id>/exports/<uuid:export_id>/",
+        DocumentExportStatusView.as_view(),
+        name="document-export-status",
+    ),
+    path(
+        "documents/<uuid:id>/exports/<uuid:export_id>/download/",
+        DocumentExportDownloadView.as_view(),
+        name="document-export-download",
+    ),
+    path(
+        "documents/export/batch/",
+        BatchExportView.as_view(),
+        name="batch-export",
+    ),
+    path(
+        "documents/export/batch/<uuid:batch_id>/",
+        BatchExportStatusView.as_view(),
+        name="batch-export-status",
+    ),
+    path(
+        "documents/export/batch/<uuid:batch_id>/download/",
+        BatchExportDownloadView.as_view(),
+        name="batch-export-download",
+    ),
     path(
         "documents/<uuid:id>/status/",
         DocumentStatusView.as_view(),
@@ -38,5 +73,26 @@ urlpatterns = [
         DocumentVersionRetrieveView.as_view(),
         name="document-version-retrieve",
     ),
+    path(
+        "documents/<uuid:id>/versions/<uuid:version_id>/content/",
+        DocumentVersionContentView.as_view(),
+        name="document-version-content",
+    ),
+    path(
+        "documents/<uuid:id>/versions/<uuid:version_id>/segments/",
+        DocumentVersionSegmentsView.as_view(),
+        name="document-version-segments",
+    ),
+    path(
+        "documents/<uuid:id>/versions/<uuid:version_id>/suggestions/",
+        DocumentVersionSuggestionsView.as_view(),
+        name="document-version-suggestions",
+    ),
     path("documents/", DocumentListView.as_view(), name="document-list"),
+    path("documents/stats/", DocumentStatsView.as_view(), name="document-stats"),
+    path(
+        "exports/metrics/",
+        ExportStorageMetricsView.as_view(),
+        name="export-storage-metrics",
+    ),
 ]
@@ -0,0 +1,71 @@
+from typing import Any, Dict
+
+from django.db import connection, transaction
+
+from .models import Document, DocumentVersion
+from .segments import write_segments
+from .suggestions import write_suggestions
+
+
+@transaction.atomic
+def save_improved_version(
+    document_id, content: str, improvements: Dict[str, Any]
+) -> DocumentVersion:
+    """
+    Store the improved version of a document and mark the document completed
+
+    The version is upserted on (document, version_type) in a single
+    statement, so reprocessing a document replaces its improved version
+    instead of failing on the unique constraint, and concurrent saves need no
+    row locks. The version, its segments and suggestions and the document
+    status are written in one transaction.
+
+    Args:
+        document_id: ID of the document
+        content (str): Improved text
+        improvements (dict): Improvements payload from the processing pipeline
+
+    Returns:
+        The improved DocumentVersion
+
+    Raises:
+        Document.DoesNotExist: If the document was deleted
+    """
+    improvements = improvements or {}
+    if not Document.objects.filter(pk=document_id).update(status="completed"):
+        raise Document.DoesNotExist(f"Document {document_id} does not exist")
+
+    version = DocumentVersion(
+        document_id=document_id,
+        version_type="improved",
+        content=content,
+        content_hash=DocumentVersion.hash_content(content),
+        suggestions=improvements,
+    )
+    # MySQL's ON DUPLICATE KEY UPDATE fires on any unique key and doesn't
+    # take a conflict target; (document, version_type) is the only unique
+    # key besides the generated primary key
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ["document", "version_type"]
+    else:
+        unique_fields = None
+    DocumentVersion.objects.bulk_create(
+        [version],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=["content", "content_hash", "suggestions"],
+    )
+    # On conflict the existing row keeps its id
+    version.pk = DocumentVersion.objects.values_list("pk", flat=True).get(
+        document_id=document_id, version_type="improved"
+    )
+    version._state.adding = False
+
+    write_segments(version)
+    write_suggestions(version, improvements)
+    return version
+
+
+def mark_document_failed(document_id):
+    """Record that processing a document failed"""
+    Document.objects.filter(pk=document_id).update(status="failed")
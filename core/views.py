@@ -1,22 +1,82 @@
 import os
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.core.exceptions import ValidationError
-from rest_framework import permissions
-
-from .exporter import DocumentExporter
-from .models import Document, DocumentVersion
+from rest_framework import permissions, serializers
+
+from .artifacts import artifact_metrics, touch_artifact
+from .batches import create_batch_export, with_progress
+from .downloads import artifact_response
+from .exporter import EXPORT_CONTENT_TYPES
+from .jobs import get_job_state, update_job_state
+from .models import (
+    BatchExport,
+    Document,
+    DocumentExport,
+    DocumentSegment,
+    DocumentVersion,
+    Suggestion,
+)
+from .pagination import DocumentCursorPagination, SuggestionPagination
 from .serializers import (
+    BatchExportSerializer,
+    BatchExportStatusSerializer,
     DocumentExportSerializer,
     DocumentImprovementSerializer,
+    DocumentListSerializer,
     DocumentSerializer,
+    DocumentSegmentSerializer,
     DocumentVersionSerializer,
+    ExportJobSerializer,
+    SuggestionSerializer,
+    parse_field_list,
 )
+from .segments import read_range
 from .services import DocumentProcessingService
-from .tasks import process_document, process_document_task
+from .tasks import (
+    export_document_task,
+    process_document,
+    process_document_task,
+    start_batch_export_task,
+)
+from .versions import mark_document_failed, save_improved_version
+
+# Version columns that can be megabytes and are only loaded when asked for
+LARGE_VERSION_FIELDS = ("content", "suggestions")
+
+# Characters returned per content request by default and at most
+CONTENT_CHUNK_SIZE = 64 * 1024
+MAX_CONTENT_CHUNK_SIZE = 1024 * 1024
+
+# Segments returned per segment request by default and at most
+SEGMENT_PAGE_SIZE = 50
+MAX_SEGMENT_PAGE_SIZE = 500
+
+
+def _deferred_version_fields(request):
+    """Large version fields not requested with ?expand="""
+    expand = parse_field_list(request.query_params.get("expand"))
+    return [name for name in LARGE_VERSION_FIELDS if name not in expand]
+
+
+class DocumentVersionLookupMixin:
+    """
+    Resolve /documents/{id}/versions/{version_id} scoped to the request user
+    """
+
+    def get_version_queryset(self):
+        return DocumentVersion.objects.filter(
+            document_id=self.kwargs["id"], document__user=self.request.user
+        )
 
 
 class DocumentUploadView(generics.CreateAPIView):
@@ -50,18 +110,19 @@ class DocumentUploadView(generics.CreateAPIView):
             service = DocumentProcessingService()
             result = service.process_document(first_version.file.path)
             if result["status"] == "success":
-                DocumentVersion.objects.create(
-                    document=document,
-                    version_type="improved",
-                    content=result["paraphrased_text"],
-                    suggestions=result["improvements"],
+                save_improved_version(
+                    document.id, result["paraphrased_text"], result["improvements"]
                 )
                 document.status = "completed"
-                document.save()
+                update_job_state(document.id, "completed")
+            else:
+                mark_document_failed(document.id)
+                document.status = "failed"
+                update_job_state(document.id, "failed", error=result["message"])
         else:
-            process_document.delay(document.id)
             document.status = "processing"
-            document.save()
+            document.save(update_fields=["status"])
+            process_document(document.id)
 
         return document
 
@@ -70,6 +131,10 @@ class DocumentRetrieveView(generics.RetrieveAPIView):
     """
     GET /documents/{id}
     Retrieve document with all versions
+
+    Version content and suggestions are deferred unless requested with
+    ?expand=content,suggestions; use the version content and suggestions
+    endpoints to page through them instead.
     """
 
     queryset = Document.objects.prefetch_related("versions")
@@ -77,9 +142,17 @@ class DocumentRetrieveView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
 
+    def get_queryset(self):
+        versions = DocumentVersion.objects.defer(
+            *_deferred_version_fields(self.request)
+        )
+        return Document.objects.prefetch_related(
+            Prefetch("versions", queryset=versions)
+        )
+
     def get_object(self):
         obj = get_object_or_404(self.get_queryset(), id=self.kwargs["id"])
-        if obj.user != self.request.user:
+        if obj.user_id != self.request.user.pk:
             self.permission_denied(self.request)
         return obj
 
@@ -119,6 +192,15 @@ class DocumentExportView(APIView):
     """
     POST /documents/{id}/export
     Export a document version with template
+
+    Exports are rendered by a Celery worker and shared by every request for
+    the same version content, template, format and comment setting. An
+    already rendered export is returned immediately (200); otherwise the job
+    is queued and its status can be polled (202).
+
+    With delivery=stream an already rendered artifact is sent from disk
+    instead of a download URL. Exports that aren't rendered yet take the
+    queued path, so web workers never block on rendering.
     """
 
     permission_classes = [IsAuthenticated]
@@ -133,16 +215,112 @@ class DocumentExportView(APIView):
         )
         serializer.is_valid(raise_exception=True)
 
-        # Generate export file
-        exporter = DocumentExporter(**serializer.get_export_config())
-        export_file = exporter.generate()
+        if serializer.validated_data["delivery"] == "stream":
+            response = self._send_rendered(serializer)
+            if response is not None:
+                return response
+
+        export, created = DocumentExport.objects.select_related(
+            "version"
+        ).get_or_create(
+            cache_key=serializer.get_cache_key(),
+            defaults={
+                "version": serializer.validated_data["version"],
+                "template_name": serializer.validated_data["template_name"],
+                "output_format": serializer.validated_data["format"],
+                "include_comments": serializer.validated_data["include_comments"],
+            },
+        )
+        if not created and export.needs_render():
+            DocumentExport.objects.filter(pk=export.pk).update(
+                status="pending",
+                error="",
+                queued_at=timezone.now(),
+                completed_at=None,
+            )
+            export.refresh_from_db()
+            created = True
+
+        if created:
+            transaction.on_commit(lambda: export_document_task.delay(str(export.id)))
+
+        data = ExportJobSerializer(export).data
+        if export.status == "completed":
+            touch_artifact(export.file.name)
+            return Response(data)
+        data["status_url"] = request.build_absolute_uri(
+            reverse(
+                "document-export-status",
+                kwargs={"id": document.id, "export_id": export.id},
+            )
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    def _send_rendered(self, serializer):
+        """Send the rendered artifact of an export, if there is one"""
+        output_format = serializer.validated_data["format"]
+        filename = (
+            f"{serializer.validated_data['template_name']}"
+            f"-{serializer.validated_data['version_type']}.{output_format}"
+        )
+        export = DocumentExport.objects.filter(
+            cache_key=serializer.get_cache_key(), status="completed"
+        ).first()
+        if export is not None and not export.needs_render():
+            touch_artifact(export.file.name)
+            return artifact_response(
+                export.file.path, filename, EXPORT_CONTENT_TYPES[output_format]
+            )
+        return None
+
+
+class DocumentExportStatusView(generics.RetrieveAPIView):
+    """
+    GET /documents/{id}/exports/{export_id}
+    Check the status of an export job
+    """
 
-        return Response(
-            {
-                "download_url": export_file.url,
-                "expires_at": export_file.expiry.isoformat(),
-                "format": serializer.validated_data["format"],
-            }
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+    lookup_url_kwarg = "export_id"
+
+    def get_queryset(self):
+        return DocumentExport.objects.select_related("version").filter(
+            version__document_id=self.kwargs["id"],
+            version__document__user=self.request.user,
+        )
+
+
+class DocumentExportDownloadView(APIView):
+    """
+    GET /documents/{id}/exports/{export_id}/download
+    Download a rendered export
+
+    The file is handed to the web server when EXPORT_SENDFILE_BACKEND is set,
+    so Django workers don't spend time copying export bytes.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        export = get_object_or_404(
+            DocumentExport.objects.select_related("version"),
+            id=self.kwargs["export_id"],
+            version__document_id=self.kwargs["id"],
+            version__document__user=request.user,
+            status="completed",
+        )
+        if export.needs_render():
+            raise Http404("Export has expired")
+        touch_artifact(export.file.name)
+
+        filename = (
+            f"{export.template_name}-{export.version.version_type}"
+            f".{export.output_format}"
+        )
+        return artifact_response(
+            export.file.path, filename, EXPORT_CONTENT_TYPES[export.output_format]
         )
 
 
@@ -150,46 +328,321 @@ class DocumentStatusView(APIView):
     """
     GET /documents/{id}/status
     Check processing status
+
+    Served from the cached job state and supports If-None-Match, so polling
+    clients get a 304 without touching the database.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        document = get_object_or_404(
-            Document.objects.filter(user=request.user), id=self.kwargs["id"]
-        )
+        state = get_job_state(self.kwargs["id"])
+        if state is None or state["user_id"] != request.user.pk:
+            raise Http404
+
+        etag = quote_etag(state["etag"])
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
         return Response(
             {
-                "document_id": str(document.id),
-                "status": document.status,
-                "last_updated": document.updated_at,
-                "versions": [
-                    {"type": v.version_type, "created_at": v.created_at}
-                    for v in document.versions.all()
-                ],
-            }
+                "document_id": state["document_id"],
+                "status": state["status"],
+                "last_updated": state["last_updated"],
+                "job": state["job"],
+                "versions": state["versions"],
+            },
+            headers=headers,
         )
 
 
-class DocumentVersionRetrieveView(generics.RetrieveAPIView):
+class DocumentVersionRetrieveView(DocumentVersionLookupMixin, generics.RetrieveAPIView):
     """
     GET /documents/{id}/versions/{version_id}
     Retrieve a specific document version
+
+    Content and suggestions are deferred unless requested with ?expand=
     """
 
     queryset = DocumentVersion.objects.all()
     serializer_class = DocumentVersionSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
+    lookup_url_kwarg = "version_id"
+
+    def get_queryset(self):
+        return self.get_version_queryset().defer(
+            *_deferred_version_fields(self.request)
+        )
+
+
+class DocumentVersionContentView(DocumentVersionLookupMixin, APIView):
+    """
+    GET /documents/{id}/versions/{version_id}/content
+    Return a slice of a version's text
+
+    Query params:
+    - offset: first character to return (default 0)
+    - length: number of characters to return (default 64K, max 1M)
+
+    The slice is assembled from the stored segments overlapping the range,
+    so the cost doesn't grow with the document size.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        offset = _int_param(request, "offset", 0)
+        length = min(
+            _int_param(request, "length", CONTENT_CHUNK_SIZE), MAX_CONTENT_CHUNK_SIZE
+        )
+        if offset < 0 or length < 1:
+            return Response(
+                {"error": "offset must be >= 0 and length must be >= 1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        version = get_object_or_404(
+            self.get_version_queryset().only("id"), id=self.kwargs["version_id"]
+        )
+        chunk, total_length = read_range(version.id, offset, length)
+        end = offset + len(chunk)
+        return Response(
+            {
+                "version_id": str(version.id),
+                "offset": offset,
+                "length": len(chunk),
+                "total_length": total_length,
+                "next_offset": end if end < total_length else None,
+                "content": chunk,
+            }
+        )
+
+
+class DocumentVersionSegmentsView(DocumentVersionLookupMixin, APIView):
+    """
+    GET /documents/{id}/versions/{version_id}/segments
+    Return a range of a version's segments (paragraphs; long paragraphs are
+    split into several segments)
+
+    Query params:
+    - start: index of the first segment (default 0)
+    - end: index after the last segment (default start + 50, at most 500 more)
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        start = _int_param(request, "start", 0)
+        end = _int_param(request, "end", start + SEGMENT_PAGE_SIZE)
+        if start < 0 or end <= start:
+            return Response(
+                {"error": "start must be >= 0 and end must be greater than start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        end = min(end, start + MAX_SEGMENT_PAGE_SIZE)
+
+        version = get_object_or_404(
+            self.get_version_queryset().only("id"), id=self.kwargs["version_id"]
+        )
+        segments = DocumentSegment.objects.filter(
+            version=version, index__gte=start, index__lt=end
+        )
+        serializer = DocumentSegmentSerializer(segments, many=True)
+        has_more = DocumentSegment.objects.filter(
+            version=version, index__gte=end
+        ).exists()
+        return Response(
+            {
+                "version_id": str(version.id),
+                "start": start,
+                "next_start": end if has_more else None,
+                "segments": serializer.data,
+            }
+        )
+
+
+class DocumentVersionSuggestionsView(DocumentVersionLookupMixin, generics.ListAPIView):
+    """
+    GET /documents/{id}/versions/{version_id}/suggestions
+    Paginated list of a version's suggestions, ordered by offset
+
+    Query params:
+    - type: grammar/style
+    - severity: info/warning/error
+    - offset_gte/offset_lt: only suggestions starting in this character range
+      of the version's content
+    - limit/offset: pagination
+    """
+
+    serializer_class = SuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = SuggestionPagination
+
+    def get_queryset(self):
+        version = get_object_or_404(
+            self.get_version_queryset().only("id"), id=self.kwargs["version_id"]
+        )
+        queryset = Suggestion.objects.filter(version=version)
+
+        params = self.request.query_params
+        if suggestion_type := params.get("type"):
+            queryset = queryset.filter(suggestion_type=suggestion_type)
+        if severity := params.get("severity"):
+            queryset = queryset.filter(severity=severity)
+        if (offset_gte := _int_param(self.request, "offset_gte", None)) is not None:
+            queryset = queryset.filter(offset__gte=offset_gte)
+        if (offset_lt := _int_param(self.request, "offset_lt", None)) is not None:
+            queryset = queryset.filter(offset__lt=offset_lt)
+        return queryset
+
+
+def _int_param(request, name, default):
+    """Read an integer query parameter, raising a 400 on garbage"""
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise serializers.ValidationError({name: "Must be an integer"})
+
 
 class DocumentListView(generics.ListAPIView):
     """
-    API endpoint to retrieve all documents.
+    GET /documents
+    List the user's documents, newest first, with cursor pagination
+
+    Query params:
+    - fields: comma separated fields to include
+    - expand=versions: include version metadata (never content)
     """
+
     queryset = Document.objects.all()
-    serializer_class = DocumentSerializer
+    serializer_class = DocumentListSerializer
+    pagination_class = DocumentCursorPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Document.objects.filter(user=self.request.user)
+        queryset = Document.objects.filter(user=self.request.user).only(
+            "id", "title", "status", "uploaded_at"
+        )
+        if "versions" in parse_field_list(self.request.query_params.get("expand")):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "versions",
+                    queryset=DocumentVersion.objects.only(
+                        "id", "document", "version_type", "created_at"
+                    ),
+                )
+            )
+        return queryset
+
+
+class DocumentStatsView(APIView):
+    """
+    GET /documents/stats
+    Count the user's documents and those with an improved version, so the
+    dashboard doesn't have to page through the whole list
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        counts = Document.objects.filter(user=request.user).aggregate(
+            total_documents=Count("id", distinct=True),
+            improved_documents=Count(
+                "id", filter=Q(versions__version_type="improved"), distinct=True
+            ),
+        )
+        return Response(counts)
+
+
+class BatchExportView(APIView):
+    """
+    POST /documents/export/batch
+    Export many documents into one zip archive
+
+    Documents are rendered in parallel by the Celery workers, reusing exports
+    already rendered for the same content and options. Poll the returned
+    status_url for progress until the archive can be downloaded.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchExportSerializer(
+            data=request.data, context={"user": request.user}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        batch = create_batch_export(
+            request.user,
+            serializer.validated_data["versions"],
+            serializer.validated_data["template_name"],
+            serializer.validated_data["format"],
+            serializer.validated_data["include_comments"],
+        )
+        transaction.on_commit(lambda: start_batch_export_task.delay(str(batch.id)))
+
+        data = BatchExportStatusSerializer(
+            with_progress(BatchExport.objects.filter(pk=batch.pk)).get()
+        ).data
+        data["status_url"] = request.build_absolute_uri(
+            reverse("batch-export-status", kwargs={"batch_id": batch.id})
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class BatchExportStatusView(generics.RetrieveAPIView):
+    """
+    GET /documents/export/batch/{batch_id}
+    Check the progress of a batch export
+    """
+
+    serializer_class = BatchExportStatusSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+    lookup_url_kwarg = "batch_id"
+
+    def get_queryset(self):
+        return with_progress(BatchExport.objects.filter(user=self.request.user))
+
+
+class BatchExportDownloadView(APIView):
+    """
+    GET /documents/export/batch/{batch_id}/download
+    Download the archive of a batch export
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        batch = get_object_or_404(
+            BatchExport,
+            id=self.kwargs["batch_id"],
+            user=request.user,
+            status="completed",
+        )
+        if not batch.file or not batch.file.storage.exists(batch.file.name):
+            raise Http404("Export has expired")
+        touch_artifact(batch.file.name)
+
+        return artifact_response(
+            batch.file.path,
+            f"documents-{batch.version_type}.zip",
+            "application/zip",
+        )
+
+
+class ExportStorageMetricsView(APIView):
+    """
+    GET /exports/metrics
+    Bytes of rendered exports stored on disk and evicted by the janitor
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(artifact_metrics())
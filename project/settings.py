@@ -7,6 +7,8 @@ from pathlib import Path
 
 from django.utils import timezone
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -85,14 +87,45 @@ WSGI_APPLICATION = "project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Configured from DATABASE_URL, e.g. postgres://user:password@db:5432/ada.
+# Without it a local SQLite file is used, which serializes writes and is only
+# meant for development; sqlite:///db.sqlite3?journal_mode=wal uses WAL mode.
+# DATABASE_POOL=1 uses psycopg's connection pool (PostgreSQL), otherwise
+# connections persist for DATABASE_CONN_MAX_AGE seconds.
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": database_config(
+        os.getenv("DATABASE_URL", "sqlite:///db.sqlite3"),
+        BASE_DIR,
+        conn_max_age=int(os.getenv("DATABASE_CONN_MAX_AGE", "60")),
+        pool=os.getenv("DATABASE_POOL", "0") == "1",
+        pool_min_size=int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+        pool_max_size=int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+    )
 }
 
 
+# Cache
+# Job state written by Celery workers is read by the web process, so both must
+# share a cache backend; local memory is only suitable for development.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -141,11 +174,11 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
+    # Bearer tokens first: API clients are resolved from the user cache without
+    # touching the session store. Sessions serve the admin and browsable API.
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
     ),
     "DEFAULT_RENDERER_CLASSES": (
         "rest_framework.renderers.JSONRenderer",
@@ -159,6 +192,9 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Seconds an authenticated user is served from the cache
+AUTH_USER_CACHE_TTL = 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timezone.timedelta(minutes=45),
     "REFRESH_TOKEN_LIFETIME": timezone.timedelta(days=1),
@@ -204,6 +240,11 @@ RABBITMQ_URL = (
 
 CELERY_BROKER_URL = RABBITMQ_URL
 
+# Broker notifications are published to, over at most this many pooled
+# connections per process
+MESSAGE_BROKER_URL = os.getenv("MESSAGE_BROKER_URL", RABBITMQ_URL)
+MESSAGE_BROKER_POOL_LIMIT = 10
+
 
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
@@ -216,6 +257,10 @@ CELERY_IGNORE_RESULT = False
 CELERY_ACCEPT_CONTENT = ["application/json", "application/x-python-serialize"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# Optional compression of task messages and results, e.g. "zlib" or "gzip".
+# Document text travels as blob keys, so payloads are small without it.
+CELERY_TASK_COMPRESSION = os.getenv("CELERY_TASK_COMPRESSION") or None
+CELERY_RESULT_COMPRESSION = os.getenv("CELERY_RESULT_COMPRESSION") or None
 
 SITE_ID = 1
 
@@ -224,6 +269,19 @@ GOOGLE_OAUTH_CLIENT_SECRET = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET")
 GOOGLE_PROJECT_ID = "kremlin"
 GOOGLE_REDIRECT_URI = "http://localhost:8000/auth/google/callback"
 
+# Connect and read timeouts, in seconds, for calls to Google's OAuth endpoints
+GOOGLE_HTTP_TIMEOUT = (3.05, 10)
+GOOGLE_HTTP_RETRIES = 3
+# Keep-alive connections kept per host
+GOOGLE_HTTP_POOL_SIZE = 10
+
+# Seconds Google's id token signing keys are cached before being refetched
+GOOGLE_JWKS_TTL = 60 * 60
+# Seconds at least between refetches for a token signed with an unknown key
+GOOGLE_JWKS_MIN_REFRESH = 60
+# Seconds of clock skew tolerated when checking an id token's expiry
+GOOGLE_ID_TOKEN_LEEWAY = 10
+
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
@@ -233,6 +291,16 @@ EMAIL_HOST_USER = "gabrielokemwa83@gmail.com"
 EMAIL_HOST_PASSWORD = "xwgr cgjj bgrc sgon"
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Queued emails are sent together over one SMTP connection: a batch goes out
+# this many seconds after its first email, with at most this many emails
+EMAIL_BATCH_WINDOW = 5
+EMAIL_BATCH_SIZE = 100
+# Seconds a claimed batch may take before its emails are queued again
+EMAIL_SENDING_TIMEOUT = 5 * 60
+# Seconds between flushes run by Celery beat, for emails left in the queue
+# when a worker died or ran out of retries
+EMAIL_FLUSH_INTERVAL = 5 * 60
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -269,4 +337,56 @@ CORS_ORIGIN_WHITELIST = [
 
 DOCUMENT_TEMPLATES_DIR = "document_templates"
 
+# Seconds a document's processing job state stays cached before falling back to the DB
+DOCUMENT_JOB_STATE_TTL = 60 * 60
+
+# Seconds a rendered export is kept before the janitor deletes it
+DOCUMENT_EXPORT_TTL = 60 * 60
+
+# Seconds an export may wait for a worker or be processing before it is
+# considered stalled (its task was lost or its worker died) and rendered again
+EXPORT_RENDER_TIMEOUT = 10 * 60
+
+# Bytes of rendered exports kept on disk; least recently used files go first
+EXPORT_STORAGE_QUOTA = int(os.getenv("EXPORT_STORAGE_QUOTA", str(2 * 1024**3)))
+
+# Seconds between runs of the export janitor (Celery beat)
+EXPORT_JANITOR_INTERVAL = 5 * 60
+CELERY_BEAT_SCHEDULE = {
+    "cleanup-export-artifacts": {
+        "task": "core.tasks.cleanup_export_artifacts_task",
+        "schedule": EXPORT_JANITOR_INTERVAL,
+    },
+    "requeue-stalled-exports": {
+        "task": "core.tasks.requeue_stalled_exports_task",
+        "schedule": EXPORT_JANITOR_INTERVAL,
+    },
+    "cleanup-pipeline-blobs": {
+        "task": "core.tasks.cleanup_blobs_task",
+        "schedule": 60 * 60,
+    },
+    "flush-queued-emails": {
+        "task": "Send Queued Emails",
+        "schedule": EMAIL_FLUSH_INTERVAL,
+    },
+}
+
+# Let the web server send rendered exports: "nginx" (X-Accel-Redirect to an
+# internal location aliased to MEDIA_ROOT), "apache" (X-Sendfile) or unset to
+# stream them from Django
+EXPORT_SENDFILE_BACKEND = os.getenv("EXPORT_SENDFILE_BACKEND")
+EXPORT_SENDFILE_PREFIX = "/protected/media/"
+
+# Processes rendering PDF exports; 0 renders in the calling process
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+
+# Codec of compressed document columns: "zlib" or "zstd" (needs zstandard).
+# Values written with either codec stay readable after switching.
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib")
+
+# zstd dictionaries trained with `manage.py train_compression_dictionary`;
+# keep old ones, rows compressed with them still need them
+TEXT_COMPRESSION_DICTIONARY_DIR = BASE_DIR / "compression_dictionaries"
+TEXT_COMPRESSION_DICTIONARY_ID = int(os.getenv("TEXT_COMPRESSION_DICTIONARY_ID", "0"))
+
 USE_GPU = False